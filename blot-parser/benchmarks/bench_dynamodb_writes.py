@@ -0,0 +1,99 @@
+"""
+Benchmark - per-record put_item loop vs batched DynamoDBBatchWriter
+
+Usage:
+    python benchmarks/bench_dynamodb_writes.py --rows 20000 --latency 0.005
+    python benchmarks/bench_dynamodb_writes.py --rows 2000 --moto
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dynamodb_writer import DynamoDBBatchWriter  # noqa: E402
+from stubs import StubDynamoDBTable  # noqa: E402
+
+
+def make_records(rows: int):
+    """Build synthetic mapped records shaped like a Bloomberg blot"""
+    return [
+        {
+            'id': f"bloomberg_bench.xlsx_{i}",
+            'trade_status': 'Accepted',
+            'security_name': f"BOND {i % 500}",
+            'isin': f"US{i:010d}",
+            'quantity': str(500 + i % 100),
+            'price': '99.35',
+            'vendor': 'bloomberg',
+        }
+        for i in range(rows)
+    ]
+
+
+def put_item_loop(table, records):
+    """The original save_to_dynamodb write path: one put_item per record"""
+    saved = 0
+    for record in records:
+        try:
+            table.put_item(Item=record)
+            saved += 1
+        except Exception:
+            pass
+    return {'saved': saved, 'failed': len(records) - saved}
+
+
+def run(label, write, records, calls):
+    start = time.perf_counter()
+    result = write(records)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} saved={result['saved']:<7} failed={result['failed']:<5} "
+          f"calls={calls():<7} time={elapsed:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--latency', type=float, default=0.002, help='Simulated seconds per API call (stub only)')
+    parser.add_argument('--unprocessed-rate', type=float, default=0.0, help='Fraction of batched items rejected')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--moto', action='store_true', help='Use a moto-mocked DynamoDB table instead of the stub')
+    args = parser.parse_args()
+
+    records = make_records(args.rows)
+
+    if args.moto:
+        import boto3
+        from collections import Counter
+        from moto import mock_aws
+
+        with mock_aws():
+            dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+            table = dynamodb.create_table(
+                TableName='blot-parser-data',
+                KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST',
+            )
+            calls = Counter()
+            table.meta.client.meta.events.register(
+                'before-call.dynamodb.*', lambda model, **kwargs: calls.update([model.name]))
+
+            run('put_item', lambda r: put_item_loop(table, r), records, lambda: calls['PutItem'])
+            writer = DynamoDBBatchWriter(table, max_workers=args.workers)
+            run('batch', writer.write_items, records, lambda: calls['BatchWriteItem'])
+        return
+
+    table = StubDynamoDBTable(latency=args.latency, unprocessed_rate=args.unprocessed_rate)
+    run('put_item', lambda r: put_item_loop(table, r), records, lambda: table.calls['PutItem'])
+
+    table.reset()
+    writer = DynamoDBBatchWriter(table, max_workers=args.workers)
+    run('batch', writer.write_items, records, lambda: table.calls['BatchWriteItem'])
+    print(f"items in table: {len(table.items)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark - per-record FieldMapper.map_records vs columnar FieldMapper.map_dataframe
+
+Usage:
+    python benchmarks/bench_field_mapping.py --rows 100000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from field_mapper import FieldMapper  # noqa: E402
+
+MAPPINGS_DIR = Path(__file__).resolve().parent.parent / 'mappings'
+
+
+def make_sheet(rows: int, vendor_fields, extra_columns: int = 5) -> pd.DataFrame:
+    """Build a synthetic cleaned blot sheet with every mapped column plus a few unmapped ones"""
+    rng = np.random.default_rng(42)
+    data = {}
+    for i, field in enumerate(vendor_fields):
+        data[field] = rng.random(rows) * 100 if i % 3 == 0 else np.array([f"{field}-{n % 97}" for n in range(rows)])
+    for i in range(extra_columns):
+        data[f"Extra {i}"] = rng.integers(0, 1000, rows)
+    return pd.DataFrame(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--vendor', default='bloomberg')
+    args = parser.parse_args()
+
+    mapper = FieldMapper(str(MAPPINGS_DIR))
+    vendor_fields = list(mapper.get_vendor_mapping(args.vendor))
+    df = make_sheet(args.rows, vendor_fields)
+    print(f"{args.rows} rows x {len(df.columns)} columns ({args.vendor})")
+
+    start = time.perf_counter()
+    records = df.to_dict('records')
+    to_dict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    per_record = mapper.map_records(records, args.vendor)
+    map_records_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mapped_df = mapper.map_dataframe(df, args.vendor)
+    map_dataframe_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columnar = mapped_df.to_dict('records')
+    columnar_time = map_dataframe_time + time.perf_counter() - start
+
+    assert per_record == columnar, 'columnar mapping output differs from per-record mapping'
+
+    per_record_time = to_dict_time + map_records_time
+    print(f"map_records (mapping only)    {map_records_time:.3f}s")
+    print(f"map_dataframe (mapping only)  {map_dataframe_time * 1000:.3f}ms "
+          f"({map_records_time / map_dataframe_time:.0f}x)")
+    print(f"to_dict + map_records         {per_record_time:.3f}s")
+    print(f"map_dataframe + to_dict       {columnar_time:.3f}s ({per_record_time / columnar_time:.1f}x)")
+
+if __name__ == '__main__':
+    main()
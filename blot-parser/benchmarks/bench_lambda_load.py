@@ -0,0 +1,277 @@
+"""
+Load test - replays synthetic S3 events through lambda_handler against local S3 and DynamoDB
+
+Synthetic blots (written by generate_blots.py) are uploaded to an in-memory S3 stand-in
+under a unique key per event, then N single-record S3 events are replayed through
+lambda_handler.lambda_handler at the requested concurrency. Writes go to an in-memory
+DynamoDB stand-in; both stand-ins can add a simulated round-trip time per API call.
+
+Reported: files/s, records/s, per-file latency (p50/p95/p99), result statuses and the S3
+and DynamoDB API calls made. Results can be saved and later runs compared against them;
+lower throughput, higher latency or more API calls per file than the saved run by more
+than the threshold is flagged and the script exits with status 1.
+
+Concurrent invocations run on threads of one process and share one warm parser, like
+records of one event do in Lambda; separate Lambda instances would not share the GIL,
+so CPU-bound parsing scales less here than across real instances. Handler settings are
+read from the environment at import and can be set with --env.
+
+Usage:
+    python benchmarks/bench_lambda_load.py --events 200 --concurrency 8 --latency 0.01 --save-baseline load.json
+    python benchmarks/bench_lambda_load.py --events 200 --concurrency 8 --latency 0.01 --baseline load.json
+    python benchmarks/bench_lambda_load.py --events 50 --env DYNAMODB_WRITE_MODE=upsert --duplicate-rate 0.1
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PARSER_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from generate_blots import generate_blot  # noqa: E402
+from stubs import StubS3Client, StubDynamoDBResource  # noqa: E402
+from idempotency import DuplicateInProgressError  # noqa: E402
+
+BUCKET = 'blot-parser-input'
+VENDORS = ('bloomberg', 'platform')
+
+# Metrics where a higher value is a regression; the others regress when they drop
+LOWER_IS_BETTER = ('p50_ms', 'p95_ms', 'p99_ms', 's3_calls_per_file', 'dynamodb_calls_per_file')
+HIGHER_IS_BETTER = ('files_per_second', 'records_per_second')
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def build_events(s3_client: StubS3Client, workbooks, count: int, duplicate_rate: float, seed: int):
+    """
+    Upload one object per event and build the matching S3 event notifications
+
+    Args:
+        s3_client: Stub S3 client to upload to
+        workbooks: (vendor, workbook bytes) pairs, used in turn
+        count: Number of distinct objects (and events)
+        duplicate_rate: Fraction of extra redeliveries of already-sent events
+        seed: Random seed for choosing and placing redeliveries
+
+    Returns:
+        List of S3 events, one record each
+    """
+    events = []
+    for index in range(count):
+        vendor, body = workbooks[index % len(workbooks)]
+        # Unique file names, so files neither share item ids nor idempotency markers
+        key = f"uploads/load/{vendor}-load-{index:05d}.xlsx"
+        etag = s3_client.put_object(Bucket=BUCKET, Key=key, Body=body)['ETag'].strip('"')
+        events.append({'Records': [{
+            'eventSource': 'aws:s3',
+            'eventName': 'ObjectCreated:Put',
+            's3': {'bucket': {'name': BUCKET},
+                   'object': {'key': key, 'size': len(body), 'eTag': etag}},
+        }]})
+
+    # Redeliveries land a little after the original, as S3 retries do
+    rng = random.Random(seed)
+    for _ in range(int(count * duplicate_rate)):
+        original = rng.randrange(count)
+        events.insert(rng.randint(original + 1, len(events)), events[original])
+
+    s3_client.reset()
+    return events
+
+
+def run_load(handler_module, events, concurrency: int):
+    """
+    Replay events through the handler and time each invocation
+
+    Args:
+        handler_module: The imported lambda_handler module
+        events: S3 events to replay, in order
+        concurrency: Invocations in flight at once
+
+    Returns:
+        (wall seconds, list of (latency seconds, file result) per invocation)
+    """
+    def invoke(event):
+        start = time.perf_counter()
+        try:
+            response = handler_module.lambda_handler(event, None)
+        except DuplicateInProgressError:
+            # Lambda would redeliver the event once the running attempt finishes
+            return time.perf_counter() - start, {'status': 'in_progress'}
+        latency = time.perf_counter() - start
+        if response['statusCode'] != 200:
+            return latency, {'status': 'error', 'message': response['body']}
+        return latency, json.loads(response['body'])['results'][0]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(invoke, events))
+    return time.perf_counter() - start, outcomes
+
+
+def summarize(wall_seconds: float, outcomes, s3_client: StubS3Client, dynamodb: StubDynamoDBResource):
+    """Turn invocation outcomes and stub call counters into the reported metrics"""
+    latencies = sorted(latency * 1000 for latency, _ in outcomes)
+    statuses = Counter(result.get('status', 'unknown') for _, result in outcomes)
+    processed = [result for _, result in outcomes if result.get('status') == 'success']
+    records = sum(result.get('records_processed', 0) for result in processed)
+
+    dynamodb_calls = Counter()
+    for table in dynamodb.tables.values():
+        dynamodb_calls.update(table.calls)
+    files = max(1, len(outcomes))
+
+    return {
+        'files': len(outcomes),
+        'records': records,
+        'wall_seconds': wall_seconds,
+        'files_per_second': len(outcomes) / wall_seconds,
+        'records_per_second': records / wall_seconds,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'mean_ms': statistics.fmean(latencies),
+        'max_ms': latencies[-1],
+        'statuses': dict(statuses),
+        's3_calls': dict(s3_client.calls),
+        'dynamodb_calls': dict(dynamodb_calls),
+        's3_calls_per_file': sum(s3_client.calls.values()) / files,
+        'dynamodb_calls_per_file': sum(dynamodb_calls.values()) / files,
+    }
+
+
+def compare(results, baseline, threshold: float):
+    """Return (metric, baseline value, current value) for every metric beyond the threshold"""
+    regressions = []
+    for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+        reference = baseline['metrics'].get(metric)
+        value = results['metrics'][metric]
+        if not reference:
+            continue
+        change = value / reference - 1
+        if (metric in LOWER_IS_BETTER and change > threshold) or \
+                (metric in HIGHER_IS_BETTER and change < -threshold):
+            regressions.append((metric, reference, value))
+    return regressions
+
+
+def git_revision() -> str:
+    """Short commit hash of the parser tree, so saved results name the version they measured"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PARSER_DIR, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=50, help='Distinct files (S3 events) to replay')
+    parser.add_argument('--concurrency', type=int, default=4, help='Invocations in flight at once')
+    parser.add_argument('--rows', type=int, default=1000, help='Data rows per sheet of each synthetic blot')
+    parser.add_argument('--sheets', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.005, help='Simulated seconds per S3/DynamoDB API call')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0,
+                        help='Fraction of events delivered a second time (exercises idempotency)')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=VALUE',
+                        help='Handler environment variable, e.g. S3_EVENT_WORKERS=8 (repeatable)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', help='Results JSON file to compare against')
+    parser.add_argument('--save-baseline', help='Write results to this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed regression ratio (default 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    # The handler reads its settings at import; EMF metrics would flood stdout
+    environment = {'METRICS_MODE': 'off'}
+    environment.update(item.split('=', 1) for item in args.env)
+    os.environ.update(environment)
+    os.chdir(PARSER_DIR)
+
+    import lambda_handler
+    logging.getLogger().setLevel(logging.WARNING)
+
+    s3_client = StubS3Client(latency=args.latency)
+    dynamodb = StubDynamoDBResource(latency=args.latency)
+    lambda_handler._s3_client = s3_client
+    lambda_handler._dynamodb = dynamodb
+    lambda_handler._parser = None
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        workbooks = [
+            (vendor, generate_blot(Path(work_dir) / f"{vendor}-synthetic.xlsx", vendor, args.rows,
+                                   args.sheets, extra_columns=5, seed=args.seed).read_bytes())
+            for vendor in VENDORS
+        ]
+    events = build_events(s3_client, workbooks, args.events, args.duplicate_rate, args.seed)
+
+    # Parser construction is the cold start, measured apart from the replay
+    start = time.perf_counter()
+    lambda_handler.get_parser()
+    init_ms = (time.perf_counter() - start) * 1000
+    s3_client.reset()
+    for table in dynamodb.tables.values():
+        table.reset()
+
+    wall_seconds, outcomes = run_load(lambda_handler, events, args.concurrency)
+    metrics = {'init_ms': init_ms, **summarize(wall_seconds, outcomes, s3_client, dynamodb)}
+
+    results = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'params': {'events': args.events, 'concurrency': args.concurrency, 'rows': args.rows,
+                   'sheets': args.sheets, 'latency': args.latency, 'duplicate_rate': args.duplicate_rate,
+                   'env': environment},
+        'metrics': metrics,
+    }
+
+    print(f"{metrics['files']} files ({args.rows} rows x {args.sheets} sheets), concurrency {args.concurrency}, "
+          f"{args.latency * 1000:.1f} ms per API call")
+    print(f"  parser init      {metrics['init_ms']:10.1f} ms")
+    print(f"  wall time        {metrics['wall_seconds']:10.2f} s")
+    print(f"  files/s          {metrics['files_per_second']:10.2f}")
+    print(f"  records/s        {metrics['records_per_second']:10.0f}")
+    print(f"  latency p50/p95/p99  {metrics['p50_ms']:.0f} / {metrics['p95_ms']:.0f} / "
+          f"{metrics['p99_ms']:.0f} ms (max {metrics['max_ms']:.0f})")
+    print(f"  statuses         {metrics['statuses']}")
+    print(f"  S3 calls         {metrics['s3_calls']} ({metrics['s3_calls_per_file']:.1f}/file)")
+    print(f"  DynamoDB calls   {metrics['dynamodb_calls']} ({metrics['dynamodb_calls_per_file']:.1f}/file)")
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+        print(f"Saved results to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get('params') != results['params']:
+            print('Warning: baseline was recorded with different parameters')
+        regressions = compare(results, baseline, args.threshold)
+        for metric, reference, value in regressions:
+            print(f"REGRESSION {metric}: {reference:.2f} -> {value:.2f} "
+                  f"({(value / reference - 1) * 100:+.0f}%) vs {baseline.get('revision', 'baseline')}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} vs {baseline.get('revision', 'baseline')}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
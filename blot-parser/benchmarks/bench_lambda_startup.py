@@ -0,0 +1,88 @@
+"""
+Benchmark - Lambda cold start: handler import time, first (cold) and second (warm) invocation
+
+Each run starts a fresh interpreter, imports lambda_handler, points it at in-memory S3 and
+DynamoDB stand-ins and invokes it twice with an S3 event for a sample blot.
+
+Usage:
+    python benchmarks/bench_lambda_startup.py --runs 5
+    python benchmarks/bench_lambda_startup.py --runs 5 --json > startup.json
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_FILE = PARSER_DIR.parent / 'Input-files' / 'bloomberg-vcon2211-fixed-income.xlsx'
+
+
+def child(sample_file: str) -> None:
+    """Measure one cold start inside a fresh interpreter and print the timings as JSON"""
+    import logging
+    import os
+
+    os.chdir(PARSER_DIR)
+    sys.path.insert(0, str(PARSER_DIR))
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+    start = time.perf_counter()
+    import lambda_handler
+    import_ms = (time.perf_counter() - start) * 1000
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from stubs import StubS3Client, StubDynamoDBResource
+    lambda_handler._s3_client = StubS3Client()
+    lambda_handler._dynamodb = StubDynamoDBResource()
+    timings = {'import_ms': import_ms}
+    for label in ('first_invocation_ms', 'warm_invocation_ms'):
+        # A separate key per invocation, so the idempotency guard does not skip the warm one
+        key = f"uploads/{label}/{Path(sample_file).name}"
+        lambda_handler._s3_client.put_object(Bucket='blot-parser-input', Key=key,
+                                             Body=Path(sample_file).read_bytes())
+        event = {'Records': [{'s3': {'bucket': {'name': 'blot-parser-input'}, 'object': {'key': key}}}]}
+
+        start = time.perf_counter()
+        result = lambda_handler.lambda_handler(event, None)
+        timings[label] = (time.perf_counter() - start) * 1000
+        assert result['statusCode'] == 200, result
+
+    print(json.dumps(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--file', default=str(SAMPLE_FILE), help='Workbook to process')
+    parser.add_argument('--json', action='store_true', help='Print median timings as JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.file)
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run([sys.executable, __file__, '--child', '--file', args.file],
+                                check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    medians = {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+
+    if args.json:
+        print(json.dumps({'runs': args.runs, 'median': medians}, indent=2))
+        return
+
+    print(f"median of {args.runs} cold starts")
+    for metric, value in medians.items():
+        print(f"  {metric:<22} {value:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark - Excel reader backends (openpyxl, calamine, xlrd) in pandas and streaming modes
+
+Reads the sample blots in Input-files and, with --rows, a synthetic blot of that size,
+with every installed engine that can read each file. Engines that are not installed are
+listed as skipped.
+
+Usage:
+    python benchmarks/bench_readers.py
+    python benchmarks/bench_readers.py --rows 20000 --repeat 3
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PARSER_DIR))
+
+from excel_processor import ExcelProcessor  # noqa: E402
+from reader_backends import BACKENDS  # noqa: E402
+from generate_blots import generate_blot  # noqa: E402
+
+INPUT_DIR = PARSER_DIR.parent / 'Input-files'
+MODES = ('pandas', 'streaming')
+
+
+def bench_file(path: Path, repeat: int) -> dict:
+    """Median read time for each (mode, engine) that can read the file"""
+    results = {}
+    for name, backend in BACKENDS.items():
+        if path.suffix.lower() not in backend.extensions:
+            continue
+        if not backend.available():
+            print(f"  {name:<10} skipped ({backend.module} not installed)")
+            continue
+        for mode in MODES:
+            processor = ExcelProcessor(reader_mode=mode, reader_engine=name)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                excel_data = processor.read_excel_file(path)
+                timings.append(time.perf_counter() - start)
+            rows = sum(len(df) for df in excel_data.values())
+            results[(mode, name)] = (statistics.median(timings), rows)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=0, help='Also benchmark a synthetic blot with this many rows')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per case; the median is reported')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        files = sorted(INPUT_DIR.glob('*.xls*'))
+        if args.rows:
+            files.append(generate_blot(Path(work_dir) / f"bloomberg-synthetic-{args.rows}.xlsx",
+                                       'bloomberg', args.rows, extra_columns=5))
+
+        for path in files:
+            print(f"{path.name} ({path.stat().st_size / 1024:.0f} KB)")
+            results = bench_file(path, args.repeat)
+            baseline = results.get(('pandas', 'openpyxl'), (None, 0))[0]
+            for (mode, name), (seconds, rows) in sorted(results.items(), key=lambda item: item[1][0]):
+                speedup = f"{baseline / seconds:5.1f}x" if baseline else ''
+                print(f"  {mode:<10} {name:<10} {seconds * 1000:9.1f} ms  {rows:8d} rows  {speedup}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
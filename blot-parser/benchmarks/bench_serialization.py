@@ -0,0 +1,109 @@
+"""
+Benchmark - record serialization: to_dict + json.dump(default=str) vs RecordEncoder + writers
+
+Cases, on one mapped and typed synthetic sheet:
+    json.dump            to_dict('records') + json.dump(indent=2, default=str) (previous path)
+    encoder+json/<b>     RecordEncoder('json') + JsonArrayWriter with the stdlib / orjson backend
+    encoder+ndjson/<b>   RecordEncoder('json') + NdjsonWriter
+    dynamodb/json-trip   to_dict + json round trip with parse_float=Decimal (per-value workaround)
+    dynamodb/encoder     RecordEncoder('dynamodb')
+
+Usage:
+    python benchmarks/bench_serialization.py --rows 50000
+"""
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PARSER_DIR))
+
+from boto3.dynamodb.types import TypeSerializer  # noqa: E402
+
+from excel_processor import ExcelProcessor  # noqa: E402
+from field_mapper import FieldMapper  # noqa: E402
+from field_schema import FieldSchema  # noqa: E402
+from output_writers import JsonArrayWriter, NdjsonWriter  # noqa: E402
+from record_encoder import RecordEncoder, JsonSerializer, orjson  # noqa: E402
+from generate_blots import generate_blot  # noqa: E402
+
+
+def timed(func):
+    """Run func once and return (seconds, result)"""
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def load_mapped_sheet(work_dir: Path, vendor: str, rows: int):
+    """Generate a blot, then read, clean, map and type its first sheet"""
+    path = generate_blot(work_dir / f"{vendor}-synthetic.xlsx", vendor, rows, extra_columns=5)
+    processor = ExcelProcessor()
+    df = processor.clean_dataframe(next(iter(processor.read_excel_file(path).values())))
+    mapped_df = FieldMapper(str(PARSER_DIR / 'mappings')).map_dataframe(df, vendor)
+    return FieldSchema.load(PARSER_DIR / 'mappings' / 'generic.csv').coerce_dataframe(mapped_df)
+
+
+def write_with(writer_class, path: Path, records, **kwargs):
+    with writer_class(path, **kwargs) as writer:
+        writer.write_records(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--vendor', default='bloomberg', choices=['bloomberg', 'platform'])
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    backends = ['stdlib'] + (['orjson'] if orjson is not None else [])
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        df = load_mapped_sheet(work_dir, args.vendor, args.rows)
+        print(f"{len(df)} rows x {len(df.columns)} columns ({args.vendor}), backends: {', '.join(backends)}")
+        results = {}
+
+        def previous_json():
+            with open(work_dir / 'previous.json', 'w') as f:
+                json.dump(df.to_dict('records'), f, indent=2, default=str)
+        results['json.dump'], _ = timed(previous_json)
+
+        for backend in backends:
+            serializer = JsonSerializer(backend)
+            results[f'encoder+json/{backend}'], _ = timed(lambda: write_with(
+                JsonArrayWriter, work_dir / f'{backend}.json', RecordEncoder().encode(df),
+                serializer=serializer))
+            results[f'encoder+ndjson/{backend}'], _ = timed(lambda: write_with(
+                NdjsonWriter, work_dir / f'{backend}.ndjson', RecordEncoder().encode(df),
+                serializer=serializer))
+
+        previous = json.loads((work_dir / 'previous.json').read_text())
+        for backend in backends:
+            assert json.loads((work_dir / f'{backend}.json').read_text()) == previous, \
+                f"{backend} JSON output differs from json.dump"
+
+        results['dynamodb/json-trip'], tripped = timed(lambda: [
+            json.loads(json.dumps(record, default=str), parse_float=Decimal)
+            for record in df.to_dict('records')])
+        results['dynamodb/encoder'], items = timed(lambda: RecordEncoder('dynamodb').encode(df))
+
+        # Both item lists must be accepted by boto3
+        serializer = TypeSerializer()
+        for item in (tripped[0], items[0]):
+            {key: serializer.serialize(value) for key, value in item.items()}
+
+    baseline = results['json.dump']
+    for case, seconds in results.items():
+        reference = results['dynamodb/json-trip'] if case.startswith('dynamodb') else baseline
+        print(f"  {case:<24} {seconds:8.3f}s  {reference / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
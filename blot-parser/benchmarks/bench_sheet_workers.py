@@ -0,0 +1,80 @@
+"""
+Benchmark - sheet-level parallelism: one workbook's sheets prepared sequentially, on
+threads and on worker processes
+
+Reads a synthetic multi-sheet blot once per case and streams it through the record
+pipeline; every case must produce the same records and summary as the sequential run.
+
+Usage:
+    python benchmarks/bench_sheet_workers.py --rows 20000 --sheets 12 --workers 4
+"""
+
+import argparse
+import logging
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PARSER_DIR))
+
+from excel_processor import ExcelProcessor  # noqa: E402
+from field_mapper import FieldMapper  # noqa: E402
+from record_pipeline import RecordPipeline  # noqa: E402
+from generate_blots import generate_blot  # noqa: E402
+
+
+def run_pipeline(processor: ExcelProcessor, pipeline: RecordPipeline, path: Path, vendor: str):
+    """Read the workbook, then time only the clean -> map -> encode pipeline"""
+    excel_data = processor.read_excel_file(path)
+    records = []
+    start = time.perf_counter()
+    summary = pipeline.run(excel_data, path.name, vendor, records.extend)
+    return time.perf_counter() - start, summary, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000, help='Data rows per sheet')
+    parser.add_argument('--sheets', type=int, default=12)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--vendor', default='bloomberg', choices=['bloomberg', 'platform'])
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per case; the median is reported')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    processor = ExcelProcessor()
+    field_mapper = FieldMapper(str(PARSER_DIR / 'mappings'))
+    cases = [('sequential', 1, 'thread'), ('thread', args.workers, 'thread'),
+             ('process', args.workers, 'process')]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = generate_blot(Path(work_dir) / f"{args.vendor}-synthetic.xlsx", args.vendor,
+                             args.rows, args.sheets, extra_columns=5)
+        print(f"{args.sheets} sheets x {args.rows} rows ({args.vendor}), {args.workers} workers")
+
+        expected = None
+        results = {}
+        for case, workers, executor in cases:
+            pipeline = RecordPipeline(processor, field_mapper, sheet_workers=workers,
+                                      sheet_executor=executor, parallel_min_rows=0)
+            timings = []
+            # The worker pool is started by the first run and reused by the others
+            for _ in range(args.repeat):
+                seconds, summary, records = run_pipeline(processor, pipeline, path, args.vendor)
+                timings.append(seconds)
+            pipeline.close()
+            if expected is None:
+                expected = (summary, records)
+            assert (summary, records) == expected, f"{case} output differs from the sequential run"
+            results[case] = statistics.median(timings)
+
+    baseline = results['sequential']
+    for case, seconds in results.items():
+        print(f"  {case:<12} {seconds:8.3f}s  {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Stage-by-stage benchmark suite - times each parsing stage separately and end to end
+
+Stages: read_excel_file, clean_dataframe, process_sheet, map_records, save_json_data and
+end_to_end (BlotParser.process_and_save_file). Inputs are synthetic blots written by
+generate_blots.py. Results can be saved as a baseline and later runs compared against it;
+any stage slower than the baseline by more than the threshold is flagged and the script
+exits with status 1.
+
+Usage:
+    python benchmarks/bench_stages.py --rows 20000 --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_stages.py --rows 20000 --baseline benchmarks/baseline.json --threshold 0.15
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PARSER_DIR))
+
+from blot_parser import BlotParser  # noqa: E402
+from generate_blots import generate_blot  # noqa: E402
+
+
+def time_call(func, repeat: int):
+    """Run func repeat times and return (median seconds, last result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def bench_file(parser: BlotParser, file_path: Path, repeat: int) -> dict:
+    """Time every stage for one workbook"""
+    processor = parser.excel_processor
+    mapper = parser.field_mapper
+    vendor = parser.vendor_detector.extract_vendor_from_filename(file_path.name)
+    results = {}
+
+    seconds, excel_data = time_call(lambda: processor.read_excel_file(file_path), repeat)
+    results['read_excel_file'] = seconds
+
+    seconds, _ = time_call(lambda: [processor.clean_dataframe(df) for df in excel_data.values()], repeat)
+    results['clean_dataframe'] = seconds
+
+    seconds, sheets = time_call(
+        lambda: [processor.process_sheet(name, df, file_path.name) for name, df in excel_data.items()], repeat)
+    results['process_sheet'] = seconds
+
+    records = [record for sheet in sheets for record in sheet['data']]
+    seconds, mapped_records = time_call(lambda: mapper.map_records(records, vendor), repeat)
+    results['map_records'] = seconds
+
+    file_data = {'file_name': file_path.name}
+    seconds, _ = time_call(lambda: parser.file_manager.save_json_data(file_data, mapped_records), repeat)
+    results['save_json_data'] = seconds
+
+    seconds, _ = time_call(lambda: parser.process_and_save_file(file_path), repeat)
+    results['end_to_end'] = seconds
+
+    results['rows'] = len(records)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return (case, stage, baseline, current) tuples for stages slower than the threshold allows"""
+    regressions = []
+    for case, stages in results['cases'].items():
+        for stage, seconds in stages.items():
+            if stage == 'rows':
+                continue
+            reference = baseline.get('cases', {}).get(case, {}).get(stage)
+            if reference and seconds > reference * (1 + threshold):
+                regressions.append((case, stage, reference, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=5000, help='Data rows per sheet')
+    parser.add_argument('--sheets', type=int, default=2)
+    parser.add_argument('--blank-rows', type=int, default=1)
+    parser.add_argument('--extra-columns', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage; the median is reported')
+    parser.add_argument('--baseline', help='Baseline JSON file to compare against')
+    parser.add_argument('--save-baseline', help='Write results to this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown ratio (default 0.2 = 20%%)')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    os.chdir(PARSER_DIR)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        files = {
+            vendor: generate_blot(work_dir / 'input' / f"{vendor}-synthetic.xlsx", vendor, args.rows, args.sheets,
+                                  args.blank_rows, extra_columns=args.extra_columns)
+            for vendor in ('bloomberg', 'platform')
+        }
+        blot_parser = BlotParser(str(work_dir / 'input'), str(work_dir / 'output'))
+
+        results = {
+            'python': platform.python_version(),
+            'params': {'rows': args.rows, 'sheets': args.sheets, 'blank_rows': args.blank_rows,
+                       'extra_columns': args.extra_columns, 'repeat': args.repeat},
+            'cases': {vendor: bench_file(blot_parser, path, args.repeat) for vendor, path in files.items()},
+        }
+
+    for case, stages in results['cases'].items():
+        print(f"{case} ({stages['rows']} rows)")
+        for stage, seconds in stages.items():
+            if stage != 'rows':
+                print(f"  {stage:<16} {seconds * 1000:10.1f} ms  {stages['rows'] / seconds:12.0f} rows/s")
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+        print(f"Saved baseline to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline.get('params') != results['params']:
+            print('Warning: baseline was recorded with different parameters')
+        regressions = compare(results, baseline, args.threshold)
+        for case, stage, reference, seconds in regressions:
+            print(f"REGRESSION {case}.{stage}: {reference * 1000:.1f} ms -> {seconds * 1000:.1f} ms "
+                  f"(+{(seconds / reference - 1) * 100:.0f}%)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
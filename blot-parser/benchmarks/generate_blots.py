@@ -0,0 +1,150 @@
+"""
+Synthetic blot generator - writes realistic Bloomberg and platform style Excel blots
+
+Column headers come from the vendor's mapping CSV so the generated files exercise the
+real field mapping. Bloomberg style blots carry a title banner above the table like the
+VCON downloads in Input-files; platform style blots start directly with blank rows.
+
+Usage:
+    python benchmarks/generate_blots.py --vendor bloomberg --rows 20000 --sheets 2
+    python benchmarks/generate_blots.py --vendor platform --rows 5000 --blank-rows 0 --extra-columns 10
+"""
+
+import argparse
+import csv
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import List, Optional
+
+from openpyxl import Workbook
+
+MAPPINGS_DIR = Path(__file__).resolve().parent.parent / 'mappings'
+
+STATUSES = ['Accepted', 'Rejected', 'Cancelled', 'Pending']
+SIDES = ['[B]', '[S]']
+ISSUERS = ['AYDEMT', 'GDZELE', 'TURKTI', 'PETBRA', 'CEMEX', 'ECOPET', 'KSA', 'UKRAIN', 'ROMANI', 'PEMEX']
+BROKERS = ['LATITUDE CAPITAL PARTNERS LTD', 'NORTHBRIDGE SECURITIES', 'HARBOUR MARKETS LLP', 'ATLAS FIXED INCOME']
+CURRENCIES = ['USD', 'EUR', 'GBP']
+COUNTRIES = ['TR', 'BR', 'MX', 'SA', 'RO', 'CO']
+
+
+def load_vendor_fields(vendor: str) -> List[str]:
+    """Read the vendor field names from the vendor's mapping CSV"""
+    with open(MAPPINGS_DIR / f"{vendor}.csv", 'r', encoding='utf-8') as f:
+        return [row['vendor_field'] for row in csv.DictReader(f)]
+
+
+def cell_value(field: str, rng: random.Random, trade_date: datetime):
+    """Produce a plausible value for a vendor column based on its header"""
+    name = field.lower()
+
+    if 'status' in name:
+        return rng.choice(STATUSES)
+    if name == 'side':
+        return rng.choice(SIDES)
+    if name in ('isin',):
+        return f"XS{rng.randrange(10 ** 10):010d}"
+    if name in ('cusip',):
+        letters = 'ABCDEFGHJKLMNPQRSTUVWXYZ'
+        return f"{rng.choice(letters)}{rng.choice(letters)}{rng.randrange(10 ** 7):07d}"
+    if name in ('ticker',):
+        return rng.choice(ISSUERS)
+    if name in ('security', 'secdesc'):
+        maturity = f"{rng.randrange(1, 13):02d}/{rng.randrange(1, 28):02d}/3{rng.randrange(10)}"
+        return f"{rng.choice(ISSUERS)} {rng.choice([4, 5, 6, 7, 9])} {maturity} REGS"
+    if 'brkr' in name or name in ('customer', 'dlr alias'):
+        return rng.choice(BROKERS)
+    if 'qty' in name:
+        return float(rng.choice([100, 250, 500, 1000, 2000]))
+    if name in ('price', 'all-in'):
+        return round(rng.uniform(85, 110), 4)
+    if 'yield' in name or 'spread' in name:
+        return round(rng.uniform(2, 12), 3)
+    if name in ('settl money', 'net', 'prin exch'):
+        return round(rng.uniform(1e5, 5e6), 2)
+    if name == 'acc int':
+        return round(rng.uniform(0, 5e4), 2)
+    if 'days' in name or name == 'seq#':
+        return rng.randrange(1, 400)
+    if name == 'trade dt':
+        return trade_date
+    if name == 'setdt':
+        return trade_date + timedelta(days=2)
+    if 'time' in name:
+        return trade_date + timedelta(seconds=rng.randrange(8 * 3600, 18 * 3600))
+    if 'curncy' in name:
+        return rng.choice(CURRENCIES)
+    if 'cntry' in name:
+        return rng.choice(COUNTRIES)
+    if name.endswith('id') or name == 'id':
+        return rng.randrange(10 ** 8, 10 ** 9)
+    return f"{field} {rng.randrange(1000)}"
+
+
+def generate_blot(output_path: Path, vendor: str = 'bloomberg', rows: int = 1000, sheets: int = 1,
+                  blank_rows: int = 1, mapped_columns: Optional[int] = None, extra_columns: int = 0,
+                  seed: int = 42) -> Path:
+    """
+    Write a synthetic blot workbook
+
+    Args:
+        output_path: Path of the .xlsx file to create
+        vendor: 'bloomberg' (title banner above the table) or 'platform' style;
+            also selects the mapping CSV the headers come from
+        rows: Data rows per sheet
+        sheets: Number of sheets
+        blank_rows: Blank rows before the header row
+        mapped_columns: Number of mapped vendor columns to include (default: all)
+        extra_columns: Number of additional unmapped columns
+        seed: Random seed for reproducible files
+
+    Returns:
+        Path of the written workbook
+    """
+    rng = random.Random(seed)
+    fields = load_vendor_fields(vendor)[:mapped_columns]
+    header = fields + [f"Custom Field {i}" for i in range(extra_columns)]
+    base_date = datetime(2025, 1, 2)
+
+    workbook = Workbook(write_only=True)
+    for sheet_index in range(sheets):
+        sheet = workbook.create_sheet('Download Results' if sheet_index == 0 else f"Allocations {sheet_index}")
+
+        if vendor == 'bloomberg':
+            sheet.append([f"BLOT Download For User {rng.randrange(10 ** 7, 10 ** 8)}"])
+        for _ in range(blank_rows):
+            sheet.append([])
+
+        sheet.append(header)
+        for _ in range(rows):
+            trade_date = base_date + timedelta(days=rng.randrange(250))
+            sheet.append([cell_value(field, rng, trade_date) for field in header])
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    workbook.save(output_path)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--vendor', default='bloomberg', choices=['bloomberg', 'platform'])
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--sheets', type=int, default=1)
+    parser.add_argument('--blank-rows', type=int, default=1)
+    parser.add_argument('--mapped-columns', type=int, default=None)
+    parser.add_argument('--extra-columns', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default='synthetic-blots')
+    parser.add_argument('--name', default=None, help='File name (default: <vendor>-synthetic-<rows>.xlsx)')
+    args = parser.parse_args()
+
+    name = args.name or f"{args.vendor}-synthetic-{args.rows}.xlsx"
+    path = generate_blot(Path(args.output_dir) / name, args.vendor, args.rows, args.sheets, args.blank_rows,
+                         args.mapped_columns, args.extra_columns, args.seed)
+    print(path)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,315 @@
+"""
+Local AWS stand-ins for benchmarks - in-memory S3 and DynamoDB with simulated latency
+"""
+
+import hashlib
+import random
+import threading
+import time
+import zlib
+from collections import Counter
+from io import BytesIO
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional
+
+from boto3.dynamodb.conditions import ConditionBase, AttributeBase
+from botocore.exceptions import ClientError
+
+
+class StubDynamoDBClient:
+    """Low-level client stand-in implementing the calls the blot parser makes"""
+
+    def __init__(self, table: 'StubDynamoDBTable'):
+        self.table = table
+
+    def batch_write_item(self, RequestItems: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        self.table._call('BatchWriteItem')
+        unprocessed = {}
+
+        for table_name, requests in RequestItems.items():
+            if len(requests) > 25:
+                raise ValueError('Too many items requested for the BatchWriteItem call')
+
+            rejected = []
+            for request in requests:
+                if random.random() < self.table.unprocessed_rate:
+                    rejected.append(request)
+                elif 'PutRequest' in request:
+                    self.table._store(request['PutRequest']['Item'])
+                else:
+                    self.table._remove(request['DeleteRequest']['Key'])
+
+            if rejected:
+                unprocessed[table_name] = rejected
+
+        return {'UnprocessedItems': unprocessed}
+
+    def batch_get_item(self, RequestItems: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        self.table._call('BatchGetItem')
+        responses = {}
+        unprocessed = {}
+
+        for table_name, request in RequestItems.items():
+            if len(request['Keys']) > 100:
+                raise ValueError('Too many items requested for the BatchGetItem call')
+
+            names = request.get('ExpressionAttributeNames', {})
+            projection = [names.get(name.strip(), name.strip())
+                          for name in request.get('ProjectionExpression', '').split(',') if name.strip()]
+
+            found, rejected = [], []
+            for key in request['Keys']:
+                if random.random() < self.table.unprocessed_rate:
+                    rejected.append(key)
+                    continue
+                item = self.table.items.get(key['id'])
+                if item is not None:
+                    found.append({k: v for k, v in item.items() if not projection or k in projection})
+
+            responses[table_name] = found
+            if rejected:
+                unprocessed[table_name] = {**request, 'Keys': rejected}
+
+        return {'Responses': responses, 'UnprocessedKeys': unprocessed}
+
+
+class StubDynamoDBTable:
+    """Table resource stand-in keyed on 'id', counting every API call it receives"""
+
+    # Global secondary indexes: name -> (partition key, sort key)
+    INDEXES = {'VendorIndex': ('vendor', 'processed_at')}
+
+    def __init__(self, name: str = 'blot-parser-data', latency: float = 0.0, unprocessed_rate: float = 0.0):
+        """
+        Initialize the stub table
+
+        Args:
+            name: Table name
+            latency: Simulated round-trip time per API call in seconds
+            unprocessed_rate: Probability that a batched item is returned as unprocessed
+        """
+        self.name = name
+        self.latency = latency
+        self.unprocessed_rate = unprocessed_rate
+        self.items = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self.meta = SimpleNamespace(client=StubDynamoDBClient(self))
+
+    def _call(self, operation: str) -> None:
+        with self._lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _store(self, item: Dict[str, Any]) -> None:
+        with self._lock:
+            self.items[item['id']] = dict(item)
+
+    def _remove(self, key: Dict[str, Any]) -> None:
+        with self._lock:
+            self.items.pop(key['id'], None)
+
+    def put_item(self, Item: Dict[str, Any], ConditionExpression: Optional[ConditionBase] = None,
+                 **kwargs) -> Dict[str, Any]:
+        self._call('PutItem')
+        with self._lock:
+            self._check(self.items.get(Item['id']), ConditionExpression)
+            self.items[Item['id']] = dict(Item)
+        return {}
+
+    def get_item(self, Key: Dict[str, Any], ProjectionExpression: Optional[str] = None,
+                 ExpressionAttributeNames: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        self._call('GetItem')
+        item = self.items.get(Key['id'])
+        if item is None:
+            return {}
+        return {'Item': self._project(item, ProjectionExpression, ExpressionAttributeNames)}
+
+    def query(self, KeyConditionExpression: ConditionBase, IndexName: Optional[str] = None,
+              FilterExpression: Optional[ConditionBase] = None, ScanIndexForward: bool = True,
+              Limit: Optional[int] = None, ExclusiveStartKey: Optional[Dict[str, Any]] = None,
+              ProjectionExpression: Optional[str] = None,
+              ExpressionAttributeNames: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        self._call('Query')
+        key_names = self.INDEXES[IndexName] if IndexName else ('id',)
+        with self._lock:
+            # Items without every index key attribute are not in the index
+            items = [item for item in self.items.values()
+                     if all(name in item for name in key_names) and self._evaluate(item, KeyConditionExpression)]
+        items.sort(key=lambda item: (item.get(key_names[-1]), item['id']), reverse=not ScanIndexForward)
+        return self._page(items, key_names, FilterExpression, Limit, ExclusiveStartKey,
+                          ProjectionExpression, ExpressionAttributeNames)
+
+    def scan(self, FilterExpression: Optional[ConditionBase] = None, Segment: Optional[int] = None,
+             TotalSegments: Optional[int] = None, Limit: Optional[int] = None,
+             ExclusiveStartKey: Optional[Dict[str, Any]] = None, ProjectionExpression: Optional[str] = None,
+             ExpressionAttributeNames: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        self._call('Scan')
+        with self._lock:
+            items = sorted(self.items.values(), key=lambda item: item['id'])
+        if TotalSegments:
+            # Segments partition the table by a hash of the key, like DynamoDB's
+            items = [item for item in items if zlib.crc32(item['id'].encode()) % TotalSegments == Segment]
+        return self._page(items, ('id',), FilterExpression, Limit, ExclusiveStartKey,
+                          ProjectionExpression, ExpressionAttributeNames)
+
+    @classmethod
+    def _page(cls, items: List[Dict[str, Any]], key_names, filter_expression: Optional[ConditionBase],
+              limit: Optional[int], start_key: Optional[Dict[str, Any]], projection: Optional[str],
+              names: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        """Return one page of ordered items: Limit counts items read before the filter, like DynamoDB"""
+        start = 0
+        if start_key:
+            start = next(i for i, item in enumerate(items) if item['id'] == start_key['id']) + 1
+        evaluated = items[start:start + limit] if limit else items[start:]
+        matched = [item for item in evaluated
+                   if filter_expression is None or cls._evaluate(item, filter_expression)]
+
+        response = {'Items': [cls._project(item, projection, names) for item in matched],
+                    'Count': len(matched), 'ScannedCount': len(evaluated)}
+        if evaluated and start + len(evaluated) < len(items):
+            last = evaluated[-1]
+            response['LastEvaluatedKey'] = {name: last[name] for name in dict.fromkeys(['id', *key_names])}
+        return response
+
+    @staticmethod
+    def _project(item: Dict[str, Any], projection: Optional[str], names: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        """Copy an item, keeping only the attributes of a ProjectionExpression if one is given"""
+        if not projection:
+            return dict(item)
+        names = names or {}
+        attributes = [names.get(name.strip(), name.strip()) for name in projection.split(',')]
+        return {key: value for key, value in item.items() if key in attributes}
+
+    def delete_item(self, Key: Dict[str, Any], ConditionExpression: Optional[ConditionBase] = None,
+                    **kwargs) -> Dict[str, Any]:
+        self._call('DeleteItem')
+        with self._lock:
+            self._check(self.items.get(Key['id']), ConditionExpression)
+            self.items.pop(Key['id'], None)
+        return {}
+
+    @classmethod
+    def _check(cls, item: Optional[Dict[str, Any]], condition: Optional[ConditionBase]) -> None:
+        """Raise ConditionalCheckFailedException like DynamoDB if the condition does not hold"""
+        if condition is not None and not cls._evaluate(item or {}, condition):
+            raise ClientError({'Error': {'Code': 'ConditionalCheckFailedException',
+                                         'Message': 'The conditional request failed'}}, 'PutItem')
+
+    @classmethod
+    def _evaluate(cls, item: Dict[str, Any], condition: ConditionBase) -> bool:
+        """Evaluate the boto3 conditions used by the parser: AND/OR/NOT, exists, comparisons, BETWEEN, begins_with"""
+        expression = condition.get_expression()
+        operator, values = expression['operator'], expression['values']
+        if operator == 'AND':
+            return all(cls._evaluate(item, value) for value in values)
+        if operator == 'OR':
+            return any(cls._evaluate(item, value) for value in values)
+        if operator == 'NOT':
+            return not cls._evaluate(item, values[0])
+
+        name = values[0].name
+        if operator == 'BETWEEN':
+            return name in item and values[1] <= item[name] <= values[2]
+        if operator == 'begins_with':
+            return name in item and str(item[name]).startswith(values[1])
+        if operator == 'attribute_exists':
+            return name in item
+        if operator == 'attribute_not_exists':
+            return name not in item
+        if name not in item:
+            return False
+
+        operand = item.get(values[1].name) if isinstance(values[1], AttributeBase) else values[1]
+        comparisons = {
+            '=': lambda a, b: a == b, '<>': lambda a, b: a != b,
+            '<': lambda a, b: a < b, '<=': lambda a, b: a <= b,
+            '>': lambda a, b: a > b, '>=': lambda a, b: a >= b,
+        }
+        if operator not in comparisons:
+            raise NotImplementedError(f"Condition operator '{operator}' is not supported by the stub")
+        return comparisons[operator](item[name], operand)
+
+    def reset(self) -> None:
+        """Clear stored items and call counters"""
+        self.items.clear()
+        self.calls.clear()
+
+
+class StubDynamoDBResource:
+    """DynamoDB resource stand-in handing out one StubDynamoDBTable per table name"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables = {}
+
+    def Table(self, name: str) -> StubDynamoDBTable:
+        if name not in self.tables:
+            self.tables[name] = StubDynamoDBTable(name, latency=self.latency)
+        return self.tables[name]
+
+
+class StubS3Client:
+    """S3 client stand-in storing objects in memory, counting every API call it receives"""
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Initialize the stub client
+
+        Args:
+            latency: Simulated round-trip time per API call in seconds
+        """
+        self.latency = latency
+        self.objects = {}
+        # (bucket, key, version id) -> body of every version ever put, like a versioned bucket
+        self.versions = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _call(self, operation: str) -> None:
+        with self._lock:
+            self.calls[operation] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, **kwargs) -> Dict[str, Any]:
+        self._call('PutObject')
+        version_id = f"v{len(self.versions) + 1}"
+        self.objects[(Bucket, Key)] = Body
+        self.versions[(Bucket, Key, version_id)] = Body
+        return {'ETag': self._etag(Body), 'VersionId': version_id}
+
+    def head_object(self, Bucket: str, Key: str, VersionId: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self._call('HeadObject')
+        body = self._body(Bucket, Key, VersionId)
+        return {'ContentLength': len(body), 'ETag': self._etag(body)}
+
+    def get_object(self, Bucket: str, Key: str, Range: str = None, VersionId: Optional[str] = None,
+                   IfMatch: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self._call('GetObject')
+        full = self._body(Bucket, Key, VersionId)
+        if IfMatch and IfMatch != self._etag(full):
+            raise ClientError({'Error': {'Code': 'PreconditionFailed',
+                                         'Message': 'At least one of the pre-conditions you specified did not hold'}},
+                              'GetObject')
+        body = full
+        response = {'ETag': self._etag(full)}
+        if Range:
+            start, end = Range.replace('bytes=', '').split('-')
+            body = full[int(start):int(end) + 1]
+            response['ContentRange'] = f"bytes {start}-{int(start) + len(body) - 1}/{len(full)}"
+        return {**response, 'Body': BytesIO(body), 'ContentLength': len(body)}
+
+    def _body(self, bucket: str, key: str, version_id: Optional[str]) -> bytes:
+        if version_id:
+            return self.versions[(bucket, key, version_id)]
+        return self.objects[(bucket, key)]
+
+    @staticmethod
+    def _etag(body: bytes) -> str:
+        return f'"{hashlib.md5(body).hexdigest()}"'
+
+    def reset(self) -> None:
+        """Clear call counters"""
+        self.calls.clear()
@@ -2,66 +2,113 @@
 Blot Parser - Main orchestrator for Excel file processing with field mapping
 """
 
+import argparse
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable
 import logging
 
 from field_mapper import FieldMapper
-from excel_processor import ExcelProcessor
+from excel_processor import ExcelProcessor, NoProjectedColumnsError
 from vendor_detector import VendorDetector
 from file_manager import FileManager
+from record_pipeline import RecordPipeline
+from output_writers import OUTPUT_SUFFIXES
+from instrumentation import create_instrumentation
+from input_watcher import InputWatcher
+from sharding import Shard, parse_shard, summarize_run, write_summary, load_summaries, \
+    merge_summaries, format_report
+from config import PARSER_WORKERS, OUTPUT_FORMAT, METRICS_MODE, METRICS_TRACE_MEMORY, \
+    SHEET_WORKERS, WATCH_POLL_INTERVAL, WATCH_SETTLE_SECONDS, WATCH_QUEUE_SIZE, PROJECTION_MODE, \
+    PROJECTION_FIELDS, DEFAULT_INPUT_DIR, DEFAULT_OUTPUT_DIR
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Parser owned by each worker process in parallel mode
+_worker_parser: Optional['BlotParser'] = None
+
 
 class BlotParser:
     """Main class for parsing Excel blot files with automatic field mapping"""
-    
-    def __init__(self, input_dir: str = "../Input-files", output_dir: str = "Output-files"):
+
+    def __init__(self, input_dir: str = "../Input-files", output_dir: str = "Output-files",
+                 workers: int = PARSER_WORKERS, output_format: str = OUTPUT_FORMAT,
+                 metrics_mode: str = METRICS_MODE, sheet_workers: int = SHEET_WORKERS,
+                 projection_mode: str = PROJECTION_MODE,
+                 projection_fields: Optional[List[str]] = None,
+                 input_patterns: Optional[List[str]] = None, shard: Optional[Shard] = None):
         """
         Initialize the blot parser
-        
+
         Args:
             input_dir: Directory containing input Excel files
-            output_dir: Directory for output JSON files
+            output_dir: Directory for output files
+            workers: Number of worker processes used by run(); 1 processes files in-process
+            output_format: Output format used by run(): 'json', 'ndjson', 'ndjson.gz' or 'parquet'
+            metrics_mode: Per-stage metrics: 'log' (structured logs), 'emf' or 'off'
+            sheet_workers: Worker processes preparing the sheets of one workbook in parallel
+            projection_mode: 'off' (every column) or 'mapped' (only columns the vendor's
+                mapping CSV maps are read, cleaned and written)
+            projection_fields: In 'mapped' mode, the system fields to keep (default:
+                PROJECTION_FIELDS, or every mapped field if that is empty)
+            input_patterns: Directories or glob patterns listing the input files instead
+                of input_dir
+            shard: (index, count) to process only one shard of the input files; run()
+                then writes a shard summary to the output directory (see sharding.py)
         """
+        self.input_dir = input_dir
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.output_format = output_format
+        self.metrics_mode = metrics_mode
+        self.sheet_workers = sheet_workers
+        self.projection_mode = projection_mode
+        self.projection_fields = list(projection_fields or PROJECTION_FIELDS)
+        self.shard = shard
         self.field_mapper = FieldMapper()
         self.excel_processor = ExcelProcessor()
         self.vendor_detector = VendorDetector()
-        self.file_manager = FileManager(input_dir, output_dir)
-    
+        self.file_manager = FileManager(input_dir, output_dir, output_format, input_patterns, shard)
+        self.record_pipeline = RecordPipeline(self.excel_processor, self.field_mapper,
+                                              sheet_workers=sheet_workers)
+
     def process_file(self, file_path: Path) -> Dict[str, Any]:
         """
         Process entire Excel file
-        
+
         Args:
             file_path: Path to Excel file
-            
+
         Returns:
             Dictionary with processed file data
         """
         logger.info(f"Processing file: {file_path.name}")
-        
+
         # Extract vendor from filename
         vendor = self.vendor_detector.extract_vendor_from_filename(file_path.name)
-        
+
         # Read Excel file
         excel_data = self.excel_processor.read_excel_file(file_path)
-        
+
         if not excel_data:
             return {'error': f'Failed to read file {file_path.name}'}
-        
+
         # Process each sheet
         processed_sheets = {}
         total_records = 0
-        
+
         for sheet_name, df in excel_data.items():
             sheet_data = self.excel_processor.process_sheet(sheet_name, df, file_path.name)
             processed_sheets[sheet_name] = sheet_data
             total_records += sheet_data['row_count']
-        
+
         return {
             'file_name': file_path.name,
             'file_path': str(file_path),
@@ -70,98 +117,465 @@ class BlotParser:
             'total_records': total_records,
             'sheets': processed_sheets
         }
-    
+
+    def process_and_save_file(self, file_path: Path) -> Dict[str, Any]:
+        """
+        Stream a file's records through clean, map and save in fixed-size chunks
+
+        In the default JSON format this produces the same output as process_file +
+        save_processed_data, but records are built and written one chunk at a time
+        instead of all at once. The workbook's sheets are still read as whole DataFrames.
+
+        A projection that leaves no column in any sheet is not an error: the file is
+        saved with no records and reported with status 'no_mapped_columns', so it is
+        recorded in the manifest like any processed file.
+
+        Args:
+            file_path: Path to Excel file
+
+        Returns:
+            Dictionary with file summary (without record data)
+        """
+        logger.info(f"Processing file: {file_path.name}")
+
+        vendor = self.vendor_detector.extract_vendor_from_filename(file_path.name)
+        metrics = create_instrumentation(self.metrics_mode, METRICS_TRACE_MEMORY == 'on')
+        file_data = {
+            'file_name': file_path.name,
+            'file_path': str(file_path),
+            'vendor': vendor
+        }
+
+        with metrics.stage('read') as stage:
+            try:
+                excel_data = self.excel_processor.read_excel_file(file_path, vendor,
+                                                                  self._column_filter(vendor))
+            except NoProjectedColumnsError as e:
+                logger.info(f"{e}, saving no records")
+                excel_data = {}
+                file_data['status'] = 'no_mapped_columns'
+            stage.add(rows=sum(len(df) for df in excel_data.values()),
+                      nbytes=file_path.stat().st_size)
+
+        if not excel_data and 'status' not in file_data:
+            metrics.emit(file=file_path.name, vendor=vendor)
+            return {'file_name': file_path.name, 'error': f'Failed to read file {file_path.name}'}
+
+        with self.file_manager.open_writer(file_data) as writer:
+            summary = self.record_pipeline.run(excel_data, file_path.name, vendor,
+                                               writer.write_records, metrics)
+
+        metrics.emit(file=file_path.name, vendor=vendor)
+        logger.info(f"Saved {writer.record_count} mapped records from {vendor} "
+                    f"to {writer.output_file}")
+        file_data.update(summary)
+        return file_data
+
     def process_all_files(self) -> List[Dict[str, Any]]:
         """
         Process all Excel files in input directory
-        
+
         Returns:
             List of processed file data
         """
         excel_files = self.file_manager.get_excel_files()
-        
+
         if not excel_files:
             logger.warning("No Excel files found in input directory")
             return []
-        
+
         processed_files = []
-        
+
         for file_path in excel_files:
             try:
                 file_data = self.process_file(file_path)
                 processed_files.append(file_data)
-                
+
             except Exception as e:
                 logger.error(f"Error processing file {file_path.name}: {str(e)}")
                 processed_files.append({
                     'file_name': file_path.name,
                     'error': str(e)
                 })
-        
+
         return processed_files
-    
+
+    def process_and_save_all_files(self, force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Process and save every new or changed Excel file in the input directory
+
+        Files whose content and mapping CSV match the manifest, and whose output
+        still exists, are skipped unless force is set. With more than one worker,
+        files are spread over a process pool. Each file's output is written by its
+        worker as soon as that file finishes, and only the small per-file
+        summaries are returned to this process.
+
+        Args:
+            force: Reprocess every file regardless of the manifest
+
+        Returns:
+            List of file summaries in input file order, with per-file errors
+        """
+        excel_files = self.file_manager.get_excel_files()
+
+        if not excel_files:
+            logger.warning("No Excel files found in input directory")
+            return []
+
+        vendor_fingerprints = {}
+        fingerprints = {}
+        for file_path in excel_files:
+            vendor = self.vendor_detector.extract_vendor_from_filename(file_path.name)
+            if vendor not in vendor_fingerprints:
+                vendor_fingerprints[vendor] = self._output_fingerprint(vendor)
+            fingerprints[file_path] = vendor_fingerprints[vendor]
+
+        results = {}
+        pending_files = []
+        snapshots = {}
+        for file_path in excel_files:
+            if not force and self.file_manager.is_up_to_date(file_path, fingerprints[file_path]):
+                logger.info(f"Skipping unchanged file: {file_path.name}")
+                results[file_path] = {'file_name': file_path.name, 'skipped': True}
+            else:
+                # Taken before the file is read, so an edit made during the run is seen next run
+                snapshots[file_path] = self.file_manager.snapshot(file_path)
+                pending_files.append(file_path)
+
+        workers = min(self.workers, len(pending_files))
+
+        if workers <= 1:
+            processed = [self._process_and_save_file_safely(file_path)
+                         for file_path in pending_files]
+        else:
+            logger.info(f"Processing {len(pending_files)} files with {workers} worker processes")
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=self._worker_initargs()) as executor:
+                processed = list(executor.map(_process_file_in_worker, pending_files))
+
+        for file_path, file_data in zip(pending_files, processed):
+            results[file_path] = file_data
+            if 'error' not in file_data:
+                self.file_manager.record_processed(file_path, fingerprints[file_path],
+                                                   snapshots[file_path])
+
+        self.file_manager.save_manifest()
+        return [results[file_path] for file_path in excel_files]
+
+    def watch(self, poll_interval: float = WATCH_POLL_INTERVAL,
+              settle_seconds: float = WATCH_SETTLE_SECONDS, queue_size: int = WATCH_QUEUE_SIZE,
+              stop_event: Optional[threading.Event] = None) -> None:
+        """
+        Process new or modified input files as they arrive, until stopped
+
+        The parser, its mappings and (with more than one worker) the worker
+        processes stay warm between files. Files are handed to the workers as
+        soon as they have finished being written; at most queue_size are in
+        flight, and a burst of arrivals waits in arrival order for a free slot.
+        Files that are unchanged according to the manifest are skipped, so a
+        restart does not reprocess the whole directory.
+
+        Args:
+            poll_interval: Seconds between scans of the input directory
+            settle_seconds: Seconds a file must stay unchanged before it is processed
+            queue_size: Most files handed to the workers at once
+            stop_event: Event that ends the loop when set (default: run until Ctrl-C)
+        """
+        stop_event = stop_event or threading.Event()
+        watcher = InputWatcher(self.file_manager, settle_seconds)
+        queue_size = max(1, queue_size)
+        waiting = deque()
+        in_flight = {}
+
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                           initargs=self._worker_initargs())
+            process = _process_file_in_worker
+        else:
+            # One background thread keeps this process's parser warm while the loop polls
+            executor = ThreadPoolExecutor(max_workers=1)
+            process = self._process_and_save_file_safely
+
+        logger.info(f"Watching {self.input_dir} every {poll_interval}s with {self.workers} "
+                    f"worker(s); press Ctrl-C to stop")
+        try:
+            with executor:
+                while not stop_event.is_set():
+                    for file_path in watcher.poll():
+                        if file_path not in waiting:
+                            waiting.append(file_path)
+
+                    while waiting and len(in_flight) < queue_size:
+                        file_path = waiting.popleft()
+                        if not file_path.exists():
+                            continue
+                        if any(file_path == queued for queued, _ in in_flight.values()):
+                            # A newer version arrived mid-run; process it after this run ends
+                            waiting.appendleft(file_path)
+                            break
+                        vendor = self.vendor_detector.extract_vendor_from_filename(file_path.name)
+                        fingerprint = self._output_fingerprint(vendor)
+                        if self.file_manager.is_up_to_date(file_path, fingerprint):
+                            logger.info(f"Skipping unchanged file: {file_path.name}")
+                            continue
+                        # Fingerprint the version about to be parsed; if the file changes while
+                        # it is processed, the re-queued newer version no longer matches it
+                        try:
+                            snapshot = self.file_manager.snapshot(file_path)
+                        except FileNotFoundError:
+                            continue
+                        logger.info(f"Queued {file_path.name}")
+                        in_flight[executor.submit(process, file_path)] = (file_path, snapshot)
+
+                    if in_flight:
+                        done, _ = wait(list(in_flight), timeout=poll_interval,
+                                       return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._record_watched_file(*in_flight.pop(future), future.result())
+                    else:
+                        stop_event.wait(poll_interval)
+
+                for future in list(in_flight):
+                    self._record_watched_file(*in_flight.pop(future), future.result())
+        except KeyboardInterrupt:
+            logger.info("Stopping watch mode")
+            for future, (file_path, snapshot) in list(in_flight.items()):
+                if future.done() and not future.cancelled():
+                    self._record_watched_file(file_path, snapshot, future.result())
+        finally:
+            self.file_manager.save_manifest()
+            self.record_pipeline.close()
+
+    def _record_watched_file(self, file_path: Path, snapshot: Dict[str, Any],
+                             file_data: Dict[str, Any]) -> None:
+        """Log a finished file from watch mode and record the snapshot taken before it was read"""
+        if 'error' in file_data:
+            logger.error(f"Failed {file_path.name}: {file_data['error']}")
+            return
+
+        vendor = file_data.get('vendor', 'unknown')
+        self.file_manager.record_processed(file_path, self._output_fingerprint(vendor), snapshot)
+        self.file_manager.save_manifest()
+        logger.info(f"Processed {file_path.name}: {file_data['sheet_count']} sheets, "
+                    f"{file_data['total_records']} records")
+        if self.workers <= 1:
+            logger.info(f"Layout cache: {self.excel_processor.layout_cache.stats()}")
+
+    def _output_fingerprint(self, vendor: str) -> str:
+        """Fingerprint of what a vendor's outputs depend on: mapping, field types and projection"""
+        fingerprint = (f"{self.field_mapper.get_mapping_fingerprint(vendor)}:"
+                       f"{self.record_pipeline.field_schema.fingerprint}")
+        if self.projection_mode == 'mapped':
+            fingerprint += f":mapped:{','.join(sorted(self.projection_fields))}"
+        return fingerprint
+
+    def _column_filter(self, vendor: str) -> Optional[Callable[[Any], bool]]:
+        """Column filter pushed down into the reader in 'mapped' projection mode, else None"""
+        if self.projection_mode != 'mapped':
+            return None
+        return self.field_mapper.column_filter(vendor, self.projection_fields)
+
+    def _worker_initargs(self) -> tuple:
+        """Arguments recreating this parser's settings in a worker process"""
+        return (self.input_dir, self.output_dir, self.output_format, self.metrics_mode,
+                self.sheet_workers, self.projection_mode, self.projection_fields,
+                self.file_manager.input_patterns)
+
+    def _process_and_save_file_safely(self, file_path: Path) -> Dict[str, Any]:
+        """
+        Process and save one file, reporting any failure in the returned summary
+
+        Args:
+            file_path: Path to Excel file
+
+        Returns:
+            File summary, or a dictionary with file_name and error
+        """
+        try:
+            return self.process_and_save_file(file_path)
+        except Exception as e:
+            logger.error(f"Error processing file {file_path.name}: {str(e)}")
+            return {
+                'file_name': file_path.name,
+                'error': str(e)
+            }
+
     def save_processed_data(self, processed_data: List[Dict[str, Any]]) -> None:
         """
         Save processed data to output directory with field mapping
-        
+
         Args:
             processed_data: List of processed file data
         """
         for file_data in processed_data:
             if 'error' in file_data:
-                logger.warning(f"Skipping file {file_data.get('file_name', 'unknown')} due to error")
+                file_name = file_data.get('file_name', 'unknown')
+                logger.warning(f"Skipping file {file_name} due to error")
                 continue
-            
+
             # Collect all records from all sheets
             all_records = []
             for sheet_name, sheet_data in file_data['sheets'].items():
                 all_records.extend(sheet_data['data'])
-            
+
             # Get vendor from file data
             vendor = file_data.get('vendor', 'unknown')
-            
+
             # Map vendor-specific fields to generic fields
             logger.info(f"Mapping {len(all_records)} records from {vendor} to system format")
             mapped_records = self.field_mapper.map_records(all_records, vendor)
-            
+
             # Save mapped data
             self.file_manager.save_json_data(file_data, mapped_records)
-    
-    def run(self) -> None:
-        """Main execution method"""
+
+    def run(self, force: bool = False) -> None:
+        """
+        Main execution method
+
+        Args:
+            force: Reprocess every input file, even if unchanged since the last run
+        """
         logger.info("Starting Blot Parser with Automatic Vendor Detection")
-        
-        # Process all files
-        processed_data = self.process_all_files()
-        
+        if self.shard:
+            logger.info(f"Processing shard {self.shard[0]}/{self.shard[1]} of the input files")
+
+        # Stream each new or changed file through mapping straight to its output file
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        try:
+            processed_data = self.process_and_save_all_files(force)
+        finally:
+            self.record_pipeline.close()
+        run_summary = summarize_run(processed_data, started_at, time.perf_counter() - start,
+                                    self.shard)
+
+        logger.info(f"Throughput: {run_summary['processed']} files, "
+                    f"{run_summary['records']} records in {run_summary['seconds']:.1f}s "
+                    f"({run_summary['files_per_second']:.2f} files/s, "
+                    f"{run_summary['records_per_second']:.0f} records/s, "
+                    f"{run_summary['mb_per_second']:.2f} MB/s)")
+
+        # Written even for an empty shard, so merging does not report it missing
+        if self.shard:
+            summary_path = write_summary(run_summary, Path(self.output_dir))
+            logger.info(f"Saved shard summary to {summary_path}")
+
         if not processed_data:
             logger.warning("No files were processed")
             return
-        
-        # Save processed data with field mapping
-        self.save_processed_data(processed_data)
-        
+
         # Print summary
         total_files = len(processed_data)
-        successful_files = len([f for f in processed_data if 'error' not in f])
-        
-        logger.info(f"Processing complete: {successful_files}/{total_files} files processed successfully")
-        
+        skipped_files = len([f for f in processed_data if f.get('skipped')])
+        successful_files = len([f for f in processed_data
+                                if 'error' not in f and not f.get('skipped')])
+
+        logger.info(f"Processing complete: {successful_files}/{total_files - skipped_files} files "
+                    f"processed successfully, {skipped_files} unchanged files skipped")
+        if self.workers <= 1:
+            logger.info(f"Layout cache: {self.excel_processor.layout_cache.stats()}")
+
         for file_data in processed_data:
-            if 'error' not in file_data:
+            if file_data.get('skipped'):
+                print(f"\nFile: {file_data['file_name']} - unchanged, skipped")
+            elif file_data.get('status') == 'no_mapped_columns':
+                print(f"\nFile: {file_data['file_name']} - no mapped columns, saved no records")
+            elif 'error' not in file_data:
                 print(f"\nFile: {file_data['file_name']}")
                 print(f"  Vendor: {file_data.get('vendor', 'unknown')}")
                 print(f"  Sheets: {file_data['sheet_count']}")
                 print(f"  Total Records: {file_data['total_records']}")
             else:
-                print(f"\nFile: {file_data.get('file_name', 'unknown')} - ERROR: {file_data['error']}")
+                print(f"\nFile: {file_data.get('file_name', 'unknown')} - "
+                      f"ERROR: {file_data['error']}")
+
+
+def _init_worker(input_dir: str, output_dir: str, output_format: str, metrics_mode: str,
+                 sheet_workers: int, projection_mode: str, projection_fields: List[str],
+                 input_patterns: Optional[List[str]]) -> None:
+    """Create the parser reused by a worker process for all of its files"""
+    global _worker_parser
+    # The input patterns give each file's output path relative to its input root
+    _worker_parser = BlotParser(input_dir, output_dir, workers=1, output_format=output_format,
+                                metrics_mode=metrics_mode, sheet_workers=sheet_workers,
+                                projection_mode=projection_mode,
+                                projection_fields=projection_fields,
+                                input_patterns=input_patterns)
+
+
+def _process_file_in_worker(file_path: Path) -> Dict[str, Any]:
+    """Process and save one file inside a worker process"""
+    return _worker_parser._process_and_save_file_safely(file_path)
 
 
 def main():
     """Main execution function"""
-    parser = BlotParser()
-    parser.run()
+    arg_parser = argparse.ArgumentParser(description="Parse Excel blot files into mapped JSON")
+    arg_parser.add_argument('--input', action='append', dest='inputs', metavar='PATH',
+                            help='Input directory or glob pattern, e.g. "archive/20*/**/*.xlsx" '
+                                 f'(quoted; repeatable; default: {DEFAULT_INPUT_DIR})')
+    arg_parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR,
+                            help='Output directory (default: %(default)s)')
+    arg_parser.add_argument('--shard', type=_shard_argument, metavar='I/N',
+                            help='Process only shard I of N (1-based), split by a hash of each '
+                                 'file path relative to its input root')
+    arg_parser.add_argument('--merge-summaries', nargs='+', metavar='PATH',
+                            help='Report per-shard throughput from shard output directories or '
+                                 'summary files, then exit')
+    arg_parser.add_argument('--force', action='store_true',
+                            help='Reprocess every input file, even if unchanged since the last run')
+    arg_parser.add_argument('--format', default=OUTPUT_FORMAT, choices=list(OUTPUT_SUFFIXES),
+                            help='Output format (default: %(default)s)')
+    arg_parser.add_argument('--sheet-workers', type=int, default=SHEET_WORKERS,
+                            help='Worker processes for the sheets of one workbook '
+                                 '(default: %(default)s)')
+    arg_parser.add_argument('--workers', type=int, default=PARSER_WORKERS,
+                            help='Worker processes for files (default: %(default)s)')
+    arg_parser.add_argument('--watch', action='store_true',
+                            help='Keep running and process new or modified input files as they '
+                                 'arrive')
+    arg_parser.add_argument('--poll-interval', type=float, default=WATCH_POLL_INTERVAL,
+                            help='Seconds between input directory scans in watch mode '
+                                 '(default: %(default)s)')
+    arg_parser.add_argument('--projection', default=PROJECTION_MODE, choices=['off', 'mapped'],
+                            help="'mapped' reads and writes only columns the vendor mapping maps "
+                                 "(default: %(default)s)")
+    arg_parser.add_argument('--fields',
+                            type=lambda value: [f.strip() for f in value.split(',') if f.strip()],
+                            help='Comma-separated system fields to keep with --projection mapped')
+    args = arg_parser.parse_args()
+
+    if args.merge_summaries:
+        report = merge_summaries(load_summaries(args.merge_summaries))
+        print(format_report(report))
+        return 1 if not report['shards'] or report['missing'] or report['totals']['failed'] else 0
+
+    # A single directory is read as before (and can be watched); anything else is a pattern list
+    inputs = args.inputs or [DEFAULT_INPUT_DIR]
+    input_dir, input_patterns = DEFAULT_INPUT_DIR, inputs
+    if len(inputs) == 1 and Path(inputs[0]).is_dir():
+        input_dir, input_patterns = inputs[0], None
+    if args.watch and input_patterns:
+        arg_parser.error('--watch needs a single existing input directory')
+
+    parser = BlotParser(input_dir, args.output_dir, workers=args.workers, output_format=args.format,
+                        sheet_workers=args.sheet_workers, projection_mode=args.projection,
+                        projection_fields=args.fields, input_patterns=input_patterns,
+                        shard=args.shard)
+    if args.watch:
+        parser.watch(poll_interval=args.poll_interval)
+    else:
+        parser.run(force=args.force)
+    return 0
+
+
+def _shard_argument(value: str) -> Shard:
+    """Parse --shard for argparse"""
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
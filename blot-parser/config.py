@@ -2,18 +2,116 @@
 Configuration settings for Blot Parser
 """
 
-from pathlib import Path
-
 # Default directories
 DEFAULT_INPUT_DIR = "../Input-files"
 DEFAULT_OUTPUT_DIR = "Output-files"
 
+# Worker processes for multi-file runs (1 = sequential)
+PARSER_WORKERS = 1
+
+# Watch mode: seconds between scans of the input directory, seconds a file's size and
+# mtime must stay unchanged before it counts as fully written, and the most files
+# handed to the workers at once (the rest wait for the next free slot)
+WATCH_POLL_INTERVAL = 2.0
+WATCH_SETTLE_SECONDS = 2.0
+WATCH_QUEUE_SIZE = 8
+
+# Output format for local runs: 'json', 'ndjson', 'ndjson.gz' or 'parquet'
+OUTPUT_FORMAT = 'json'
+
+# Per-stage metrics for local runs: 'log' (structured logs), 'emf' or 'off'
+METRICS_MODE = 'log'
+
+# 'on' measures each stage's peak memory with tracemalloc (slows allocation-heavy stages)
+METRICS_TRACE_MEMORY = 'off'
+
+# Manifest of processed input files, kept in the output directory
+MANIFEST_FILENAME = '.manifest.json'
+
 # Supported file formats
 SUPPORTED_FORMATS = ['.xlsx', '.xls']
 
+# Excel reader mode: 'pandas' or 'streaming' (single read-only pass)
+READER_MODE = 'pandas'
+
+# Projection pushdown: 'off' reads every column; 'mapped' reads, cleans and emits only the
+# columns the vendor's mapping CSV maps - restricted to the system fields in
+# PROJECTION_FIELDS when it is not empty - and skips sheets without a mapped header
+PROJECTION_MODE = 'off'
+PROJECTION_FIELDS = []
+
+# Excel reader engine: 'auto' (calamine when installed, else openpyxl/xlrd by extension),
+# 'calamine', 'openpyxl' or 'xlrd'
+READER_ENGINE = 'auto'
+
+# Leading non-blank rows scanned for the header row in streaming mode
+HEADER_SCAN_ROWS = 10
+
+# Header layouts and column plans remembered per vendor (see layout_cache.py)
+LAYOUT_CACHE_SIZE = 256
+
+# Column header lookups remembered per compiled vendor mapping (see mapping_registry.py)
+MAPPING_LOOKUP_CACHE_SIZE = 1024
+
 # Vendor detection separators
 VENDOR_SEPARATORS = ['-', '_', ' ', '.']
 
 # Logging configuration
 LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 LOG_LEVEL = 'INFO'
+
+# DynamoDB batch write settings
+DYNAMODB_BATCH_SIZE = 25
+DYNAMODB_WRITE_WORKERS = 4
+DYNAMODB_MAX_RETRIES = 5
+DYNAMODB_RETRY_BASE_DELAY = 0.05
+DYNAMODB_READ_WORKERS = 4
+
+# Reads back out of the table (dynamodb_query.py): the vendor + processed_at GSI, items
+# evaluated per Query/Scan page, parallel segments of a bulk export, and a small TTL/LRU
+# cache of repeated vendor-window and file lookups (results over MAX_ITEMS are not cached)
+DYNAMODB_VENDOR_INDEX = 'VendorIndex'
+DYNAMODB_QUERY_PAGE_SIZE = 1000
+DYNAMODB_SCAN_SEGMENTS = 4
+QUERY_CACHE_SIZE = 64
+QUERY_CACHE_TTL = 60.0
+QUERY_CACHE_MAX_ITEMS = 10000
+
+# 'overwrite' rewrites every row; 'upsert' writes only changed rows and deletes removed ones
+DYNAMODB_WRITE_MODE = 'overwrite'
+
+# Idempotency markers for S3 event deliveries: 'on' or 'off'. An in-progress marker
+# expires CLAIM_MARGIN seconds after its invocation's deadline (IN_PROGRESS_TTL after the
+# claim when the deadline is unknown: the 300 s Lambda timeout plus the margin) and then
+# belongs to a crashed or timed-out attempt and can be reclaimed; a done marker makes
+# redeliveries of the same object version no-ops until DONE_TTL, after which DynamoDB TTL
+# removes it
+IDEMPOTENCY_MODE = 'on'
+IDEMPOTENCY_IN_PROGRESS_TTL = 330
+IDEMPOTENCY_CLAIM_MARGIN = 30
+IDEMPOTENCY_DONE_TTL = 7 * 24 * 3600
+
+# Records per chunk flowing through the clean -> map -> sink pipeline
+PIPELINE_CHUNK_SIZE = 5000
+
+# Workers preparing the sheets of one workbook in parallel (1 = sequential).
+# 'process' sidesteps the GIL for local runs; Lambda has no /dev/shm and uses 'thread'
+SHEET_WORKERS = 1
+SHEET_EXECUTOR = 'process'
+# Workbooks with fewer rows in total are prepared sequentially: handing sheets to
+# workers costs more than parsing them
+SHEET_PARALLEL_MIN_ROWS = 10000
+
+# S3 download: objects above the threshold are spooled to disk with parallel ranged GETs
+S3_SPOOL_THRESHOLD = 64 * 1024 * 1024
+S3_PART_SIZE = 8 * 1024 * 1024
+S3_DOWNLOAD_WORKERS = 8
+S3_PART_RETRIES = 2
+
+# Records from one S3 event processed concurrently by the Lambda
+S3_EVENT_WORKERS = 4
+
+# JSON backend for output files: 'auto' (orjson when installed), 'orjson' or 'stdlib'
+JSON_BACKEND = 'auto'
+# Buffer size for output file writes
+WRITE_BUFFER_SIZE = 1024 * 1024
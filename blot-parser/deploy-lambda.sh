@@ -27,19 +27,15 @@ mkdir -p $DEPLOY_DIR
 
 echo "📦 Creating deployment package..."
 
-# Copy Python files
-cp lambda_function.py $DEPLOY_DIR/
-cp lambda_handler.py $DEPLOY_DIR/
-cp blot_parser.py $DEPLOY_DIR/
-cp field_mapper.py $DEPLOY_DIR/
-cp excel_processor.py $DEPLOY_DIR/
-cp vendor_detector.py $DEPLOY_DIR/
-cp file_manager.py $DEPLOY_DIR/
-cp config.py $DEPLOY_DIR/
+# Copy Python files (every module, as the deploy workflow does, so new imports are never missed)
+cp *.py $DEPLOY_DIR/
 
 # Copy mappings directory
 cp -r mappings $DEPLOY_DIR/
 
+# Prebuild the compiled mapping registry so cold starts skip CSV parsing
+python mapping_registry.py mappings $DEPLOY_DIR/mappings/compiled.json
+
 # Install dependencies
 echo "📥 Installing dependencies..."
 pip install -r requirements-lambda.txt -t $DEPLOY_DIR/
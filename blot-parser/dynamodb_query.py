@@ -0,0 +1,392 @@
+"""
+DynamoDB Query - Streams processed records back out of the data table
+
+Three read paths, all returning generators so large results never sit in memory:
+
+    vendor window   paginated Query on VendorIndex (vendor + processed_at), optionally
+                    bounded by a processed_at range
+    file records    the rows of one source file, read by id with BatchGetItem: row ids
+                    are "<vendor>_<filename>_<row>" in both write modes, so the upsert
+                    manifest's row count gives every id, and without a manifest ids are
+                    read in growing rounds until one comes back short
+    bulk export     parallel segmented Scan of the whole table; pages from all segments
+                    are streamed through a bounded queue as they arrive
+
+Only processed records carry a vendor attribute, so idempotency markers and upsert
+manifests are left out of exports and never appear in VendorIndex.
+
+Repeated vendor-window and file lookups are answered from a small TTL/LRU cache.
+Results are cached only when fully consumed and no larger than a size limit; cached
+items are handed out as copies.
+"""
+
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator, Iterable, Tuple, Union, Callable
+import logging
+
+from boto3.dynamodb.conditions import Attr, Key, ConditionBase
+
+from config import DYNAMODB_VENDOR_INDEX, DYNAMODB_QUERY_PAGE_SIZE, DYNAMODB_SCAN_SEGMENTS, \
+    QUERY_CACHE_SIZE, QUERY_CACHE_TTL, QUERY_CACHE_MAX_ITEMS
+from dynamodb_upsert import MANIFEST_SUFFIX
+from dynamodb_writer import DynamoDBBatchReader
+
+logger = logging.getLogger(__name__)
+
+# processed_at bounds: datetimes, or strings in the stored str(datetime) format
+Timestamp = Union[str, datetime]
+
+# Marks the end of one scan segment in the page queue
+_SEGMENT_DONE = object()
+
+# Ids read per BatchGetItem round when streaming a file's rows in order
+_FILE_READ_SIZE = 1000
+
+# First round when the row count is unknown; rounds double up to _FILE_READ_SIZE
+_FILE_PROBE_SIZE = 100
+
+
+class QueryCache:
+    """Bounded, thread-safe cache of query results that expire after a TTL"""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL,
+                 max_items: int = QUERY_CACHE_MAX_ITEMS,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Most results kept (least recently used are evicted)
+            ttl: Seconds a result is served before it is read again
+            max_items: Largest result (in items) that is cached
+            clock: Source of the current time in seconds
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.max_items = max_items
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._counters = {'hits': 0, 'misses': 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Tuple[Dict[str, Any], ...]]:
+        """
+        Get a live cached result
+
+        Args:
+            key: Lookup key
+
+        Returns:
+            Cached items, or None on a miss or expired entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() < entry[0]:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._counters['misses'] += 1
+            return None
+
+    def put(self, key: Tuple[Any, ...], items: List[Dict[str, Any]]) -> None:
+        """
+        Cache a complete result unless it is too large
+
+        Args:
+            key: Lookup key
+            items: Every item of the result
+        """
+        if len(items) > self.max_items:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, tuple(items))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached result"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the hit and miss counters
+
+        Returns:
+            Dictionary with hits, misses and entries
+        """
+        with self._lock:
+            return {**self._counters, 'entries': len(self._entries)}
+
+
+class DynamoDBQuery:
+    """Paginated VendorIndex queries, file lookups and parallel segmented scans of the data table"""
+
+    def __init__(self, table, index_name: str = DYNAMODB_VENDOR_INDEX,
+                 page_size: int = DYNAMODB_QUERY_PAGE_SIZE,
+                 scan_segments: int = DYNAMODB_SCAN_SEGMENTS,
+                 cache: Optional[QueryCache] = None):
+        """
+        Initialize the query helper
+
+        Args:
+            table: boto3 DynamoDB Table resource (or a stand-in supporting query, scan,
+                get_item and meta.client.batch_get_item)
+            index_name: Name of the vendor + processed_at GSI
+            page_size: Items evaluated per Query/Scan call (Limit)
+            scan_segments: Default number of parallel Scan segments for export()
+            cache: Result cache (default: a new QueryCache); a cache with ttl=0 never serves hits
+        """
+        self.table = table
+        self.index_name = index_name
+        self.page_size = max(1, page_size)
+        self.scan_segments = max(1, scan_segments)
+        self.cache = cache if cache is not None else QueryCache()
+        self.reader = DynamoDBBatchReader(table)
+
+    def query_vendor(self, vendor: str, start: Optional[Timestamp] = None,
+                     end: Optional[Timestamp] = None,
+                     attributes: Optional[List[str]] = None, newest_first: bool = False,
+                     filter_expression: Optional[ConditionBase] = None,
+                     use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a vendor's records in processed_at order
+
+        Args:
+            vendor: Vendor name
+            start: Earliest processed_at (inclusive), or None for no lower bound
+            end: Latest processed_at (inclusive), or None for no upper bound
+            attributes: Attributes to return (default: all)
+            newest_first: Return the most recently processed records first
+            filter_expression: Extra boto3 condition applied after the key condition
+            use_cache: Serve and store the result in the cache; results with a filter
+                expression are never cached
+
+        Returns:
+            Generator of items
+        """
+        condition = Key('vendor').eq(vendor)
+        start, end = _timestamp(start), _timestamp(end)
+        if start is not None and end is not None:
+            condition &= Key('processed_at').between(start, end)
+        elif start is not None:
+            condition &= Key('processed_at').gte(start)
+        elif end is not None:
+            condition &= Key('processed_at').lte(end)
+
+        request = {'IndexName': self.index_name, 'KeyConditionExpression': condition,
+                   'ScanIndexForward': not newest_first, **_projection(attributes)}
+        if filter_expression is not None:
+            request['FilterExpression'] = filter_expression
+            use_cache = False
+
+        cache_key = ('vendor', vendor, start, end, _attribute_key(attributes), newest_first)
+        return self._cached(cache_key if use_cache else None,
+                            lambda: self._items(self.table.query, request))
+
+    def file_records(self, vendor: str, filename: str, attributes: Optional[List[str]] = None,
+                     use_cache: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the records of one source file
+
+        Rows are read by id and come back in row order, never through a VendorIndex
+        query (which would read the vendor's whole partition). Files written in upsert
+        mode have a manifest with their row count. For other files ids are read until
+        a round misses its last id, so a row that failed to write ends the file early
+        only if it is the last of a round. If some rows cannot be read, the generator
+        raises instead of ending early.
+
+        Args:
+            vendor: Vendor name
+            filename: Source file name as stored in source_file
+            attributes: Attributes to return (default: all)
+            use_cache: Serve and store the result in the cache
+
+        Returns:
+            Generator of items
+
+        Raises:
+            UnprocessedKeysError: If BatchGetItem left rows unread after every retry
+            botocore.exceptions.ClientError: If a DynamoDB call fails
+        """
+        cache_key = ('file', vendor, filename, _attribute_key(attributes))
+        return self._cached(cache_key if use_cache else None,
+                            lambda: self._file_items(vendor, filename, attributes))
+
+    def export(self, segments: Optional[int] = None, attributes: Optional[List[str]] = None,
+               filter_expression: Optional[ConditionBase] = None,
+               records_only: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the whole table with a parallel segmented Scan
+
+        Items arrive in no particular order. Closing the generator early stops the
+        segment workers after their current page.
+
+        Args:
+            segments: Number of Scan segments read in parallel (default: scan_segments)
+            attributes: Attributes to return (default: all)
+            filter_expression: Extra boto3 condition applied to every item
+            records_only: Leave out idempotency markers and upsert manifests
+
+        Returns:
+            Generator of items
+        """
+        segments = max(1, segments or self.scan_segments)
+        if records_only:
+            records = Attr('vendor').exists()
+            if filter_expression is not None:
+                records = records & filter_expression
+            filter_expression = records
+
+        request = _projection(attributes)
+        if filter_expression is not None:
+            request['FilterExpression'] = filter_expression
+
+        if segments == 1:
+            yield from self._items(self.table.scan, request)
+            return
+
+        pages = queue.Queue(maxsize=segments * 2)
+        stop = threading.Event()
+
+        def scan_segment(segment: int) -> None:
+            try:
+                for page in self._pages(self.table.scan, {**request, 'Segment': segment,
+                                                          'TotalSegments': segments}):
+                    if not _put(pages, page, stop):
+                        return
+                _put(pages, _SEGMENT_DONE, stop)
+            except Exception as e:
+                logger.error(f"Error scanning segment {segment}/{segments}: {str(e)}")
+                _put(pages, e, stop)
+
+        with ThreadPoolExecutor(max_workers=segments) as executor:
+            for segment in range(segments):
+                executor.submit(scan_segment, segment)
+            try:
+                remaining = segments
+                while remaining:
+                    page = pages.get()
+                    if page is _SEGMENT_DONE:
+                        remaining -= 1
+                    elif isinstance(page, Exception):
+                        raise page
+                    else:
+                        yield from page
+            finally:
+                stop.set()
+
+    def _file_items(self, vendor: str, filename: str,
+                    attributes: Optional[List[str]]) -> Iterator[Dict[str, Any]]:
+        """Read a file's rows by id, up to the manifest's row count or the first short round"""
+        file_id = f"{vendor}_{filename}"
+        manifest = self.table.get_item(Key={'id': f"{file_id}{MANIFEST_SUFFIX}"},
+                                       ProjectionExpression='row_count').get('Item')
+        row_count = int(manifest['row_count']) if manifest is not None else None
+
+        # Row ids are "<file_id>_<row>"; the id is needed to put each batch back in row order
+        projected = list(dict.fromkeys(['id', *attributes])) if attributes else None
+        first, size = 0, _FILE_READ_SIZE if row_count is not None else _FILE_PROBE_SIZE
+        while row_count is None or first < row_count:
+            last = first + size if row_count is None else min(first + size, row_count)
+            keys = [{'id': f"{file_id}_{i}"} for i in range(first, last)]
+            items = self.reader.get_items(keys, projected)
+            items.sort(key=lambda item: int(item['id'].rsplit('_', 1)[1]))
+            # Without a row count, a missing last id means the file ended in this round
+            ended = row_count is None and (not items or items[-1]['id'] != keys[-1]['id'])
+            for item in items:
+                if attributes and 'id' not in attributes:
+                    del item['id']
+                yield item
+
+            if ended:
+                return
+            first, size = last, min(size * 2, _FILE_READ_SIZE)
+
+    def _cached(self, cache_key: Optional[Tuple[Any, ...]],
+                read: Callable[[], Iterator[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+        """
+        Serve a result from the cache, or stream it and cache it once fully read
+
+        A read that raises, or a generator closed early, never reaches put(), so only
+        complete results are cached.
+        """
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                for item in cached:
+                    yield dict(item)
+                return
+
+        collected = [] if cache_key is not None else None
+        for item in read():
+            if collected is not None:
+                collected.append(dict(item))
+                if len(collected) > self.cache.max_items:
+                    collected = None
+            yield item
+
+        if collected is not None:
+            self.cache.put(cache_key, collected)
+
+    def _items(self, operation: Callable, request: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Stream the items of every page of a Query or Scan"""
+        for page in self._pages(operation, request):
+            yield from page
+
+    def _pages(self, operation: Callable,
+               request: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Run a Query or Scan page by page
+
+        Args:
+            operation: table.query or table.scan
+            request: Request parameters without Limit and ExclusiveStartKey
+
+        Returns:
+            Generator of item lists, one per page (possibly empty when filtered)
+        """
+        request = {**request, 'Limit': self.page_size}
+        while True:
+            response = operation(**request)
+            yield response.get('Items', [])
+            last_key = response.get('LastEvaluatedKey')
+            if not last_key:
+                return
+            request['ExclusiveStartKey'] = last_key
+
+
+def _timestamp(value: Optional[Timestamp]) -> Optional[str]:
+    """Format a processed_at bound the way save_to_dynamodb stores processed_at"""
+    return str(value) if value is not None else None
+
+
+def _attribute_key(attributes: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    return tuple(attributes) if attributes else None
+
+
+def _projection(attributes: Optional[List[str]]) -> Dict[str, Any]:
+    """Build ProjectionExpression parameters; placeholders keep reserved words usable"""
+    if not attributes:
+        return {}
+    names = {f"#a{i}": attribute for i, attribute in enumerate(attributes)}
+    return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+
+def _put(pages: queue.Queue, page: Any, stop: threading.Event) -> bool:
+    """Queue a page for the consumer, giving up once the consumer has stopped reading"""
+    while not stop.is_set():
+        try:
+            pages.put(page, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
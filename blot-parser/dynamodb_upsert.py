@@ -0,0 +1,152 @@
+"""
+DynamoDB Upsert - Content-hash row diffing so re-uploaded blots only write changed rows
+
+Every row item stores a content_hash of its data (everything except processed_at).
+Before a chunk is written, the stored hashes of its ids are fetched with BatchGetItem
+and rows whose hash is unchanged are skipped, keeping their original processed_at.
+A per-file manifest item ("<file id>#manifest") records the file's row count, so
+rows beyond the new count - rows that disappeared from the blot - are deleted.
+If the manifest cannot be read the upsert is aborted, since writing a smaller count
+without the deletes would orphan the rows past it.
+
+The manifest item carries no vendor attribute and therefore stays out of VendorIndex.
+"""
+
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+import logging
+
+from botocore.exceptions import ClientError
+
+from dynamodb_writer import DynamoDBBatchWriter, UnprocessedKeysError
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_SUFFIX = '#manifest'
+
+# Attributes that change on every run and are left out of the content hash
+_VOLATILE_ATTRIBUTES = frozenset(['processed_at', 'content_hash'])
+
+
+def content_hash(item: Dict[str, Any]) -> str:
+    """
+    Hash an item's content independently of attribute order and processing time
+
+    Args:
+        item: DynamoDB item
+
+    Returns:
+        32-character hex digest
+    """
+    content = {key: value for key, value in item.items() if key not in _VOLATILE_ATTRIBUTES}
+    encoded = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class DynamoDBUpserter:
+    """Writes one file's rows, skipping unchanged ones and deleting rows that disappeared"""
+
+    def __init__(self, writer: DynamoDBBatchWriter, file_id: str):
+        """
+        Initialize the upserter
+
+        Args:
+            writer: Batch writer for the table
+            file_id: Prefix of the file's item ids ("<vendor>_<filename>"); rows are "<file_id>_<i>"
+        """
+        self.writer = writer
+        # Reads raise instead of dropping keys, so a failed manifest read is never
+        # mistaken for a first upload
+        self.reader = writer.reader
+        self.file_id = file_id
+        self.manifest_id = f"{file_id}{MANIFEST_SUFFIX}"
+        self.previous_count = None
+        self.unchanged = 0
+
+    def item_id(self, index: int) -> str:
+        return f"{self.file_id}_{index}"
+
+    def begin(self) -> Optional[int]:
+        """
+        Load the row count recorded by the previous upsert of this file
+
+        Returns:
+            Previous row count, or None if the file has no manifest (first upload,
+            or written in overwrite mode)
+
+        Raises:
+            UnprocessedKeysError: If the manifest could not be read after all retries
+            botocore.exceptions.ClientError: If the BatchGetItem call fails
+        """
+        manifest = self.reader.get_items([{'id': self.manifest_id}], ['id', 'row_count'])
+        self.previous_count = int(manifest[0]['row_count']) if manifest else None
+        logger.info(f"Upserting {self.file_id}: previous row count {self.previous_count}")
+        return self.previous_count
+
+    def write_items(self, items: List[Dict[str, Any]], start_index: int) -> Dict[str, int]:
+        """
+        Write the items of one chunk whose content changed
+
+        Args:
+            items: Items with ids item_id(start_index), item_id(start_index + 1), ...
+            start_index: Row index of the first item
+
+        Returns:
+            Dictionary with 'saved', 'failed' and 'unchanged' counts
+        """
+        for item in items:
+            item['content_hash'] = content_hash(item)
+
+        # Rows past the previous row count cannot exist yet
+        known = len(items)
+        if self.previous_count is not None:
+            known = max(0, min(len(items), self.previous_count - start_index))
+
+        stored = {}
+        if known:
+            try:
+                existing = self.reader.get_items([{'id': item['id']} for item in items[:known]],
+                                                 ['id', 'content_hash'])
+                stored = {item['id']: item.get('content_hash') for item in existing}
+            except (UnprocessedKeysError, ClientError) as e:
+                # Rewriting a row is always safe; it only costs the write
+                logger.warning(f"Could not read stored hashes, writing the whole chunk: {str(e)}")
+
+        changed = [item for item in items if stored.get(item['id']) != item['content_hash']]
+        unchanged = len(items) - len(changed)
+        self.unchanged += unchanged
+
+        result = self.writer.write_items(changed)
+        return {**result, 'unchanged': unchanged}
+
+    def finish(self, row_count: int, source_file: str) -> Dict[str, int]:
+        """
+        Delete rows that disappeared and record the new row count
+
+        Args:
+            row_count: Number of rows in the uploaded file
+            source_file: Source file name, stored on the manifest item
+
+        Returns:
+            Dictionary with 'deleted' and 'failed' counts
+        """
+        result = {'deleted': 0, 'failed': 0}
+        if self.previous_count and self.previous_count > row_count:
+            stale = [{'id': self.item_id(i)} for i in range(row_count, self.previous_count)]
+            result = self.writer.delete_keys(stale)
+            logger.info(f"Deleted {result['deleted']}/{len(stale)} rows no longer in {source_file}")
+
+        # Keep the old count while deletes are outstanding so the next upload retries them
+        recorded_count = self.previous_count if result['failed'] else row_count
+        manifest = {
+            'id': self.manifest_id,
+            'item_type': 'file_manifest',
+            'source_file': source_file,
+            'row_count': recorded_count,
+            'processed_at': str(datetime.now()),
+        }
+        if self.writer.write_items([manifest])['failed']:
+            logger.error(f"Failed to update upsert manifest {self.manifest_id}")
+        return result
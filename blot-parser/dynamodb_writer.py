@@ -0,0 +1,210 @@
+"""
+DynamoDB Writer - Batched, retrying writes, deletes and reads against a DynamoDB table
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional
+import logging
+
+from config import DYNAMODB_BATCH_SIZE, DYNAMODB_WRITE_WORKERS, DYNAMODB_MAX_RETRIES, \
+    DYNAMODB_RETRY_BASE_DELAY, DYNAMODB_READ_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# BatchGetItem accepts at most 100 keys per call
+BATCH_GET_SIZE = 100
+
+
+class DynamoDBBatchWriter:
+    """Writes and deletes with BatchWriteItem, retrying unprocessed requests"""
+
+    def __init__(self, table, batch_size: int = DYNAMODB_BATCH_SIZE,
+                 max_workers: int = DYNAMODB_WRITE_WORKERS,
+                 max_retries: int = DYNAMODB_MAX_RETRIES,
+                 base_delay: float = DYNAMODB_RETRY_BASE_DELAY):
+        """
+        Initialize the batch writer
+
+        Args:
+            table: boto3 DynamoDB Table resource (or a stand-in exposing name and meta.client)
+            batch_size: Items per BatchWriteItem call (DynamoDB allows at most 25)
+            max_workers: Number of batches written concurrently
+            max_retries: Retry attempts for unprocessed items before counting them as failed
+            base_delay: Initial backoff delay in seconds, doubled on every retry
+        """
+        self.table = table
+        self.client = table.meta.client
+        self.batch_size = max(1, min(batch_size, 25))
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        # Reads go through the reader, which raises rather than dropping keys
+        self.reader = DynamoDBBatchReader(table, max_workers=max_workers,
+                                          max_retries=max_retries, base_delay=base_delay)
+
+    def write_items(self, items: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Write all items to the table
+
+        Args:
+            items: List of items to put
+
+        Returns:
+            Dictionary with exact 'saved' and 'failed' counts
+        """
+        failed = self._run_batches([{'PutRequest': {'Item': item}} for item in items],
+                                   self.batch_size, self._write_batch)
+        return {'saved': len(items) - failed, 'failed': failed}
+
+    def delete_keys(self, keys: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Delete items by primary key
+
+        Args:
+            keys: List of primary keys, e.g. [{'id': '...'}]
+
+        Returns:
+            Dictionary with exact 'deleted' and 'failed' counts
+        """
+        failed = self._run_batches([{'DeleteRequest': {'Key': key}} for key in keys],
+                                   self.batch_size, self._write_batch)
+        return {'deleted': len(keys) - failed, 'failed': failed}
+
+    def _run_batches(self, requests: List[Dict[str, Any]], size: int, func) -> int:
+        """Split requests into batches, run func on each (concurrently) and sum the results"""
+        batches = [requests[i:i + size] for i in range(0, len(requests), size)]
+        return sum(self._map_batches(func, batches))
+
+    def _map_batches(self, func, batches: List[list]) -> list:
+        if self.max_workers == 1 or len(batches) <= 1:
+            return [func(batch) for batch in batches]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(func, batches))
+
+    def _backoff(self, attempt: int) -> None:
+        # Exponential backoff with full jitter
+        time.sleep(random.uniform(0, self.base_delay * (2 ** (attempt - 1))))
+
+    def _write_batch(self, requests: List[Dict[str, Any]]) -> int:
+        """
+        Write one batch of put or delete requests, retrying any unprocessed ones
+
+        Args:
+            requests: Up to batch_size write requests
+
+        Returns:
+            Number of requests that could not be applied
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._backoff(attempt)
+
+            try:
+                response = self.client.batch_write_item(RequestItems={self.table.name: requests})
+            except Exception as e:
+                logger.error(f"Error writing batch of {len(requests)} items to DynamoDB: {str(e)}")
+                return len(requests)
+
+            requests = response.get('UnprocessedItems', {}).get(self.table.name, [])
+            if not requests:
+                return 0
+
+        logger.error(f"Giving up on {len(requests)} unprocessed items after "
+                     f"{self.max_retries} retries")
+        return len(requests)
+
+
+class UnprocessedKeysError(Exception):
+    """Raised when BatchGetItem still returns unprocessed keys after every retry"""
+
+    def __init__(self, keys: List[Dict[str, Any]]):
+        super().__init__(f"{len(keys)} keys were still unprocessed after retries")
+        self.keys = keys
+
+
+class DynamoDBBatchReader:
+    """Reads items by key with BatchGetItem, failing instead of returning a partial result"""
+
+    def __init__(self, table, max_workers: int = DYNAMODB_READ_WORKERS,
+                 max_retries: int = DYNAMODB_MAX_RETRIES,
+                 base_delay: float = DYNAMODB_RETRY_BASE_DELAY):
+        """
+        Initialize the batch reader
+
+        Args:
+            table: boto3 DynamoDB Table resource (or a stand-in exposing name and meta.client)
+            max_workers: Number of batches read concurrently
+            max_retries: Retry attempts for unprocessed keys before giving up
+            base_delay: Initial backoff delay in seconds, doubled on every retry
+        """
+        self.table = table
+        self.client = table.meta.client
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+
+    def get_items(self, keys: List[Dict[str, Any]],
+                  attributes: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Read items by primary key with BatchGetItem
+
+        Keys that do not exist are absent from the result; every other key is
+        either read or the call fails.
+
+        Args:
+            keys: List of primary keys, e.g. [{'id': '...'}]
+            attributes: Attributes to return (default: all)
+
+        Returns:
+            List of the items found, in no particular order
+
+        Raises:
+            UnprocessedKeysError: If keys were still unprocessed after max_retries retries
+            botocore.exceptions.ClientError: If a BatchGetItem call fails
+        """
+        request = {}
+        if attributes:
+            # Placeholders keep reserved words such as 'name' usable
+            names = {f"#a{i}": attribute for i, attribute in enumerate(attributes)}
+            request = {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+        batches = [keys[i:i + BATCH_GET_SIZE] for i in range(0, len(keys), BATCH_GET_SIZE)]
+        if self.max_workers == 1 or len(batches) <= 1:
+            results = [self._get_batch(batch, request) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(partial(self._get_batch, request=request), batches))
+        return [item for batch_items in results for item in batch_items]
+
+    def _get_batch(self, keys: List[Dict[str, Any]],
+                   request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Read one batch of keys, retrying unprocessed keys
+
+        Args:
+            keys: Up to BATCH_GET_SIZE primary keys
+            request: Extra KeysAndAttributes parameters (projection)
+
+        Returns:
+            Items read
+        """
+        items = []
+        pending = {**request, 'Keys': keys}
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Exponential backoff with full jitter
+                time.sleep(random.uniform(0, self.base_delay * (2 ** (attempt - 1))))
+
+            response = self.client.batch_get_item(RequestItems={self.table.name: pending})
+            items.extend(response.get('Responses', {}).get(self.table.name, []))
+            pending = response.get('UnprocessedKeys', {}).get(self.table.name)
+            if not pending:
+                return items
+
+        logger.error(f"Giving up on {len(pending['Keys'])} unprocessed keys after "
+                     f"{self.max_retries} retries")
+        raise UnprocessedKeysError(pending['Keys'])
@@ -4,169 +4,544 @@ Supports both file paths and bytes for Lambda S3 integration
 """
 
 import pandas as pd
+from datetime import date, datetime
 from pathlib import Path
-from typing import Dict, Any, Union
+from typing import Dict, Any, Union, List, Optional, Callable, Tuple
 import logging
 from io import BytesIO
 
+from config import READER_MODE, READER_ENGINE, HEADER_SCAN_ROWS
+from reader_backends import ReaderBackend, select_backend
+from record_encoder import RecordEncoder
+from layout_cache import LayoutCache, HeaderLayout, header_signature
+
 logger = logging.getLogger(__name__)
 
+# Cell strings pandas.read_excel treats as missing by default
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+    '#NULL!', '#DIV/0!', '#VALUE!', '#REF!', '#NAME?', '#NUM!',
+])
+
+
+class NoProjectedColumnsError(Exception):
+    """Raised when a column filter leaves no column in any sheet of a workbook"""
+
 
 class ExcelProcessor:
     """Handles Excel file reading and data processing"""
-    
-    def __init__(self):
-        """Initialize the Excel processor"""
+
+    def __init__(self, reader_mode: str = READER_MODE, reader_engine: str = READER_ENGINE,
+                 layout_cache: Optional[LayoutCache] = None):
+        """
+        Initialize the Excel processor
+
+        Args:
+            reader_mode: 'pandas' (sample then full read_excel) or 'streaming'
+                (single read-only pass with per-sheet header detection)
+            reader_engine: 'auto' (by extension and installed packages), 'calamine',
+                'openpyxl' or 'xlrd'; see reader_backends.py
+            layout_cache: Cache of vendor header layouts and column plans, shared with the
+                record pipeline (default: a new cache owned by this processor)
+        """
         self.supported_formats = ['.xlsx', '.xls']
-    
-    def read_excel_file(self, file_path: Path) -> Dict[str, pd.DataFrame]:
+        self.reader_mode = reader_mode
+        self.reader_engine = reader_engine
+        self.layout_cache = layout_cache or LayoutCache()
+
+    def read_excel_file(self, file_path: Path, vendor: Optional[str] = None,
+                        column_filter: Optional[Callable[[Any], bool]] = None
+                        ) -> Dict[str, pd.DataFrame]:
         """
         Read Excel file from file path (for local processing)
-        
+
         Args:
             file_path: Path to Excel file
-            
+            vendor: Vendor name; when given, the vendor's cached header layout is tried first
+            column_filter: Projection pushdown: only columns whose header it accepts are
+                kept, and sheets without any such column are skipped (default: all columns)
+
         Returns:
-            Dictionary with sheet names as keys and DataFrames as values
+            Dictionary with sheet names as keys and DataFrames as values, empty on error
+
+        Raises:
+            NoProjectedColumnsError: If column_filter accepts no column of any sheet
         """
         try:
-            logger.info(f"Reading Excel file: {file_path.name}")
-            
-            # First, try to detect the header row by reading a small sample
-            sample_df = pd.read_excel(file_path, sheet_name=0, nrows=5, engine='openpyxl')
-            
-            # Find the header row (first row with non-null values)
-            header_row = 0
-            for i, row in sample_df.iterrows():
-                if not row.isna().all():
-                    header_row = i
-                    break
-            
-            logger.info(f"Detected header row at index: {header_row}")
-            
-            # Read all sheets with the detected header row
-            excel_data = pd.read_excel(file_path, sheet_name=None, header=header_row, engine='openpyxl')
-            
-            # If we still have unnamed columns, try to use the first data row as headers
-            for sheet_name, df in excel_data.items():
-                if any('Unnamed' in str(col) for col in df.columns):
-                    logger.info(f"Detected unnamed columns in {sheet_name}, using first row as headers")
-                    # Use the first row as column names
-                    new_columns = df.iloc[0].tolist()
-                    df.columns = new_columns
-                    # Remove the first row since it's now the header
-                    df = df.iloc[1:].reset_index(drop=True)
-                    excel_data[sheet_name] = df
-            
-            logger.info(f"Successfully read {len(excel_data)} sheets from {file_path.name}")
-            return excel_data
-            
+            backend = select_backend(file_path.name, self.reader_engine)
+            logger.info(f"Reading Excel file: {file_path.name} (engine: {backend.name})")
+
+            if self.reader_mode == 'streaming':
+                return self._read_workbook_streaming(file_path, file_path.name, backend, vendor,
+                                                     column_filter)
+
+            excel_data = self._read_workbook_pandas(file_path, file_path.name, backend, vendor)
+            return self._project_sheets(excel_data, column_filter, file_path.name)
+
+        except NoProjectedColumnsError:
+            raise
         except Exception as e:
             logger.error(f"Error reading Excel file {file_path.name}: {str(e)}")
             return {}
-    
-    def read_excel_file_from_bytes(self, file_content: bytes, filename: str) -> Dict[str, pd.DataFrame]:
+
+    def read_excel_file_from_bytes(self, file_content: bytes, filename: str,
+                                   vendor: Optional[str] = None,
+                                   column_filter: Optional[Callable[[Any], bool]] = None
+                                   ) -> Dict[str, pd.DataFrame]:
         """
         Read Excel file from bytes (for Lambda S3 integration)
-        
+
         Args:
             file_content: Excel file content as bytes
             filename: Name of the file for logging
-            
+            vendor: Vendor name; when given, the vendor's cached header layout is tried first
+            column_filter: Projection pushdown: only columns whose header it accepts are
+                kept, and sheets without any such column are skipped (default: all columns)
+
         Returns:
-            Dictionary with sheet names as keys and DataFrames as values
+            Dictionary with sheet names as keys and DataFrames as values, empty on error
+
+        Raises:
+            NoProjectedColumnsError: If column_filter accepts no column of any sheet
         """
         try:
-            logger.info(f"Reading Excel file from bytes: {filename}")
-            
+            backend = select_backend(filename, self.reader_engine)
+            logger.info(f"Reading Excel file from bytes: {filename} (engine: {backend.name})")
+
             # Create BytesIO object from file content
             file_buffer = BytesIO(file_content)
-            
-            # First, try to detect the header row by reading a small sample
-            sample_df = pd.read_excel(file_buffer, sheet_name=0, nrows=5, engine='openpyxl')
-            
-            # Reset buffer position
-            file_buffer.seek(0)
-            
-            # Find the header row (first row with non-null values)
-            header_row = 0
-            for i, row in sample_df.iterrows():
-                if not row.isna().all():
-                    header_row = i
-                    break
-            
-            logger.info(f"Detected header row at index: {header_row}")
-            
-            # Read all sheets with the detected header row
-            excel_data = pd.read_excel(file_buffer, sheet_name=None, header=header_row, engine='openpyxl')
-            
-            # If we still have unnamed columns, try to use the first data row as headers
-            for sheet_name, df in excel_data.items():
-                if any('Unnamed' in str(col) for col in df.columns):
-                    logger.info(f"Detected unnamed columns in {sheet_name}, using first row as headers")
-                    # Use the first row as column names
-                    new_columns = df.iloc[0].tolist()
-                    df.columns = new_columns
-                    # Remove the first row since it's now the header
-                    df = df.iloc[1:].reset_index(drop=True)
-                    excel_data[sheet_name] = df
-            
-            logger.info(f"Successfully read {len(excel_data)} sheets from {filename}")
-            return excel_data
-            
+
+            if self.reader_mode == 'streaming':
+                return self._read_workbook_streaming(file_buffer, filename, backend, vendor,
+                                                     column_filter)
+
+            excel_data = self._read_workbook_pandas(file_buffer, filename, backend, vendor)
+            return self._project_sheets(excel_data, column_filter, filename)
+
+        except NoProjectedColumnsError:
+            raise
         except Exception as e:
             logger.error(f"Error reading Excel file {filename}: {str(e)}")
             return {}
-    
+
+    def _read_workbook_pandas(self, source: Union[Path, BytesIO], filename: str,
+                              backend: ReaderBackend,
+                              vendor: Optional[str]) -> Dict[str, pd.DataFrame]:
+        """
+        Read every sheet with pandas.read_excel, detecting the header row from a sample
+
+        If the vendor has a cached layout, the first rows of sheet 0 are read at the
+        cached header row. When that header is one of the vendor's known headers, the
+        workbook is read at that row and the sample read for detection is skipped.
+        Otherwise detection runs as usual. Either way every sheet is parsed in full
+        only once.
+
+        Args:
+            source: Path or file-like object containing the workbook
+            filename: Name of the file for logging
+            backend: Reader backend whose engine pandas uses
+            vendor: Vendor name, or None to bypass the layout cache
+
+        Returns:
+            Dictionary with sheet names as keys and DataFrames as values
+        """
+        layout_key = f"{vendor}:pandas" if vendor else None
+        layout = self.layout_cache.get_header(layout_key) if layout_key else None
+
+        if layout is not None:
+            # Header plus one row, enough for the 'Unnamed' fallback of _read_sheets
+            try:
+                probe = pd.read_excel(source, sheet_name=0, header=layout.header_row, nrows=1,
+                                      engine=backend.name)
+                signature = header_signature(self._promote_first_row(probe, 0).columns)
+            except (ValueError, IndexError):
+                # Sheet 0 is shorter than the cached header offset
+                signature = None
+            self._rewind(source)
+            if signature in self.layout_cache.known_signatures(layout_key):
+                self.layout_cache.record_header(hit=True)
+                logger.info(f"Using cached header row {layout.header_row} for {vendor} layout")
+                excel_data = self._read_sheets(source, backend, layout.header_row)
+                logger.info(f"Successfully read {len(excel_data)} sheets from {filename}")
+                return excel_data
+            logger.info(f"Cached {vendor} layout does not match {filename}, detecting header row")
+
+        # First, try to detect the header row by reading a small sample
+        sample_df = pd.read_excel(source, sheet_name=0, nrows=5, engine=backend.name)
+        self._rewind(source)
+
+        # Find the header row (first row with non-null values)
+        header_row = 0
+        for i, row in sample_df.iterrows():
+            if not row.isna().all():
+                header_row = i
+                break
+
+        logger.info(f"Detected header row at index: {header_row}")
+
+        excel_data = self._read_sheets(source, backend, header_row)
+
+        if layout_key:
+            self.layout_cache.record_header(hit=False)
+            if excel_data:
+                signature = header_signature(next(iter(excel_data.values())).columns)
+                self.layout_cache.put_header(layout_key, HeaderLayout(header_row, signature))
+
+        logger.info(f"Successfully read {len(excel_data)} sheets from {filename}")
+        return excel_data
+
+    @staticmethod
+    def _read_sheets(source: Union[Path, BytesIO], backend: ReaderBackend,
+                     header_row: int) -> Dict[str, pd.DataFrame]:
+        """
+        Read all sheets with a given header row
+
+        Args:
+            source: Path or file-like object containing the workbook
+            backend: Reader backend whose engine pandas uses
+            header_row: Header row passed to pandas.read_excel
+
+        Returns:
+            Dictionary with sheet names as keys and DataFrames as values
+        """
+        excel_data = pd.read_excel(source, sheet_name=None, header=header_row, engine=backend.name)
+
+        for sheet_name, df in excel_data.items():
+            excel_data[sheet_name] = ExcelProcessor._promote_first_row(df, sheet_name)
+
+        return excel_data
+
+    @staticmethod
+    def _promote_first_row(df: pd.DataFrame, sheet_name: Union[str, int]) -> pd.DataFrame:
+        """
+        Use the first data row as headers if the header row left unnamed columns
+
+        The promoted row is named like the streaming reader names its header row: blank
+        cells become "Unnamed: <i>" and repeated names get a ".<n>" suffix, so both reader
+        modes produce the same record keys.
+
+        Args:
+            df: Sheet as read by pandas.read_excel
+            sheet_name: Sheet name (or index) for logging
+
+        Returns:
+            The sheet, with the first row promoted to headers if needed
+        """
+        # If we still have unnamed columns, try to use the first data row as headers
+        if any('Unnamed' in str(col) for col in df.columns):
+            logger.info(f"Detected unnamed columns in {sheet_name}, using first row as headers")
+            # Use the first row as column names
+            header = [None if pd.isna(value) else value for value in df.iloc[0].tolist()]
+            df.columns = ExcelProcessor._make_column_names(header, len(df.columns))
+            # Remove the first row since it's now the header
+            df = df.iloc[1:].reset_index(drop=True)
+        return df
+
+    @staticmethod
+    def _rewind(source: Union[Path, BytesIO]) -> None:
+        """Reset a file-like source so it can be read again"""
+        if hasattr(source, 'seek'):
+            source.seek(0)
+
+    @staticmethod
+    def _project_sheets(excel_data: Dict[str, pd.DataFrame],
+                        column_filter: Optional[Callable[[Any], bool]],
+                        filename: str) -> Dict[str, pd.DataFrame]:
+        """
+        Keep only the columns a column filter accepts, dropping sheets left without columns
+
+        pandas.read_excel has already parsed every column here; selecting right after the
+        read still keeps the unused columns out of cleaning, mapping and the output.
+
+        Args:
+            excel_data: Dictionary with sheet names as keys and DataFrames as values
+            column_filter: Header predicate, or None to keep every column
+            filename: Name of the file for logging
+
+        Returns:
+            Dictionary with the projected sheets
+
+        Raises:
+            NoProjectedColumnsError: If the workbook has sheets but none keeps a column
+        """
+        if column_filter is None:
+            return excel_data
+
+        projected = {}
+        for sheet_name, df in excel_data.items():
+            positions = [i for i, column in enumerate(df.columns) if column_filter(column)]
+            if not positions:
+                logger.info(f"Skipping sheet {sheet_name} of {filename}: no mapped columns")
+                continue
+            projected[sheet_name] = df.iloc[:, positions]
+
+        if excel_data and not projected:
+            raise NoProjectedColumnsError(f"No sheet of {filename} has a mapped column")
+        return projected
+
+    def _read_workbook_streaming(self, source: Union[Path, BytesIO], filename: str,
+                                 backend: ReaderBackend, vendor: Optional[str] = None,
+                                 column_filter: Optional[Callable[[Any], bool]] = None
+                                 ) -> Dict[str, pd.DataFrame]:
+        """
+        Read every sheet in a single read-only pass
+
+        The workbook is opened and decompressed once; each sheet's header row is
+        detected from its own leading rows while the rows are streamed.
+
+        Args:
+            source: Path or file-like object containing the workbook
+            filename: Name of the file for logging
+            backend: Reader backend streaming the sheet rows
+            vendor: Vendor name; rows matching one of the vendor's cached headers are
+                taken as the header without scanning further
+            column_filter: Header predicate; only accepted columns are collected, and a
+                sheet without any is skipped as soon as its header is known
+
+        Returns:
+            Dictionary with sheet names as keys and DataFrames as values
+        """
+        layout_key = f"{vendor}:streaming" if vendor else None
+        excel_data = {}
+        sheet_count = 0
+        for sheet_name, rows in backend.iter_sheets(source):
+            sheet_count += 1
+            df = self._read_sheet_rows(rows, layout_key, column_filter)
+            if df is None:
+                logger.info(f"Skipping sheet {sheet_name} of {filename}: no mapped columns")
+                continue
+            excel_data[sheet_name] = df
+
+        if sheet_count and not excel_data:
+            raise NoProjectedColumnsError(f"No sheet of {filename} has a mapped column")
+        logger.info(f"Successfully read {len(excel_data)} sheets from {filename}")
+        return excel_data
+
+    def _read_sheet_rows(self, rows, layout_key: Optional[str] = None,
+                         column_filter: Optional[Callable[[Any], bool]] = None
+                         ) -> Optional[pd.DataFrame]:
+        """
+        Build a DataFrame from raw sheet rows, detecting the header row on the way
+
+        The header is the first row, within the first HEADER_SCAN_ROWS non-blank
+        rows, with the most text cells - this skips title banners above the table.
+        A leading row whose signature is a cached header of the layout key is taken
+        as the header immediately.
+
+        Args:
+            rows: Iterator of row value tuples
+            layout_key: Layout cache key (vendor and reader mode), or None to bypass the cache
+            column_filter: Header predicate; rows are cut down to the accepted columns
+                once the header is known
+
+        Returns:
+            DataFrame for the sheet, or None if column_filter accepts none of its columns
+            (the remaining rows are then left unread)
+        """
+        known_headers = frozenset()
+        if layout_key:
+            known_headers = self.layout_cache.known_signatures(layout_key)
+        leading = []
+        header = None
+        projection = None
+        data = []
+        width = 0
+
+        for row in rows:
+            values = self._convert_row(row)
+            if values is None:
+                continue
+
+            if header is None:
+                if known_headers and header_signature(values) in known_headers:
+                    header = values
+                    self.layout_cache.record_header(hit=True)
+                else:
+                    leading.append(values)
+                    if len(leading) < HEADER_SCAN_ROWS:
+                        continue
+                    header, data = self._detect_header(leading, layout_key)
+
+                if column_filter is not None:
+                    projection = self._project_columns(header, column_filter)
+                    if not projection[0]:
+                        return None
+                    data = [self._take(v, projection[0]) for v in data]
+                width = max((len(v) for v in data), default=0)
+                continue
+
+            if projection is not None:
+                values = self._take(values, projection[0])
+            data.append(values)
+            width = max(width, len(values))
+
+        if header is None:
+            if not leading:
+                return pd.DataFrame()
+            header, data = self._detect_header(leading, layout_key)
+            if column_filter is not None:
+                projection = self._project_columns(header, column_filter)
+                if not projection[0]:
+                    return None
+                data = [self._take(v, projection[0]) for v in data]
+            width = max((len(v) for v in data), default=0)
+
+        if projection is not None:
+            positions, columns = projection
+            df = pd.DataFrame(data).reindex(columns=range(len(positions)))
+            df.columns = columns
+            return df
+
+        width = max(width, len(header))
+        df = pd.DataFrame(data).reindex(columns=range(width))
+        df.columns = self._make_column_names(header, width)
+        return df
+
+    def _project_columns(self, header: list,
+                         column_filter: Callable[[Any], bool]) -> Tuple[List[int], List[str]]:
+        """
+        Find the header positions a column filter accepts
+
+        Args:
+            header: Header row values
+            column_filter: Header predicate, applied to the final column names
+
+        Returns:
+            Tuple of (kept positions, their column names)
+        """
+        names = self._make_column_names(header, len(header))
+        positions = [i for i, name in enumerate(names) if column_filter(name)]
+        return positions, [names[i] for i in positions]
+
+    @staticmethod
+    def _take(values: list, positions: List[int]) -> list:
+        """Pick the values at the given positions of a row whose trailing blanks were trimmed"""
+        return [values[i] if i < len(values) else None for i in positions]
+
+    @staticmethod
+    def _convert_row(row: tuple) -> Optional[list]:
+        """
+        Convert raw cell values the way pandas.read_excel does
+
+        Args:
+            row: Tuple of cell values
+
+        Returns:
+            List of values with trailing blanks trimmed, or None for a blank row
+        """
+        values = []
+        for value in row:
+            if isinstance(value, str):
+                if value in NA_STRINGS:
+                    value = None
+            elif isinstance(value, float) and value.is_integer():
+                value = int(value)
+            elif type(value) is date:
+                # calamine returns date-only cells as date; the other engines give datetime
+                value = datetime(value.year, value.month, value.day)
+            values.append(value)
+
+        while values and values[-1] is None:
+            values.pop()
+
+        return values or None
+
+    def _detect_header(self, leading: List[list], layout_key: Optional[str]):
+        """Pick the header row out of the leading rows and cache its signature"""
+        header, data = self._split_header(leading)
+        if layout_key:
+            self.layout_cache.record_header(hit=False)
+            self.layout_cache.put_header(layout_key, HeaderLayout(len(leading) - len(data) - 1,
+                                                                  header_signature(header)))
+        return header, data
+
+    @staticmethod
+    def _split_header(leading: List[list]):
+        """
+        Pick the header row out of the buffered leading rows
+
+        Args:
+            leading: Non-blank leading rows
+
+        Returns:
+            Tuple of (header row, rows following it)
+        """
+        text_counts = [sum(isinstance(v, str) for v in values) for values in leading]
+        header_index = text_counts.index(max(text_counts))
+        logger.info(f"Detected header row at index: {header_index}")
+        return leading[header_index], leading[header_index + 1:]
+
+    @staticmethod
+    def _make_column_names(header: list, width: int) -> List[str]:
+        """
+        Build unique column names, naming blank headers like pandas does
+
+        Args:
+            header: Header row values
+            width: Number of columns in the sheet
+
+        Returns:
+            List of column names
+        """
+        columns = []
+        seen = {}
+        for i in range(width):
+            value = header[i] if i < len(header) else None
+            name = f"Unnamed: {i}" if value is None else str(value)
+            if name in seen:
+                seen[name] += 1
+                name = f"{name}.{seen[name]}"
+            else:
+                seen[name] = 0
+            columns.append(name)
+        return columns
+
     def clean_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Clean and prepare DataFrame for processing
-        
+
         Args:
             df: Raw DataFrame
-            
+
         Returns:
             Cleaned DataFrame
         """
         # Remove completely empty rows and columns
         df = df.dropna(how='all').dropna(axis=1, how='all')
-        
+
         # Reset index
         df = df.reset_index(drop=True)
-        
-        # Convert data types where possible
-        df = df.convert_dtypes()
-        
-        # Fill NaN values with empty string
-        df = df.fillna('')
-        
+
+        # Values keep their read types and nulls stay null; mapped system fields are
+        # typed per column by FieldSchema after mapping
         return df
-    
+
     def process_sheet(self, sheet_name: str, df: pd.DataFrame, file_name: str) -> Dict[str, Any]:
         """
         Process individual sheet data
-        
+
         Args:
             sheet_name: Name of the sheet
             df: DataFrame containing sheet data
             file_name: Name of the source file
-            
+
         Returns:
             Dictionary with processed sheet data
         """
         # Clean the data
         cleaned_df = self.clean_dataframe(df)
-        
-        # Convert to records (list of dictionaries)
-        records = cleaned_df.to_dict('records')
-        
+
+        # Convert to records (list of dictionaries), missing values as None
+        records = RecordEncoder().encode(cleaned_df)
+
         # Add file_name to each record
         for record in records:
             record['file_name'] = file_name
-        
+
         return {
             'sheet_name': sheet_name,
             'row_count': len(cleaned_df),
             'column_count': len(cleaned_df.columns),
             'data': records
-        }
\ No newline at end of file
+        }
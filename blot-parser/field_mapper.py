@@ -2,91 +2,189 @@
 Field Mapper - Maps vendor-specific field names to generic system field names
 """
 
-import csv
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable, Iterable
 import logging
 
+import pandas as pd
+
+from mapping_registry import MappingRegistry, CompiledMapping
+
 logger = logging.getLogger(__name__)
 
 
 class FieldMapper:
     """Maps vendor-specific field names to generic system field names using CSV configuration"""
-    
-    def __init__(self, mappings_dir: str = "mappings"):
+
+    def __init__(self, mappings_dir: str = "mappings", compiled_registry: Optional[str] = None):
         """
         Initialize the field mapper
-        
+
         Args:
             mappings_dir: Directory containing CSV mapping files
+            compiled_registry: Optional prebuilt registry JSON (see mapping_registry.py) used
+                instead of parsing the CSVs
         """
         self.mappings_dir = Path(mappings_dir)
+        self.registry = MappingRegistry(mappings_dir)
         self.mappings = {}
-    
+
+        if compiled_registry:
+            self.registry.load(compiled_registry)
+
     def load_vendor_mapping(self, vendor: str) -> None:
         """
         Load field mappings for a specific vendor from CSV file
-        
+
+        Args:
+            vendor: Vendor name (e.g., 'bloomberg')
+        """
+        compiled = self.registry.get(vendor)
+
+        if compiled is not None:
+            self.mappings[vendor] = compiled.exact
+
+    def get_mapping_fingerprint(self, vendor: str) -> str:
+        """
+        Fingerprint the mapping CSV used for a vendor
+
         Args:
             vendor: Vendor name (e.g., 'bloomberg')
+
+        Returns:
+            SHA-256 hex digest of the CSV contents, or '' if there is no mapping file
+        """
+        compiled = self.registry.get(vendor)
+        return compiled.fingerprint if compiled is not None else ''
+
+    def get_compiled_mapping(self, vendor: str) -> Optional[CompiledMapping]:
         """
-        csv_file = self.mappings_dir / f"{vendor}.csv"
-        
-        if not csv_file.exists():
-            logger.error(f"Mapping file not found: {csv_file}")
-            return
-        
-        try:
-            with open(csv_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                
-                self.mappings[vendor] = {}
-                
-                for row in reader:
-                    vendor_field = row['vendor_field']
-                    system_field = row['system_field']
-                    self.mappings[vendor][vendor_field] = system_field
-                
-            logger.info(f"Loaded mappings for vendor '{vendor}' from {csv_file.name}")
-            
-        except Exception as e:
-            logger.error(f"Error loading mappings from {csv_file}: {e}")
-    
+        Get the compiled mapping for a vendor, reloading its CSV if it changed
+
+        Args:
+            vendor: Vendor name (e.g., 'bloomberg')
+
+        Returns:
+            CompiledMapping, or None if no mapping exists for the vendor
+        """
+        compiled = self.registry.get(vendor)
+
+        if compiled is None:
+            logger.error(f"No mappings found for vendor: {vendor}")
+            return None
+
+        self.mappings[vendor] = compiled.exact
+        return compiled
+
+    def get_vendor_mapping(self, vendor: str) -> Optional[Dict[str, str]]:
+        """
+        Get the exact vendor field -> system field mapping, loading it on first use
+
+        Args:
+            vendor: Vendor name (e.g., 'bloomberg')
+
+        Returns:
+            Mapping dictionary, or None if no mapping exists for the vendor
+        """
+        compiled = self.get_compiled_mapping(vendor)
+        return compiled.exact if compiled is not None else None
+
+    def map_dataframe(self, df: pd.DataFrame, vendor: str) -> pd.DataFrame:
+        """
+        Map a whole sheet from vendor format to system format by renaming its columns once
+
+        Headers are matched exactly or after normalization (case, whitespace and
+        punctuation). Unmapped columns are kept as-is. The data itself is not copied.
+
+        Args:
+            df: DataFrame with vendor column headers
+            vendor: Vendor name (e.g., 'bloomberg')
+
+        Returns:
+            DataFrame with system field column names
+        """
+        compiled = self.get_compiled_mapping(vendor)
+
+        if compiled is None:
+            return df
+
+        mapped_df = df.copy(deep=False)
+        mapped_df.columns = [compiled.lookup(column) or column for column in df.columns]
+        return mapped_df
+
+    def map_columns(self, columns: List[Any], vendor: str) -> List[Any]:
+        """
+        Map column headers from vendor format to system field names
+
+        Args:
+            columns: Column headers as read from the file
+            vendor: Vendor name (e.g., 'bloomberg')
+
+        Returns:
+            System field name for each mapped header, the header itself otherwise
+        """
+        compiled = self.get_compiled_mapping(vendor)
+
+        if compiled is None:
+            return list(columns)
+
+        return [compiled.lookup(column) or column for column in columns]
+
+    def column_filter(self, vendor: str,
+                      fields: Optional[Iterable[str]] = None) -> Optional[Callable[[Any], bool]]:
+        """
+        Build the predicate used for projection pushdown: which source columns to read
+
+        Args:
+            vendor: Vendor name (e.g., 'bloomberg')
+            fields: System fields to keep (default: every mapped field)
+
+        Returns:
+            Function telling whether a column header maps to a kept system field, or None
+            if the vendor has no mapping (every column is then read)
+        """
+        compiled = self.get_compiled_mapping(vendor)
+
+        if compiled is None:
+            return None
+
+        allowed = frozenset(fields) if fields else None
+
+        def keep(header: Any) -> bool:
+            system_field = compiled.lookup(header)
+            return system_field is not None and (allowed is None or system_field in allowed)
+
+        return keep
+
     def map_records(self, records: List[Dict[str, Any]], vendor: str) -> List[Dict[str, Any]]:
         """
         Map multiple records from vendor format to system format
-        
+
+        Kept for callers that already hold records; prefer map_dataframe for sheets.
+
         Args:
             records: List of dictionaries containing field names and values
             vendor: Vendor name (e.g., 'bloomberg')
-            
+
         Returns:
             List of mapped records with system field names
         """
-        if vendor not in self.mappings:
-            self.load_vendor_mapping(vendor)
-        
-        if vendor not in self.mappings:
-            logger.error(f"No mappings found for vendor: {vendor}")
+        compiled = self.get_compiled_mapping(vendor)
+
+        if compiled is None:
             return records
-        
-        vendor_mapping = self.mappings[vendor]
+
+        lookup = compiled.lookup
         mapped_records = []
-        
+
         for record in records:
             try:
-                mapped_record = {}
-                for field_name, value in record.items():
-                    if field_name in vendor_mapping:
-                        mapped_field = vendor_mapping[field_name]
-                        mapped_record[mapped_field] = value
-                    else:
-                        # Keep unmapped fields as-is
-                        mapped_record[field_name] = value
-                mapped_records.append(mapped_record)
+                # Unmapped fields are kept as-is
+                mapped_records.append({lookup(field_name) or field_name: value
+                                       for field_name, value in record.items()})
             except Exception as e:
                 logger.error(f"Error mapping record: {e}")
                 # Keep original record if mapping fails
                 mapped_records.append(record)
-        
-        return mapped_records
\ No newline at end of file
+
+        return mapped_records
@@ -0,0 +1,178 @@
+"""
+Field Schema - Typed coercion of mapped system fields
+
+Each system field in mappings/generic.csv declares a type. After mapping, every typed
+column is coerced in one vectorized pass instead of value by value:
+
+    string      left as read
+    identifier  text; integral numbers lose their '.0' (e.g. IDs read as floats)
+    decimal     float
+    quantity    whole numbers when every value is integral, otherwise float
+    integer     as quantity, for counts such as days or sequence numbers
+    date        'YYYY-MM-DD'
+    datetime    'YYYY-MM-DD HH:MM:SS[.ffffff]'
+
+Missing values stay real nulls (see record_encoder.py for how records are built).
+Placeholders such as '--' count as missing in typed columns. A column whose values do
+not all parse as its type is left unchanged rather than losing data.
+"""
+
+import csv
+import hashlib
+from functools import partial
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype, \
+    is_string_dtype
+
+logger = logging.getLogger(__name__)
+
+FIELD_TYPES = ('string', 'identifier', 'decimal', 'quantity', 'integer', 'date', 'datetime')
+
+PLACEHOLDERS = ['--', '-', '']
+
+
+class FieldSchema:
+    """System field types with vectorized per-column coercion"""
+
+    def __init__(self, types: Dict[str, str], fingerprint: str = ''):
+        """
+        Initialize the schema
+
+        Args:
+            types: system_field -> type (one of FIELD_TYPES)
+            fingerprint: SHA-256 of the schema source, used to invalidate processed outputs
+        """
+        unknown = {field: kind for field, kind in types.items() if kind not in FIELD_TYPES}
+        if unknown:
+            raise ValueError(f"Unsupported field types {unknown}, expected one of {FIELD_TYPES}")
+
+        self.types = types
+        self.fingerprint = fingerprint
+        self._coercers = {
+            'identifier': self._to_identifier,
+            'decimal': self._to_decimal,
+            'quantity': self._to_whole_or_decimal,
+            'integer': self._to_whole_or_decimal,
+            # partial rather than lambda keeps the schema picklable for worker processes
+            'date': partial(self._to_datetime_text, fmt='%Y-%m-%d'),
+            'datetime': partial(self._to_datetime_text, fmt='%Y-%m-%d %H:%M:%S.%f'),
+        }
+
+    @classmethod
+    def load(cls, csv_file: Path) -> 'FieldSchema':
+        """
+        Load field types from the system field list
+
+        Args:
+            csv_file: CSV with system_field and type columns (mappings/generic.csv)
+
+        Returns:
+            FieldSchema; empty (no coercion) if the file is missing or has no type column
+        """
+        csv_file = Path(csv_file)
+        try:
+            content = csv_file.read_bytes()
+        except FileNotFoundError:
+            logger.warning(f"Field schema not found: {csv_file}; mapped fields will not be typed")
+            return cls({})
+
+        rows = list(csv.DictReader(content.decode('utf-8').splitlines()))
+        types = {row['system_field']: (row.get('type') or 'string').strip() for row in rows}
+        return cls(types, hashlib.sha256(content).hexdigest())
+
+    def coerce_dataframe(self, df: pd.DataFrame,
+                         typed_positions: Optional[List[Tuple[int, str]]] = None) -> pd.DataFrame:
+        """
+        Coerce every typed column of a mapped DataFrame
+
+        Args:
+            df: DataFrame with system field column names
+            typed_positions: (column index, field type) pairs, e.g. from a cached
+                ColumnPlan; looked up from the column names when omitted
+
+        Returns:
+            DataFrame with typed columns; untyped and 'string' columns are unchanged
+        """
+        if typed_positions is None:
+            typed_positions = self.typed_positions(df.columns)
+
+        coerced = {}
+        for index, field_type in typed_positions:
+            coercer = self._coercers.get(field_type)
+            if coercer is None:
+                continue
+
+            original = df.iloc[:, index]
+            if original.dtype == object or is_string_dtype(original):
+                values = original.replace(PLACEHOLDERS, None)
+            else:
+                values = original
+            result = coercer(values)
+
+            if result is None or (result.isna() & values.notna()).any():
+                logger.debug(f"Column '{df.columns[index]}' is not all {field_type}; "
+                             f"left unchanged")
+                continue
+            coerced[index] = result
+
+        if not coerced:
+            return df
+        df = df.copy(deep=False)
+        for index, values in coerced.items():
+            df.isetitem(index, values)
+        return df
+
+    def typed_positions(self, columns: List[Any]) -> List[Tuple[int, str]]:
+        """
+        Find the typed columns by name
+
+        Args:
+            columns: System field column names
+
+        Returns:
+            (column index, field type) pairs for columns with a type
+        """
+        return [(index, self.types[column]) for index, column in enumerate(columns)
+                if isinstance(column, str) and column in self.types]
+
+    @staticmethod
+    def _to_decimal(column: pd.Series) -> pd.Series:
+        if is_bool_dtype(column):
+            return None
+        return pd.to_numeric(column, errors='coerce').astype('float64')
+
+    @classmethod
+    def _to_whole_or_decimal(cls, column: pd.Series) -> pd.Series:
+        numbers = cls._to_decimal(column)
+        if numbers is not None and (numbers.dropna() % 1 == 0).all():
+            return numbers.astype('Int64')
+        return numbers
+
+    @staticmethod
+    def _to_identifier(column: pd.Series) -> pd.Series:
+        if is_numeric_dtype(column) and not is_bool_dtype(column):
+            numbers = column.astype('float64')
+            if (numbers.dropna() % 1 == 0).all():
+                return numbers.astype('Int64').astype('string')
+            return column.astype('string')
+
+        # Mixed columns: integral floats are written without the trailing '.0'
+        return column.astype('string').str.replace(r'^(-?\d+)\.0$', r'\1', regex=True)
+
+    @staticmethod
+    def _to_datetime_text(column: pd.Series, fmt: str) -> pd.Series:
+        if is_numeric_dtype(column) or is_bool_dtype(column):
+            return None
+        if is_datetime64_any_dtype(column):
+            timestamps = column
+        else:
+            timestamps = pd.to_datetime(column, errors='coerce', format='mixed')
+        text = timestamps.dt.strftime(fmt)
+        if fmt.endswith('.%f'):
+            # Match str(Timestamp): no fractional part when it is zero
+            text = text.str.removesuffix('.000000')
+        return text.astype('string')
@@ -2,64 +2,325 @@
 File Manager - Handles file operations and directory management
 """
 
+import glob
+import hashlib
 import json
+import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
-from config import SUPPORTED_FORMATS
+from config import SUPPORTED_FORMATS, MANIFEST_FILENAME, OUTPUT_FORMAT
+from output_writers import OUTPUT_SUFFIXES, JsonArrayWriter, create_writer
+from sharding import Shard, shard_of
 
 logger = logging.getLogger(__name__)
 
 
 class FileManager:
     """Handles file operations and directory management"""
-    
-    def __init__(self, input_dir: str = "../Input-files", output_dir: str = "Output-files"):
+
+    def __init__(self, input_dir: str = "../Input-files", output_dir: str = "Output-files",
+                 output_format: str = OUTPUT_FORMAT, input_patterns: Optional[List[str]] = None,
+                 shard: Optional[Shard] = None):
         """
         Initialize the file manager
-        
+
         Args:
             input_dir: Directory containing input Excel files
-            output_dir: Directory for output JSON files
+            output_dir: Directory for output files
+            output_format: Format used by open_writer: 'json', 'ndjson', 'ndjson.gz' or 'parquet'
+            input_patterns: Directories or glob patterns (** matches subdirectories) listing
+                the input files instead of input_dir
+            shard: (index, count) to keep only the files of one shard (see sharding.py);
+                the manifest is then kept per shard
         """
+        if output_format not in OUTPUT_SUFFIXES:
+            raise ValueError(f"Unsupported output format '{output_format}', "
+                             f"expected one of {list(OUTPUT_SUFFIXES)}")
+
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
+        self.output_format = output_format
+        self.input_patterns = input_patterns
+        self.shard = shard
         self.supported_formats = SUPPORTED_FORMATS
-    
+        # Shards sharing an output directory must not overwrite each other's manifest
+        manifest_name = MANIFEST_FILENAME
+        if shard:
+            manifest_name = MANIFEST_FILENAME.replace('.json',
+                                                      f".shard-{shard[0]}-of-{shard[1]}.json")
+        self.manifest_file = self.output_dir / manifest_name
+        self.manifest = None
+
     def get_excel_files(self) -> List[Path]:
         """
-        Get all Excel files from input directory
-        
+        Get all Excel files from the input directory or input patterns
+
         Returns:
-            List of Excel file paths
+            List of Excel file paths, limited to this file manager's shard if it has one
         """
+        if self.input_patterns:
+            return self._get_pattern_files()
+
         if not self.input_dir.exists():
             logger.error(f"Input directory {self.input_dir} does not exist")
             return []
-        
+
         excel_files = []
         for file_path in self.input_dir.iterdir():
-            if file_path.suffix.lower() in self.supported_formats:
+            if file_path.suffix.lower() in self.supported_formats and self.in_shard(file_path.name):
                 excel_files.append(file_path)
                 logger.info(f"Found Excel file: {file_path.name}")
-        
+
         return excel_files
-    
-    def save_json_data(self, file_data: Dict[str, Any], mapped_records: List[Dict[str, Any]]) -> None:
+
+    def _get_pattern_files(self) -> List[Path]:
+        """
+        Expand the input patterns into Excel files, sorted by path
+
+        Outputs, manifest entries and shards are keyed by relative_name(), so files with
+        the same name in different subdirectories are all kept. Only when two patterns
+        yield the same relative path is the second file (by path) skipped.
+
+        Returns:
+            List of Excel file paths
+        """
+        matches = set()
+        for pattern in self.input_patterns:
+            if Path(pattern).is_dir():
+                matches.update(Path(pattern).iterdir())
+            else:
+                matches.update(Path(match) for match in glob.glob(pattern, recursive=True))
+
+        excel_files = []
+        names = {}
+        for file_path in sorted(matches):
+            if file_path.suffix.lower() not in self.supported_formats or not file_path.is_file():
+                continue
+            name = self.relative_name(file_path)
+            if name in names:
+                logger.warning(f"Skipping {file_path}: same relative path {name} as {names[name]}")
+                continue
+            names[name] = file_path
+            if self.in_shard(name):
+                excel_files.append(file_path)
+                logger.info(f"Found Excel file: {file_path}")
+
+        if not matches:
+            logger.error(f"No files match the input patterns {self.input_patterns}")
+        return excel_files
+
+    def relative_name(self, file_path: Path) -> str:
+        """
+        Get the key of an input file: its path relative to the input root it was found under
+
+        The root of a directory pattern is the directory; the root of a glob pattern is
+        its leading directories without wildcards. Files of input_dir are keyed by name.
+
+        Args:
+            file_path: Input file path
+
+        Returns:
+            Relative path with '/' separators, or the file name if no root contains it
+        """
+        for root in self._input_roots():
+            try:
+                return file_path.relative_to(root).as_posix()
+            except ValueError:
+                continue
+        return file_path.name
+
+    def _input_roots(self) -> List[Path]:
+        """Input roots in pattern order (input_dir when there are no patterns)"""
+        if not self.input_patterns:
+            return [self.input_dir]
+
+        roots = []
+        for pattern in self.input_patterns:
+            path = Path(pattern)
+            if path.is_dir():
+                roots.append(path)
+                continue
+            parts = path.parts
+            fixed = next((i for i, part in enumerate(parts) if glob.has_magic(part)),
+                         len(parts) - 1)
+            roots.append(Path(*parts[:fixed]) if fixed else Path('.'))
+        return roots
+
+    def in_shard(self, file_name: str) -> bool:
+        """
+        Check whether a file belongs to this file manager's shard
+
+        Args:
+            file_name: Input file key from relative_name()
+
+        Returns:
+            True if there is no shard or the file hashes to it
+        """
+        return self.shard is None or shard_of(file_name, self.shard[1]) == self.shard[0]
+
+    def save_json_data(self, file_data: Dict[str, Any],
+                       mapped_records: List[Dict[str, Any]]) -> None:
         """
         Save mapped JSON data to output directory
-        
+
         Args:
             file_data: File metadata
             mapped_records: Mapped records to save
         """
-        self.output_dir.mkdir(exist_ok=True)
-        
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
         # Create JSON file
         json_file = self.output_dir / f"{file_data['file_name']}_data.json"
-        
+
         # Save mapped data
-        with open(json_file, 'w') as f:
-            json.dump(mapped_records, f, indent=2, default=str)
-        
-        logger.info(f"Saved mapped JSON data for {file_data['file_name']} to {json_file}")
\ No newline at end of file
+        with JsonArrayWriter(json_file) as writer:
+            writer.write_records(mapped_records)
+
+        logger.info(f"Saved mapped JSON data for {file_data['file_name']} to {json_file}")
+
+    def output_path(self, file_name: str) -> Path:
+        """
+        Get the output path for an input file in the selected output format
+
+        Args:
+            file_name: Input file key from relative_name(); its subdirectories are
+                mirrored under the output directory
+
+        Returns:
+            Path of the output file
+        """
+        return self.output_dir / f"{file_name}_data{OUTPUT_SUFFIXES[self.output_format]}"
+
+    def open_writer(self, file_data: Dict[str, Any]):
+        """
+        Open an incremental writer for a file's mapped records in the selected output format
+
+        Args:
+            file_data: File metadata with the input file_path
+
+        Returns:
+            Writer to use as a context manager
+        """
+        output_file = self.output_path(self.relative_name(Path(file_data['file_path'])))
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        return create_writer(self.output_format, output_file)
+
+    @staticmethod
+    def hash_file(file_path: Path) -> str:
+        """
+        Compute the SHA-256 content hash of a file
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Hex digest of the file contents
+        """
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the manifest of previously processed input files
+
+        Returns:
+            Dictionary keyed by input file key (see relative_name)
+        """
+        if self.manifest is None:
+            self.manifest = {}
+            if self.manifest_file.exists():
+                try:
+                    with open(self.manifest_file, 'r') as f:
+                        self.manifest = json.load(f)
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable manifest {self.manifest_file}: {e}")
+        return self.manifest
+
+    def save_manifest(self) -> None:
+        """Write the manifest to the output directory"""
+        if self.manifest is None:
+            return
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        temp_file = self.manifest_file.with_suffix('.tmp')
+        with open(temp_file, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(temp_file, self.manifest_file)
+
+    def is_up_to_date(self, file_path: Path, mapping_fingerprint: str) -> bool:
+        """
+        Check whether a file's output is current according to the manifest
+
+        Size and mtime are checked first; the content hash is only computed when
+        the mtime changed, so a touched but unchanged file is still skipped.
+
+        Args:
+            file_path: Path to input file
+            mapping_fingerprint: Fingerprint of the mapping CSV the file would use
+
+        Returns:
+            True if the file can be skipped
+        """
+        name = self.relative_name(file_path)
+        entry = self.load_manifest().get(name)
+
+        if not entry or entry.get('mapping_fingerprint') != mapping_fingerprint:
+            return False
+
+        if not self.output_path(name).exists():
+            return False
+
+        stat = file_path.stat()
+        if stat.st_size != entry['size']:
+            return False
+
+        if stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+
+        if self.hash_file(file_path) != entry['sha256']:
+            return False
+
+        entry['mtime_ns'] = stat.st_mtime_ns
+        return True
+
+    def snapshot(self, file_path: Path) -> Dict[str, Any]:
+        """
+        Fingerprint an input file before it is read
+
+        The file is stat'ed before it is hashed, so a write that lands during hashing
+        or during processing leaves a recorded mtime or hash that no longer matches,
+        and the next run processes the file again.
+
+        Args:
+            file_path: Path to input file
+
+        Returns:
+            Dictionary with sha256, size and mtime_ns, to pass to record_processed
+        """
+        stat = file_path.stat()
+        return {
+            'sha256': self.hash_file(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns
+        }
+
+    def record_processed(self, file_path: Path, mapping_fingerprint: str,
+                         snapshot: Dict[str, Any]) -> None:
+        """
+        Record a successfully processed file in the manifest
+
+        Args:
+            file_path: Path to input file
+            mapping_fingerprint: Fingerprint of the mapping CSV used
+            snapshot: Fingerprint of the file taken by snapshot() before it was read
+        """
+        name = self.relative_name(file_path)
+        self.load_manifest()[name] = {
+            **snapshot,
+            'mapping_fingerprint': mapping_fingerprint,
+            'output_file': self.output_path(name).relative_to(self.output_dir).as_posix()
+        }
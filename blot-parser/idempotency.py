@@ -0,0 +1,189 @@
+"""
+Idempotency - Conditional markers so each S3 object version is processed once
+
+S3 delivers notifications at least once and Lambda retries failed invocations. Before a
+file is processed, a marker item keyed on bucket, key, ETag and version id is created
+with a conditional put that only succeeds if no live marker exists:
+
+    in_progress   written when processing starts; expires shortly after the claiming
+                  invocation's deadline so a crashed or timed-out attempt can be
+                  reclaimed by a redelivery
+    done          written with the result when processing succeeds; redeliveries
+                  return that result until the done TTL expires
+
+Failed attempts delete their marker so a retry can process the file again. A delivery
+that finds an in_progress marker has not been processed yet and should be retried later
+(DuplicateInProgressError), not acknowledged. Every
+marker carries an owner token, and completing or releasing a marker is conditional on
+still owning it, so a slow attempt cannot overwrite the marker of one that reclaimed it.
+
+Markers live in the data table under "event#..." ids. They carry no vendor attribute
+(staying out of VendorIndex) and an expires_at epoch attribute for DynamoDB TTL.
+"""
+
+import json
+import math
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Callable
+import logging
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from config import IDEMPOTENCY_IN_PROGRESS_TTL, IDEMPOTENCY_CLAIM_MARGIN, IDEMPOTENCY_DONE_TTL
+
+logger = logging.getLogger(__name__)
+
+MARKER_PREFIX = 'event#'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+
+
+class DuplicateInProgressError(Exception):
+    """Raised when deliveries found their object version claimed by a running attempt"""
+
+    def __init__(self, marker_ids: List[str]):
+        self.marker_ids = marker_ids
+        super().__init__(f"{len(marker_ids)} object version(s) still being processed "
+                         f"by another attempt")
+
+
+class IdempotencyGuard:
+    """Claims, completes and releases per-object-version markers with conditional writes"""
+
+    def __init__(self, table, in_progress_ttl: int = IDEMPOTENCY_IN_PROGRESS_TTL,
+                 done_ttl: int = IDEMPOTENCY_DONE_TTL,
+                 claim_margin: int = IDEMPOTENCY_CLAIM_MARGIN,
+                 clock: Callable[[], float] = time.time):
+        """
+        Initialize the guard
+
+        Args:
+            table: DynamoDB Table resource (or a stand-in supporting conditional
+                put_item/delete_item and get_item) holding the markers
+            in_progress_ttl: Seconds after which an in-progress marker can be reclaimed
+                when the claim has no deadline; keep it at least the Lambda timeout
+            done_ttl: Seconds a done marker suppresses redeliveries
+            claim_margin: Seconds an in-progress marker outlives its claim's deadline
+            clock: Source of the current epoch time
+        """
+        self.table = table
+        self.in_progress_ttl = in_progress_ttl
+        self.done_ttl = done_ttl
+        self.claim_margin = claim_margin
+        self.clock = clock
+
+    @staticmethod
+    def marker_id(bucket: str, key: str, etag: str, version_id: Optional[str] = None) -> str:
+        """
+        Build the marker id of one object version
+
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+            etag: Object ETag, with or without the surrounding quotes S3 APIs add
+            version_id: Object version id (None for unversioned buckets)
+
+        Returns:
+            Marker item id
+        """
+        # Event notifications omit the quotes that HeadObject includes
+        etag = etag.strip('"')
+        return f"{MARKER_PREFIX}s3://{bucket}/{key}#{etag}#{version_id or 'null'}"
+
+    def claim(self, marker_id: str, source_file: str,
+              deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Try to take ownership of an object version
+
+        Args:
+            marker_id: Marker id from marker_id()
+            source_file: Source file name, stored on the marker
+            deadline: Epoch time at which the claiming invocation times out; the marker
+                expires claim_margin seconds later (default: in_progress_ttl from now)
+
+        Returns:
+            {'claimed': True, 'token': owner token} if this attempt should process the
+            file, otherwise {'claimed': False, 'status': 'in_progress' or 'done',
+            'result': result of the earlier attempt (done markers only)}
+        """
+        now = int(self.clock())
+        token = uuid.uuid4().hex
+        if deadline is None:
+            expires_at = now + self.in_progress_ttl
+        else:
+            expires_at = math.ceil(deadline) + self.claim_margin
+        marker = {
+            'id': marker_id,
+            'item_type': 'idempotency_marker',
+            'source_file': source_file,
+            'status': IN_PROGRESS,
+            'owner': token,
+            'expires_at': expires_at,
+        }
+
+        # TTL deletion lags expiry, so expired markers are treated as absent here
+        condition = Attr('id').not_exists() | Attr('expires_at').lt(now)
+        if self._conditional(self.table.put_item, Item=marker, ConditionExpression=condition):
+            return {'claimed': True, 'token': token}
+
+        existing = self.table.get_item(Key={'id': marker_id}, ConsistentRead=True).get('Item')
+        if existing is None:
+            # Released between our put and get; the redelivery that released it retries
+            return {'claimed': False, 'status': IN_PROGRESS, 'result': None}
+
+        result = json.loads(existing['result']) if existing.get('result') else None
+        return {'claimed': False, 'status': existing['status'], 'result': result}
+
+    def complete(self, marker_id: str, token: str, result: Dict[str, Any]) -> bool:
+        """
+        Mark an object version as processed
+
+        Args:
+            marker_id: Marker id from marker_id()
+            token: Owner token returned by claim()
+            result: Processing result returned to later redeliveries
+
+        Returns:
+            True if the marker was updated, False if another attempt owns it
+        """
+        marker = {
+            'id': marker_id,
+            'item_type': 'idempotency_marker',
+            'source_file': result.get('file', ''),
+            'status': DONE,
+            'owner': token,
+            'result': json.dumps(result, default=str),
+            'expires_at': int(self.clock()) + self.done_ttl,
+        }
+        if self._conditional(self.table.put_item, Item=marker,
+                             ConditionExpression=Attr('owner').eq(token)):
+            return True
+        logger.warning(f"Idempotency marker {marker_id} was reclaimed by another attempt")
+        return False
+
+    def release(self, marker_id: str, token: str) -> bool:
+        """
+        Drop the marker of a failed attempt so a retry can process the object version
+
+        Args:
+            marker_id: Marker id from marker_id()
+            token: Owner token returned by claim()
+
+        Returns:
+            True if the marker was deleted, False if another attempt owns it
+        """
+        return self._conditional(self.table.delete_item, Key={'id': marker_id},
+                                 ConditionExpression=Attr('owner').eq(token))
+
+    @staticmethod
+    def _conditional(operation: Callable, **kwargs) -> bool:
+        """Run a conditional write, returning False if its condition did not hold"""
+        try:
+            operation(**kwargs)
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            raise
@@ -0,0 +1,114 @@
+"""
+Input Watcher - Detects new or modified Excel files in the input directory once fully written
+
+The directory is polled (no extra dependency, works on every filesystem). A file is
+ready once its size and mtime have not changed for settle_seconds and, for .xlsx/.xlsm,
+the zip central directory at the end of the file is present. Each version of a file is
+reported once; a file that changes again is reported again after it settles.
+"""
+
+import os
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+import logging
+
+from file_manager import FileManager
+from config import WATCH_SETTLE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# (size, mtime_ns) of a file version
+Signature = Tuple[int, int]
+
+_ZIP_FORMATS = frozenset(['.xlsx', '.xlsm'])
+
+# A stable but incomplete workbook is reported after this many settle periods,
+# so a truncated upload fails in the parser instead of waiting forever
+_INCOMPLETE_SETTLE_FACTOR = 10
+
+
+class InputWatcher:
+    """Polls a FileManager's input directory for files that are ready to process"""
+
+    def __init__(self, file_manager: FileManager, settle_seconds: float = WATCH_SETTLE_SECONDS):
+        """
+        Initialize the watcher
+
+        Args:
+            file_manager: File manager whose input directory and formats are watched
+            settle_seconds: Time a file's size and mtime must stay unchanged
+        """
+        self.file_manager = file_manager
+        self.settle_seconds = settle_seconds
+        # path -> (signature, monotonic time the signature was first seen)
+        self._observed: Dict[Path, Tuple[Signature, float]] = {}
+        # path -> signature last reported by poll()
+        self._reported: Dict[Path, Signature] = {}
+
+    def poll(self) -> List[Path]:
+        """
+        Scan the input directory once
+
+        Returns:
+            Files that are new or changed since they were last reported and have
+            finished being written, in name order
+        """
+        now = time.monotonic()
+        current = self._scan()
+
+        # Forget deleted files so a file copied back in is reported again
+        for path in set(self._observed) - set(current):
+            del self._observed[path]
+            self._reported.pop(path, None)
+
+        ready = []
+        for path, signature in sorted(current.items()):
+            observed = self._observed.get(path)
+            if observed is None or observed[0] != signature:
+                self._observed[path] = (signature, now)
+                continue
+            if self._reported.get(path) == signature or now - observed[1] < self.settle_seconds:
+                continue
+            if not self._is_complete(path) and \
+                    now - observed[1] < self.settle_seconds * _INCOMPLETE_SETTLE_FACTOR:
+                logger.debug(f"Waiting for {path.name} to finish writing")
+                continue
+            self._reported[path] = signature
+            ready.append(path)
+
+        return ready
+
+    def _scan(self) -> Dict[Path, Signature]:
+        """Stat every supported file in the input directory"""
+        files = {}
+        try:
+            entries = list(os.scandir(self.file_manager.input_dir))
+        except FileNotFoundError:
+            logger.error(f"Input directory {self.file_manager.input_dir} does not exist")
+            return files
+
+        for entry in entries:
+            path = Path(entry.path)
+            # Skip Office lock files (~$name.xlsx), hidden temporary copies and other shards' files
+            if entry.name.startswith(('~$', '.')) or \
+                    path.suffix.lower() not in self.file_manager.supported_formats or \
+                    not self.file_manager.in_shard(entry.name):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            files[path] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    @staticmethod
+    def _is_complete(path: Path) -> bool:
+        """Check that a zip-based workbook has its central directory (written last)"""
+        if path.suffix.lower() not in _ZIP_FORMATS:
+            return True
+        try:
+            return zipfile.is_zipfile(path)
+        except OSError:
+            return False
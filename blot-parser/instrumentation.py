@@ -0,0 +1,314 @@
+"""
+Instrumentation - Per-stage wall time, throughput, bytes and peak memory for file processing
+
+Stages (download, read, clean, map, persist) may be entered many times per file, e.g.
+once per sheet or chunk; their metrics are accumulated and emitted once per file as a
+structured log line ('log') or a CloudWatch Embedded Metric Format line ('emf').
+The 'off' mode hands out a shared no-op stage so disabled instrumentation costs nothing.
+
+Peak memory per stage is measured with tracemalloc when memory tracing is on: the peak
+of traced allocations while the stage runs, above what was allocated when it started.
+Tracing slows allocation-heavy code, so it is off by default. The process peak RSS is
+reported once per file instead; it never goes down, so it covers every earlier file
+(and earlier invocations in a warm Lambda), not the file being reported.
+"""
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Dict, Any, List, Optional
+import logging
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+METRICS_NAMESPACE = 'BlotParser'
+
+
+def peak_memory_bytes() -> Optional[int]:
+    """
+    Get the peak resident set size over the lifetime of the process
+
+    Returns:
+        Peak RSS in bytes, or None where the platform does not report it
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _MemoryTracker:
+    """
+    Peak traced allocations of each active stage
+
+    Stages may nest and run on several threads, while tracemalloc keeps one peak per
+    process. Whenever a stage starts or ends, the peak since the last reset is credited
+    to every active stage and the peak is reset. Allocations of other threads during a
+    stage count towards it. Tracing runs only while at least one stage is active,
+    unless it was already started elsewhere.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Active stages as [traced bytes at start, peak above that]
+        self._active: List[List[int]] = []
+        self._started = False
+
+    def enter(self) -> List[int]:
+        """Start tracking a stage; returns the handle to pass to exit()"""
+        with self._lock:
+            if not self._active and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+            self._credit_peak()
+            entry = [tracemalloc.get_traced_memory()[0], 0]
+            self._active.append(entry)
+            return entry
+
+    def exit(self, entry: List[int]) -> int:
+        """Stop tracking a stage and return its peak traced allocations in bytes"""
+        with self._lock:
+            self._credit_peak()
+            self._active.remove(entry)
+            if not self._active and self._started:
+                tracemalloc.stop()
+                self._started = False
+            return entry[1]
+
+    def _credit_peak(self) -> None:
+        peak = tracemalloc.get_traced_memory()[1]
+        for entry in self._active:
+            entry[1] = max(entry[1], peak - entry[0])
+        tracemalloc.reset_peak()
+
+
+_MEMORY_TRACKER = _MemoryTracker()
+
+
+class StageMetrics:
+    """Accumulated metrics for one stage; use as a context manager around each unit of work"""
+
+    def __init__(self, name: str, trace_memory: bool = False):
+        """
+        Initialize the stage metrics
+
+        Args:
+            name: Stage name
+            trace_memory: Measure the stage's peak traced allocations with tracemalloc
+        """
+        self.name = name
+        self.trace_memory = trace_memory
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.calls = 0
+        self.peak_memory = None
+        self._start = None
+        self._memory = None
+
+    def __enter__(self) -> 'StageMetrics':
+        if self.trace_memory:
+            self._memory = _MEMORY_TRACKER.enter()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.seconds += time.perf_counter() - self._start
+        self.calls += 1
+        if self._memory is not None:
+            self.peak_memory = max(self.peak_memory or 0, _MEMORY_TRACKER.exit(self._memory))
+            self._memory = None
+
+    def add(self, rows: int = 0, nbytes: int = 0, seconds: float = 0.0) -> None:
+        """
+        Count rows and bytes handled by the stage
+
+        Args:
+            rows: Number of rows processed
+            nbytes: Number of bytes processed
+            seconds: Time spent on the stage outside this context manager (e.g. in a worker)
+        """
+        self.rows += rows
+        self.bytes += nbytes
+        self.seconds += seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'stage': self.name,
+            'duration_ms': round(self.seconds * 1000, 3),
+            'rows': self.rows,
+            'rows_per_second': (round(self.rows / self.seconds, 1)
+                                if self.seconds and self.rows else 0),
+            'bytes': self.bytes,
+            'calls': self.calls,
+            'peak_memory_bytes': self.peak_memory,
+        }
+
+
+class _NullStage:
+    """Stage stand-in used when instrumentation is off"""
+
+    def __enter__(self) -> '_NullStage':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+    def add(self, rows: int = 0, nbytes: int = 0, seconds: float = 0.0) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class Instrumentation:
+    """Collects stage metrics for one file and emits them; the base class discards them"""
+
+    enabled = True
+
+    def __init__(self, trace_memory: bool = False):
+        """
+        Initialize the instrumentation
+
+        Args:
+            trace_memory: Measure each stage's peak memory with tracemalloc
+        """
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def stage(self, name: str) -> StageMetrics:
+        """
+        Get the accumulating metrics for a stage
+
+        Args:
+            name: Stage name, e.g. 'read'
+
+        Returns:
+            StageMetrics to use as a context manager
+        """
+        if name not in self.stages:
+            self.stages[name] = StageMetrics(name, self.trace_memory)
+        return self.stages[name]
+
+    def emit(self, **dimensions) -> None:
+        """
+        Emit accumulated metrics and reset
+
+        Args:
+            **dimensions: Context attached to every stage, e.g. file and vendor
+        """
+        for metrics in self.stages.values():
+            self._emit_stage(metrics, dimensions)
+        self._emit_process(peak_memory_bytes(), dimensions)
+        self.stages = {}
+
+    def _emit_stage(self, metrics: StageMetrics, dimensions: Dict[str, Any]) -> None:
+        pass
+
+    def _emit_process(self, peak_rss: Optional[int], dimensions: Dict[str, Any]) -> None:
+        pass
+
+
+class NullInstrumentation(Instrumentation):
+    """Disabled instrumentation: no timing, no output"""
+
+    enabled = False
+
+    def stage(self, name: str) -> _NullStage:
+        return _NULL_STAGE
+
+    def emit(self, **dimensions) -> None:
+        pass
+
+
+class LogInstrumentation(Instrumentation):
+    """Emits one structured JSON log line per stage"""
+
+    def _emit_stage(self, metrics: StageMetrics, dimensions: Dict[str, Any]) -> None:
+        values = {**dimensions, **metrics.to_dict()}
+        logger.info(f"Stage metrics: {json.dumps(values, default=str)}")
+
+    def _emit_process(self, peak_rss: Optional[int], dimensions: Dict[str, Any]) -> None:
+        values = {**dimensions, 'process_peak_rss_bytes': peak_rss}
+        logger.info(f"Process metrics: {json.dumps(values, default=str)}")
+
+
+class EmfInstrumentation(Instrumentation):
+    """Emits CloudWatch Embedded Metric Format lines on stdout, one per stage"""
+
+    def _emit_stage(self, metrics: StageMetrics, dimensions: Dict[str, Any]) -> None:
+        values = metrics.to_dict()
+        document = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['Stage']],
+                    'Metrics': [
+                        {'Name': 'Duration', 'Unit': 'Milliseconds'},
+                        {'Name': 'Rows', 'Unit': 'Count'},
+                        {'Name': 'RowsPerSecond', 'Unit': 'Count/Second'},
+                        {'Name': 'Bytes', 'Unit': 'Bytes'},
+                    ] + ([{'Name': 'PeakMemory', 'Unit': 'Bytes'}]
+                         if metrics.peak_memory is not None else []),
+                }],
+            },
+            'Stage': metrics.name,
+            'Duration': values['duration_ms'],
+            'Rows': values['rows'],
+            'RowsPerSecond': values['rows_per_second'],
+            'Bytes': values['bytes'],
+            **{key: str(value) for key, value in dimensions.items()},
+        }
+        if metrics.peak_memory is not None:
+            document['PeakMemory'] = metrics.peak_memory
+        self._write(document)
+
+    def _emit_process(self, peak_rss: Optional[int], dimensions: Dict[str, Any]) -> None:
+        if peak_rss is None:
+            return
+        self._write({
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [[]],
+                    'Metrics': [{'Name': 'ProcessPeakRss', 'Unit': 'Bytes'}],
+                }],
+            },
+            'ProcessPeakRss': peak_rss,
+            **{key: str(value) for key, value in dimensions.items()},
+        })
+
+    @staticmethod
+    def _write(document: Dict[str, Any]) -> None:
+        # One write per line so concurrently processed files do not interleave on stdout
+        sys.stdout.write(json.dumps(document) + '\n')
+        sys.stdout.flush()
+
+
+def create_instrumentation(mode: str, trace_memory: bool = False) -> Instrumentation:
+    """
+    Create instrumentation for one file
+
+    Args:
+        mode: 'log' (structured logs), 'emf' (CloudWatch Embedded Metric Format) or 'off'
+        trace_memory: Measure each stage's peak memory with tracemalloc
+
+    Returns:
+        Instrumentation instance
+    """
+    if mode == 'log':
+        return LogInstrumentation(trace_memory)
+    if mode == 'emf':
+        return EmfInstrumentation(trace_memory)
+    if mode == 'off':
+        return NullInstrumentation()
+    raise ValueError(f"Unsupported metrics mode '{mode}', expected 'log', 'emf' or 'off'")
@@ -1,79 +1,159 @@
 """
 AWS Lambda Handler for Blot Parser
 Processes S3 upload events and saves data to DynamoDB
+
+Heavy modules (boto3, pandas and the parsing modules) are imported on first
+use, and the parser with its loaded mappings is reused across warm invocations.
 """
 
 import json
-import boto3
 import os
-import pandas as pd
-from typing import Dict, Any, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Dict, Any, List, Optional
 import logging
-from io import BytesIO
 
-from blot_parser import BlotParser
-from field_mapper import FieldMapper
-from excel_processor import ExcelProcessor
-from vendor_detector import VendorDetector
+from config import DYNAMODB_WRITE_WORKERS, DYNAMODB_WRITE_MODE, S3_SPOOL_THRESHOLD, \
+    S3_EVENT_WORKERS, METRICS_TRACE_MEMORY, SHEET_WORKERS, IDEMPOTENCY_MODE, \
+    IDEMPOTENCY_IN_PROGRESS_TTL, IDEMPOTENCY_CLAIM_MARGIN, PROJECTION_MODE, PROJECTION_FIELDS
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Initialize AWS clients
-s3_client = boto3.client('s3')
-dynamodb = boto3.resource('dynamodb')
-
 # Environment variables
 DYNAMODB_TABLE_NAME = os.environ.get('DYNAMODB_TABLE_NAME', 'blot-parser-data')
 S3_BUCKET = os.environ.get('S3_BUCKET', 'blot-parser-input')
+WRITE_WORKERS = int(os.environ.get('DYNAMODB_WRITE_WORKERS', DYNAMODB_WRITE_WORKERS))
+WRITE_MODE = os.environ.get('DYNAMODB_WRITE_MODE', DYNAMODB_WRITE_MODE)
+METRICS_MODE = os.environ.get('METRICS_MODE', 'emf')
+TRACE_MEMORY = os.environ.get('METRICS_TRACE_MEMORY', METRICS_TRACE_MEMORY) == 'on'
+COMPILED_MAPPINGS = os.environ.get('COMPILED_MAPPINGS', 'mappings/compiled.json')
+EVENT_WORKERS = max(1, int(os.environ.get('S3_EVENT_WORKERS', S3_EVENT_WORKERS)))
+SPOOL_THRESHOLD = int(os.environ.get('S3_SPOOL_THRESHOLD', S3_SPOOL_THRESHOLD))
+SHEET_WORKERS = max(1, int(os.environ.get('SHEET_WORKERS', SHEET_WORKERS)))
+IDEMPOTENCY = os.environ.get('IDEMPOTENCY_MODE', IDEMPOTENCY_MODE)
+IN_PROGRESS_TTL = int(os.environ.get('IDEMPOTENCY_IN_PROGRESS_TTL', IDEMPOTENCY_IN_PROGRESS_TTL))
+CLAIM_MARGIN = int(os.environ.get('IDEMPOTENCY_CLAIM_MARGIN', IDEMPOTENCY_CLAIM_MARGIN))
+PROJECTION = os.environ.get('PROJECTION_MODE', PROJECTION_MODE)
+PROJECTED_FIELDS = [field.strip() for field in
+                    os.environ.get('PROJECTION_FIELDS', ','.join(PROJECTION_FIELDS)).split(',')
+                    if field.strip()]
+
+# AWS clients and parser, created on first use and kept for warm invocations
+_s3_client = None
+_dynamodb = None
+_parser = None
+
+
+def get_s3_client():
+    """Get the shared S3 client, creating it on first use"""
+    global _s3_client
+    if _s3_client is None:
+        import boto3
+        _s3_client = boto3.client('s3')
+    return _s3_client
+
+
+def get_dynamodb_resource():
+    """Get the shared DynamoDB resource, creating it on first use"""
+    global _dynamodb
+    if _dynamodb is None:
+        import boto3
+        _dynamodb = boto3.resource('dynamodb')
+    return _dynamodb
+
+
+def get_parser() -> 'LambdaBlotParser':
+    """Get the parser reused across warm invocations, creating it on first use"""
+    global _parser
+    if _parser is None:
+        _parser = LambdaBlotParser()
+    return _parser
 
 
 class LambdaBlotParser:
     """AWS Lambda version of Blot Parser with S3 and DynamoDB integration"""
-    
+
     def __init__(self):
         """Initialize the Lambda blot parser"""
-        self.field_mapper = FieldMapper()
+        from field_mapper import FieldMapper
+        from excel_processor import ExcelProcessor
+        from vendor_detector import VendorDetector
+        from dynamodb_writer import DynamoDBBatchWriter
+        from record_pipeline import RecordPipeline
+        from s3_downloader import S3Downloader
+        from record_encoder import RecordEncoder
+        from idempotency import IdempotencyGuard
+
+        # Use the registry prebuilt at deploy time when packaged, skipping CSV parsing
+        self.field_mapper = FieldMapper(
+            compiled_registry=COMPILED_MAPPINGS if os.path.exists(COMPILED_MAPPINGS) else None)
         self.excel_processor = ExcelProcessor()
         self.vendor_detector = VendorDetector()
-        self.dynamodb_table = dynamodb.Table(DYNAMODB_TABLE_NAME)
-    
-    def process_s3_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        self.dynamodb_table = get_dynamodb_resource().Table(DYNAMODB_TABLE_NAME)
+        self.dynamodb_writer = DynamoDBBatchWriter(self.dynamodb_table, max_workers=WRITE_WORKERS)
+        # Records are encoded for DynamoDB: Decimal numbers, None for missing values.
+        # Sheet workers are threads: Lambda has no /dev/shm for process pools
+        self.record_pipeline = RecordPipeline(self.excel_processor, self.field_mapper,
+                                              encoder=RecordEncoder('dynamodb'),
+                                              sheet_workers=SHEET_WORKERS, sheet_executor='thread')
+        self.s3_downloader = S3Downloader(get_s3_client(), spool_threshold=SPOOL_THRESHOLD)
+        # Duplicate deliveries of an object version are answered from its marker
+        self.idempotency_guard = None
+        if IDEMPOTENCY == 'on':
+            self.idempotency_guard = IdempotencyGuard(self.dynamodb_table,
+                                                      in_progress_ttl=IN_PROGRESS_TTL,
+                                                      claim_margin=CLAIM_MARGIN)
+
+    def process_s3_event(self, event: Dict[str, Any], context=None) -> Dict[str, Any]:
         """
         Process S3 upload event
-        
+
         Args:
             event: S3 event from Lambda
-            
+            context: Lambda context; its remaining time bounds the idempotency claims
+
         Returns:
             Processing result
+
+        Raises:
+            DuplicateInProgressError: If a record's object version is being processed by
+                another attempt, so Lambda (or SQS) redelivers the event later
         """
+        from idempotency import DuplicateInProgressError, IN_PROGRESS
         try:
+            # Claims of this invocation expire shortly after it times out
+            deadline = None
+            if context is not None:
+                deadline = time.time() + context.get_remaining_time_in_millis() / 1000
+
             # Extract S3 event details
-            records = event.get('Records', [])
-            results = []
-            
-            for record in records:
-                try:
-                    # Get S3 object details
-                    bucket = record['s3']['bucket']['name']
-                    key = record['s3']['object']['key']
-                    
-                    logger.info(f"Processing S3 object: s3://{bucket}/{key}")
-                    
-                    # Process the file
-                    result = self.process_s3_file(bucket, key)
-                    results.append(result)
-                    
-                except Exception as e:
-                    logger.error(f"Error processing S3 record: {str(e)}")
-                    results.append({
-                        'status': 'error',
-                        'error': str(e),
-                        'record': record
-                    })
-            
+            records = self._expand_records(event.get('Records', []))
+            workers = min(EVENT_WORKERS, len(records))
+            process_record = partial(self._process_record, deadline=deadline)
+
+            # Files mostly wait on S3 and DynamoDB, so records are processed on a bounded
+            # thread pool
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(process_record, records))
+            else:
+                results = [process_record(record) for record in records]
+
+            # Warm invocations reuse vendor layouts detected by earlier ones
+            logger.info(f"Layout cache: {self.excel_processor.layout_cache.stats()}")
+
+            # Acknowledging a file another attempt is still processing would lose it if
+            # that attempt fails; the other records are answered from their markers on retry
+            in_progress = [result['marker_id'] for result in results
+                           if result.get('status') == 'duplicate'
+                           and result.get('marker_status') == IN_PROGRESS]
+            if in_progress:
+                raise DuplicateInProgressError(in_progress)
+
             return {
                 'statusCode': 200,
                 'body': json.dumps({
@@ -81,7 +161,10 @@ class LambdaBlotParser:
                     'results': results
                 })
             }
-            
+
+        except DuplicateInProgressError as e:
+            logger.warning(f"Requesting redelivery: {str(e)}")
+            raise
         except Exception as e:
             logger.error(f"Error processing S3 event: {str(e)}")
             return {
@@ -90,58 +173,228 @@ class LambdaBlotParser:
                     'error': str(e)
                 })
             }
-    
-    def process_s3_file(self, bucket: str, key: str) -> Dict[str, Any]:
+
+    def _process_record(self, record: Dict[str, Any],
+                        deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Process one S3 event record, capturing its errors in the result
+
+        Args:
+            record: S3 event record
+            deadline: Epoch time at which the invocation times out, or None
+
+        Returns:
+            Processing result for the record
+        """
+        try:
+            # Get S3 object details
+            bucket = record['s3']['bucket']['name']
+            key = record['s3']['object']['key']
+            etag = record['s3']['object'].get('eTag')
+            version_id = record['s3']['object'].get('versionId')
+
+            logger.info(f"Processing S3 object: s3://{bucket}/{key}")
+
+            # Process the file
+            return self.process_s3_file(bucket, key, etag, version_id, deadline)
+
+        except Exception as e:
+            logger.error(f"Error processing S3 record: {str(e)}")
+            return {
+                'status': 'error',
+                'error': str(e),
+                'record': record
+            }
+
+    @staticmethod
+    def _expand_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Process Excel file from S3
-        
+        Flatten SQS-wrapped S3 notifications into plain S3 event records
+
+        Args:
+            records: Event records (S3 records, or SQS messages whose body is an S3 event)
+
+        Returns:
+            S3 event records
+        """
+        expanded = []
+        for record in records:
+            if 's3' not in record and isinstance(record.get('body'), str):
+                try:
+                    body = json.loads(record['body'])
+                except ValueError:
+                    body = None
+                if isinstance(body, dict) and 'Records' in body:
+                    expanded.extend(body['Records'])
+                    continue
+            expanded.append(record)
+        return expanded
+
+    def process_s3_file(self, bucket: str, key: str, etag: Optional[str] = None,
+                        version_id: Optional[str] = None,
+                        deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Process Excel file from S3 unless this object version was already processed
+
         Args:
             bucket: S3 bucket name
             key: S3 object key
-            
+            etag: Object ETag from the event (looked up with HeadObject if missing)
+            version_id: Object version id from the event
+            deadline: Epoch time at which the invocation times out; the claim on the object
+                version expires IDEMPOTENCY_CLAIM_MARGIN seconds later
+
         Returns:
-            Processing result
+            Processing result, or the earlier result with status 'duplicate'
+        """
+        if self.idempotency_guard is None:
+            return self._process_s3_file(bucket, key, etag, version_id)
+
+        filename = os.path.basename(key)
+        try:
+            if not etag:
+                head = self.s3_downloader.client.head_object(Bucket=bucket, Key=key)
+                etag, version_id = head.get('ETag', ''), head.get('VersionId')
+            marker_id = self.idempotency_guard.marker_id(bucket, key, etag, version_id)
+            claim = self.idempotency_guard.claim(marker_id, filename, deadline)
+        except Exception as e:
+            # Without the guard the file is processed as before: at least once
+            logger.warning(f"Idempotency check failed for {key}, processing anyway: {str(e)}")
+            return self._process_s3_file(bucket, key, etag, version_id)
+
+        if not claim['claimed']:
+            logger.info(f"Skipping duplicate delivery of s3://{bucket}/{key} ({claim['status']})")
+            return {
+                'status': 'duplicate',
+                'file': filename,
+                'marker_id': marker_id,
+                'marker_status': claim['status'],
+                'original_result': claim['result']
+            }
+
+        # The download reads the marker's version and ETag, never newer content under the key
+        result = self._process_s3_file(bucket, key, etag, version_id)
+        try:
+            # Files with failed rows are released so a redelivery retries them
+            completed = result['status'] in ('success', 'no_mapped_columns')
+            if completed and not result.get('records_failed'):
+                self.idempotency_guard.complete(marker_id, claim['token'], result)
+            else:
+                self.idempotency_guard.release(marker_id, claim['token'])
+        except Exception as e:
+            logger.warning(f"Failed to update idempotency marker {marker_id}: {str(e)}")
+        return result
+
+    def _process_s3_file(self, bucket: str, key: str, etag: Optional[str] = None,
+                         version_id: Optional[str] = None) -> Dict[str, Any]:
         """
+        Download, parse and save one Excel file from S3
+
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+            etag: ETag the object must still have (from the event), or None
+            version_id: Object version to read (from the event), or None for the latest
+
+        Returns:
+            Processing result; status 'superseded' if the key was overwritten after the event,
+            'no_mapped_columns' if the projection kept no column of the workbook
+        """
+        from excel_processor import NoProjectedColumnsError
+        from s3_downloader import StaleObjectError
         try:
-            # Download file from S3
-            response = s3_client.get_object(Bucket=bucket, Key=key)
-            file_content = response['Body'].read()
-            
+            from instrumentation import create_instrumentation
+            metrics = create_instrumentation(METRICS_MODE, TRACE_MEMORY)
+
+            # Download file from S3; large objects are spooled to /tmp
+            with metrics.stage('download') as stage:
+                downloaded = self.s3_downloader.download(bucket, key, version_id, etag)
+                stage.add(nbytes=downloaded.size)
+
             # Extract vendor from filename
-            filename = key.split('/')[-1]
+            filename = downloaded.filename
             vendor = self.vendor_detector.extract_vendor_from_filename(filename)
-            
-            # Process Excel file
-            excel_data = self.excel_processor.read_excel_file_from_bytes(file_content, filename)
-            
+
+            # In 'mapped' projection mode only the vendor's mapped columns are read
+            column_filter = None
+            if PROJECTION == 'mapped':
+                column_filter = self.field_mapper.column_filter(vendor, PROJECTED_FIELDS)
+
+            # Process Excel file, then release the downloaded bytes or spooled file
+            with downloaded, metrics.stage('read') as stage:
+                if downloaded.path is not None:
+                    excel_data = self.excel_processor.read_excel_file(downloaded.path, vendor,
+                                                                      column_filter)
+                else:
+                    excel_data = self.excel_processor.read_excel_file_from_bytes(
+                        downloaded.content, filename, vendor, column_filter)
+                stage.add(rows=sum(len(df) for df in excel_data.values()), nbytes=downloaded.size)
+
             if not excel_data:
+                metrics.emit(file=filename, vendor=vendor)
                 return {
                     'status': 'error',
                     'message': f'Failed to read Excel file: {filename}',
                     'file': filename
                 }
-            
-            # Process each sheet
-            all_records = []
-            for sheet_name, df in excel_data.items():
-                sheet_data = self.excel_processor.process_sheet(sheet_name, df, filename)
-                all_records.extend(sheet_data['data'])
-            
-            # Map vendor-specific fields to generic fields
-            logger.info(f"Mapping {len(all_records)} records from {vendor} to system format")
-            mapped_records = self.field_mapper.map_records(all_records, vendor)
-            
-            # Save to DynamoDB
-            saved_count = self.save_to_dynamodb(mapped_records, filename, vendor)
-            
-            return {
+
+            # In upsert mode only rows whose content changed are written
+            upserter = None
+            if WRITE_MODE == 'upsert':
+                from dynamodb_upsert import DynamoDBUpserter
+                upserter = DynamoDBUpserter(self.dynamodb_writer, f"{vendor}_{filename}")
+                upserter.begin()
+
+            # Encode and write records into DynamoDB chunk by chunk (sheets are read whole)
+            write_result = {'saved': 0, 'failed': 0, 'unchanged': 0}
+
+            def save_chunk(mapped_records: List[Dict[str, Any]]) -> None:
+                start_index = sum(write_result.values())
+                chunk_result = self.save_to_dynamodb(mapped_records, filename, vendor, start_index,
+                                                     upserter)
+                for name in write_result:
+                    write_result[name] += chunk_result.get(name, 0)
+
+            summary = self.record_pipeline.run(excel_data, filename, vendor, save_chunk, metrics)
+
+            result = {
                 'status': 'success',
                 'file': filename,
                 'vendor': vendor,
-                'records_processed': len(mapped_records),
-                'records_saved': saved_count
+                'records_processed': summary['total_records'],
+                'records_saved': write_result['saved'],
+                'records_failed': write_result['failed']
+            }
+
+            if upserter is not None:
+                with metrics.stage('persist'):
+                    delete_result = upserter.finish(summary['total_records'], filename)
+                result['records_unchanged'] = write_result['unchanged']
+                result['records_deleted'] = delete_result['deleted']
+                result['records_failed'] += delete_result['failed']
+
+            metrics.emit(file=filename, vendor=vendor)
+            return result
+
+        except NoProjectedColumnsError as e:
+            # Nothing to save, which is a result like any other and not a failure
+            logger.info(f"Skipping S3 file with no mapped columns: {str(e)}")
+            return {
+                'status': 'no_mapped_columns',
+                'message': str(e),
+                'file': os.path.basename(key),
+                'records_processed': 0,
+                'records_saved': 0,
+                'records_failed': 0
+            }
+        except StaleObjectError as e:
+            # The newer upload has its own event, which processes it
+            logger.info(f"Skipping superseded S3 object: {str(e)}")
+            return {
+                'status': 'superseded',
+                'message': str(e),
+                'file': os.path.basename(key)
             }
-            
         except Exception as e:
             logger.error(f"Error processing S3 file {key}: {str(e)}")
             return {
@@ -149,58 +402,62 @@ class LambdaBlotParser:
                 'message': str(e),
                 'file': key
             }
-    
-    def save_to_dynamodb(self, records: List[Dict[str, Any]], filename: str, vendor: str) -> int:
+
+    def save_to_dynamodb(self, records: List[Dict[str, Any]], filename: str, vendor: str,
+                         start_index: int = 0, upserter=None) -> Dict[str, int]:
         """
-        Save records to DynamoDB
-        
+        Save records to DynamoDB using batched writes
+
         Args:
             records: List of records to save
             filename: Source filename
             vendor: Vendor name
-            
+            start_index: Position of the first record within the file, used for item ids
+            upserter: DynamoDBUpserter for upsert mode; unchanged records are then skipped
+
         Returns:
-            Number of records saved
+            Dictionary with 'saved' and 'failed' record counts, plus 'unchanged' in upsert mode
         """
-        saved_count = 0
-        
-        for i, record in enumerate(records):
-            try:
-                # Add metadata
-                record['id'] = f"{vendor}_{filename}_{i}"
-                record['source_file'] = filename
-                record['vendor'] = vendor
-                record['processed_at'] = str(pd.Timestamp.now())
-                
-                # Save to DynamoDB
-                self.dynamodb_table.put_item(Item=record)
-                saved_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error saving record {i} to DynamoDB: {str(e)}")
-        
-        logger.info(f"Saved {saved_count}/{len(records)} records to DynamoDB")
-        return saved_count
+        processed_at = str(datetime.now())
+
+        for i, record in enumerate(records, start_index):
+            # Add metadata
+            record['id'] = f"{vendor}_{filename}_{i}"
+            record['source_file'] = filename
+            record['vendor'] = vendor
+            record['processed_at'] = processed_at
+
+        if upserter is not None:
+            write_result = upserter.write_items(records, start_index)
+            logger.info(f"Saved {write_result['saved']}/{len(records)} records to DynamoDB "
+                        f"({write_result['unchanged']} unchanged, {write_result['failed']} failed)")
+            return write_result
+
+        write_result = self.dynamodb_writer.write_items(records)
+
+        logger.info(f"Saved {write_result['saved']}/{len(records)} records to DynamoDB "
+                    f"({write_result['failed']} failed)")
+        return write_result
 
 
 def lambda_handler(event, context):
     """
     AWS Lambda handler function
-    
+
     Args:
         event: Lambda event (S3 event)
         context: Lambda context
-        
+
     Returns:
         Lambda response
     """
-    logger.info(f"Received event: {json.dumps(event)}")
-    
-    # Initialize parser
-    parser = LambdaBlotParser()
-    
+    logger.info(f"Received event with {len(event.get('Records', []))} records")
+
+    # Reuse the parser (and its loaded mappings) from earlier warm invocations
+    parser = get_parser()
+
     # Process S3 event
-    result = parser.process_s3_event(event)
-    
-    logger.info(f"Processing result: {json.dumps(result)}")
+    result = parser.process_s3_event(event, context)
+
+    logger.info(f"Processing result: statusCode={result['statusCode']} body={result['body']}")
     return result
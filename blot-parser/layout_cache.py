@@ -0,0 +1,197 @@
+"""
+Layout Cache - Remembers vendor sheet layouts so repeat files skip header detection and mapping
+
+Vendors send the same layout day after day. The cache keeps, per vendor:
+
+    header layouts   the detected header row offset and a signature (hash) of the
+                     resulting header, so a later file is read at that offset directly
+                     and only checked against the signature
+    column plans     for a header signature and mapping/schema version, the system field
+                     and field type of every column position, so sheets are mapped and
+                     typed by position without resolving each column name again
+
+Entries are bounded (least recently used are evicted) and shared by threads. Hit and
+miss counters are available from stats().
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterable, Tuple, Callable
+import logging
+
+from config import LAYOUT_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def header_signature(header: Iterable[Any]) -> str:
+    """
+    Hash a header row independently of cell types
+
+    Args:
+        header: Header cell values or column names
+
+    Returns:
+        32-character hex digest
+    """
+    text = '\x1f'.join('' if value is None else str(value) for value in header)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class HeaderLayout:
+    """Where a vendor's header row was found and what it contained"""
+
+    def __init__(self, header_row: int, signature: str):
+        """
+        Initialize the header layout
+
+        Args:
+            header_row: Header offset: the pandas.read_excel header argument in pandas
+                mode, the index among the leading non-blank rows in streaming mode
+            signature: header_signature() of the resulting header (the first sheet's
+                columns in pandas mode)
+        """
+        self.header_row = header_row
+        self.signature = signature
+
+
+class ColumnPlan:
+    """System field and field type of each column position of one sheet layout"""
+
+    def __init__(self, columns: List[Any], types: List[Optional[str]]):
+        """
+        Initialize the column plan
+
+        Args:
+            columns: Column name after mapping for each source position (system field,
+                or the source column name when unmapped)
+            types: Field type (see FieldSchema) for each position, None when untyped
+        """
+        self.columns = columns
+        self.types = types
+
+    def typed_positions(self) -> List[Tuple[int, str]]:
+        """Positions with a field type, as (source index, field type) pairs"""
+        return [(index, field_type) for index, field_type in enumerate(self.types) if field_type]
+
+
+class LayoutCache:
+    """Bounded, thread-safe cache of header layouts and column plans with hit/miss counters"""
+
+    def __init__(self, max_entries: int = LAYOUT_CACHE_SIZE):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Most entries kept per kind (header layouts, column plans)
+        """
+        self.max_entries = max(1, max_entries)
+        self._headers = OrderedDict()
+        self._plans = OrderedDict()
+        self._counters = {'header_hits': 0, 'header_misses': 0, 'plan_hits': 0, 'plan_misses': 0}
+        self._lock = threading.Lock()
+
+    def get_header(self, layout_key: str) -> Optional[HeaderLayout]:
+        """
+        Get the most recent header layout seen for a layout key
+
+        Args:
+            layout_key: Vendor name, qualified by the reader mode (e.g. "bloomberg:pandas")
+
+        Returns:
+            HeaderLayout, or None if the layout key has no cached layout
+        """
+        with self._lock:
+            layouts = self._headers.get(layout_key)
+            if layouts:
+                self._headers.move_to_end(layout_key)
+                return next(reversed(layouts.values()))
+        return None
+
+    def known_signatures(self, layout_key: str) -> frozenset:
+        """
+        Get every cached header signature of a layout key
+
+        Args:
+            layout_key: Vendor name, qualified by the reader mode (e.g. "bloomberg:pandas")
+
+        Returns:
+            Set of header signatures
+        """
+        with self._lock:
+            return frozenset(self._headers.get(layout_key, ()))
+
+    def put_header(self, layout_key: str, layout: HeaderLayout) -> None:
+        """
+        Remember a detected header layout as the layout key's most recent one
+
+        Args:
+            layout_key: Vendor name, qualified by the reader mode (e.g. "bloomberg:pandas")
+            layout: Detected header layout
+        """
+        with self._lock:
+            layouts = self._headers.setdefault(layout_key, OrderedDict())
+            layouts.pop(layout.signature, None)
+            layouts[layout.signature] = layout
+            while len(layouts) > self.max_entries:
+                layouts.popitem(last=False)
+            self._headers.move_to_end(layout_key)
+            while len(self._headers) > self.max_entries:
+                self._headers.popitem(last=False)
+
+    def record_header(self, hit: bool) -> None:
+        """
+        Count one header detection that was skipped (hit) or performed (miss)
+
+        Args:
+            hit: Whether a cached layout was used
+        """
+        with self._lock:
+            self._counters['header_hits' if hit else 'header_misses'] += 1
+
+    def column_plan(self, key: Tuple[str, ...], build: Callable[[], ColumnPlan]) -> ColumnPlan:
+        """
+        Get the column plan for a layout, building it on a miss
+
+        Args:
+            key: Vendor, mapping and schema fingerprints and header signature
+            build: Builds the plan when it is not cached
+
+        Returns:
+            ColumnPlan
+        """
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self._counters['plan_hits'] += 1
+                return plan
+            self._counters['plan_misses'] += 1
+
+        plan = build()
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the hit and miss counters
+
+        Returns:
+            Dictionary with header_hits, header_misses, plan_hits and plan_misses
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Worker processes receive a copy of the cache without the lock
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
@@ -0,0 +1,250 @@
+"""
+Mapping Registry - Compiled vendor mappings with a normalized header index
+
+Every mapping CSV is parsed once into a CompiledMapping holding the exact
+vendor_field -> system_field dictionary plus an index keyed by normalized header
+(lowercase, whitespace and punctuation removed), so "Qty_M ", "Qty (M)" and "qty m"
+all resolve in O(1). Resolved headers are memoized in a bounded LRU, so a long-running
+process that sees many distinct headers keeps a fixed amount of memory. Files are
+reloaded only when their mtime changes. The registry can be saved to JSON and loaded
+prebuilt, e.g. in the Lambda package, to skip CSV parsing at cold start.
+
+Usage:
+    python mapping_registry.py mappings mappings/compiled.json
+"""
+
+import csv
+import hashlib
+import json
+import re
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+import logging
+
+from config import MAPPING_LOOKUP_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+_NON_ALPHANUMERIC = re.compile(r'[\W_]+')
+
+
+def normalize_header(header: Any) -> str:
+    """
+    Normalize a column header for matching: case, whitespace and punctuation are ignored
+
+    Args:
+        header: Column header
+
+    Returns:
+        Normalized header key
+    """
+    return _NON_ALPHANUMERIC.sub('', str(header).lower())
+
+
+class CompiledMapping:
+    """One vendor's mapping with exact and normalized header indexes"""
+
+    def __init__(self, vendor: str, exact: Dict[str, str], fingerprint: str,
+                 mtime_ns: Optional[int] = None, source: str = '',
+                 max_lookups: int = MAPPING_LOOKUP_CACHE_SIZE):
+        """
+        Initialize the compiled mapping
+
+        Args:
+            vendor: Vendor name
+            exact: vendor_field -> system_field as written in the CSV
+            fingerprint: SHA-256 of the CSV contents
+            mtime_ns: CSV modification time when compiled (None if loaded prebuilt)
+            source: Path of the CSV file
+            max_lookups: Most resolved headers memoized, least recently used evicted first
+        """
+        self.vendor = vendor
+        self.exact = exact
+        self.fingerprint = fingerprint
+        self.mtime_ns = mtime_ns
+        self.source = source
+        self.normalized = {}
+        self.max_lookups = max(1, max_lookups)
+        self._lookups = OrderedDict()
+        self._lock = threading.Lock()
+
+        for vendor_field, system_field in exact.items():
+            key = normalize_header(vendor_field)
+            if key in self.normalized and self.normalized[key] != system_field:
+                logger.warning(f"Mapping for '{vendor}': '{vendor_field}' normalizes to the same "
+                               f"header as an earlier field; keeping '{self.normalized[key]}'")
+                continue
+            self.normalized.setdefault(key, system_field)
+
+    def lookup(self, header: Any) -> Optional[str]:
+        """
+        Find the system field for a column header
+
+        Exact matches win; otherwise the normalized header is looked up.
+
+        Args:
+            header: Column header as read from the file
+
+        Returns:
+            System field name, or None if the header is not mapped
+        """
+        try:
+            with self._lock:
+                system_field = self._lookups[header]
+                self._lookups.move_to_end(header)
+                return system_field
+        except KeyError:
+            pass
+        except TypeError:
+            return None
+
+        system_field = self.exact.get(header) if isinstance(header, str) else None
+        if system_field is None:
+            system_field = self.normalized.get(normalize_header(header))
+
+        with self._lock:
+            self._lookups[header] = system_field
+            while len(self._lookups) > self.max_lookups:
+                self._lookups.popitem(last=False)
+        return system_field
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sheet worker processes receive the mapping without this process's lock
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'vendor': self.vendor, 'exact': self.exact, 'fingerprint': self.fingerprint,
+                'source': self.source}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CompiledMapping':
+        return cls(data['vendor'], data['exact'], data['fingerprint'],
+                   source=data.get('source', ''))
+
+
+class MappingRegistry:
+    """Loads and caches compiled mappings for every vendor CSV in a directory"""
+
+    def __init__(self, mappings_dir: str = "mappings"):
+        """
+        Initialize the registry
+
+        Args:
+            mappings_dir: Directory containing CSV mapping files
+        """
+        self.mappings_dir = Path(mappings_dir)
+        self.compiled = {}
+
+    def get(self, vendor: str) -> Optional[CompiledMapping]:
+        """
+        Get a vendor's compiled mapping, compiling or recompiling the CSV when needed
+
+        Prebuilt entries (loaded with load) are trusted and not checked against the CSV.
+
+        Args:
+            vendor: Vendor name (e.g., 'bloomberg')
+
+        Returns:
+            CompiledMapping, or None if there is no usable mapping for the vendor
+        """
+        compiled = self.compiled.get(vendor)
+        if compiled is not None and compiled.mtime_ns is None:
+            return compiled
+
+        csv_file = self.mappings_dir / f"{vendor}.csv"
+        try:
+            mtime_ns = csv_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            logger.error(f"Mapping file not found: {csv_file}")
+            self.compiled.pop(vendor, None)
+            return None
+
+        if compiled is None or compiled.mtime_ns != mtime_ns:
+            compiled = self._compile(vendor, csv_file, mtime_ns)
+            if compiled is None:
+                self.compiled.pop(vendor, None)
+                return None
+            self.compiled[vendor] = compiled
+
+        return compiled
+
+    def load_all(self) -> 'MappingRegistry':
+        """
+        Compile every vendor mapping CSV in the mappings directory
+
+        CSVs without a vendor_field column (e.g. generic.csv, the system field list) are skipped.
+
+        Returns:
+            The registry, for chaining
+        """
+        for csv_file in sorted(self.mappings_dir.glob('*.csv')):
+            with open(csv_file, 'r', encoding='utf-8') as f:
+                if 'vendor_field' not in (csv.DictReader(f).fieldnames or []):
+                    continue
+            self.get(csv_file.stem)
+        return self
+
+    def _compile(self, vendor: str, csv_file: Path, mtime_ns: int) -> Optional[CompiledMapping]:
+        """Parse a mapping CSV into a CompiledMapping"""
+        try:
+            content = csv_file.read_bytes()
+            reader = csv.DictReader(content.decode('utf-8').splitlines())
+            exact = {row['vendor_field']: row['system_field'] for row in reader}
+        except Exception as e:
+            logger.error(f"Error loading mappings from {csv_file}: {e}")
+            return None
+
+        logger.info(f"Loaded mappings for vendor '{vendor}' from {csv_file.name}")
+        return CompiledMapping(vendor, exact, hashlib.sha256(content).hexdigest(), mtime_ns,
+                               str(csv_file))
+
+    def save(self, path: str) -> None:
+        """
+        Save the compiled mappings as JSON
+
+        Args:
+            path: Output JSON file
+        """
+        data = {'mappings': [compiled.to_dict() for compiled in self.compiled.values()]}
+        Path(path).write_text(json.dumps(data, indent=2, sort_keys=True))
+
+    def load(self, path: str) -> 'MappingRegistry':
+        """
+        Load prebuilt compiled mappings saved with save
+
+        Args:
+            path: JSON file written by save
+
+        Returns:
+            The registry, for chaining
+        """
+        data = json.loads(Path(path).read_text())
+        for entry in data['mappings']:
+            self.compiled[entry['vendor']] = CompiledMapping.from_dict(entry)
+        logger.info(f"Loaded {len(data['mappings'])} prebuilt mappings from {path}")
+        return self
+
+
+def main() -> int:
+    """Build a prebuilt registry: mapping_registry.py <mappings_dir> <output.json>"""
+    if len(sys.argv) != 3:
+        print(__doc__)
+        return 1
+
+    registry = MappingRegistry(sys.argv[1]).load_all()
+    registry.save(sys.argv[2])
+    print(f"Compiled {len(registry.compiled)} vendor mappings to {sys.argv[2]}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""
+Output Writers - Incremental writers for mapped records in JSON, NDJSON and Parquet formats
+
+JSON and NDJSON records are serialized to bytes by JsonSerializer (orjson when available)
+and written through a buffered binary stream, one write per chunk.
+
+Every writer writes to a temporary file in the output directory and moves it over the
+output file only when the with block exits cleanly; after an exception the temporary
+file is deleted, so a failed run leaves the previous output in place.
+"""
+
+import glob
+import gzip
+import io
+import os
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+import logging
+
+from record_encoder import JsonSerializer
+from config import WRITE_BUFFER_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Output format -> file suffix appended to "<input file name>_data"
+OUTPUT_SUFFIXES = {
+    'json': '.json',
+    'ndjson': '.ndjson',
+    'ndjson.gz': '.ndjson.gz',
+    'parquet': '.parquet',
+}
+
+
+class _TempOutput:
+    """Temporary file next to an output file, moved over it only when writing succeeds"""
+
+    def __init__(self, output_file: Path):
+        """
+        Initialize the temporary file name
+
+        Args:
+            output_file: Path of the output file it will replace
+        """
+        self.output_file = output_file
+        # Same directory, so os.replace is an atomic rename on one filesystem
+        self.path = output_file.with_name(f".{output_file.name}.{uuid.uuid4().hex[:12]}.tmp")
+
+    def publish(self) -> None:
+        """Replace the output file with the finished temporary file"""
+        os.replace(self.path, self.output_file)
+
+    def discard(self) -> None:
+        """Delete the temporary file"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self, file, succeeded: bool, trailer: bytes = b'') -> None:
+        """
+        Close the temporary file, then publish it or, after a failure, delete it
+
+        Args:
+            file: Open file object writing the temporary file
+            succeeded: Whether every record was written
+            trailer: Bytes that complete the file, written only on success
+        """
+        try:
+            try:
+                if succeeded and trailer:
+                    file.write(trailer)
+            finally:
+                file.close()
+        except BaseException:
+            self.discard()
+            raise
+
+        if succeeded:
+            self.publish()
+        else:
+            self.discard()
+
+
+class JsonArrayWriter:
+    """Writes records incrementally as an indented JSON array in json.dump(indent=2) layout"""
+
+    def __init__(self, output_file: Path, serializer: Optional[JsonSerializer] = None):
+        """
+        Initialize the writer
+
+        Args:
+            output_file: Path of the JSON file to create
+            serializer: JSON serializer (default: the configured backend)
+        """
+        self.output_file = output_file
+        self.serializer = serializer or JsonSerializer()
+        self.record_count = 0
+        self._file = None
+        self._temp = None
+
+    def __enter__(self) -> 'JsonArrayWriter':
+        self._temp = _TempOutput(self.output_file)
+        self._file = open(self._temp.path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        self._file.write(b'[')
+        return self
+
+    def write_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append records to the array
+
+        Args:
+            records: Records to write
+        """
+        parts = []
+        for record in records:
+            parts.append(b',\n  ' if self.record_count else b'\n  ')
+            parts.append(self.serializer.dumps(record, indent=True).replace(b'\n', b'\n  '))
+            self.record_count += 1
+        self._file.write(b''.join(parts))
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # A truncated array would still parse, so it is never closed over the old output
+        self._temp.close(self._file, exc_type is None, b'\n]' if self.record_count else b']')
+
+
+class NdjsonWriter:
+    """Writes one compact JSON object per line, optionally gzip-compressed"""
+
+    def __init__(self, output_file: Path, compress: bool = False,
+                 serializer: Optional[JsonSerializer] = None):
+        """
+        Initialize the writer
+
+        Args:
+            output_file: Path of the NDJSON file to create
+            compress: Write gzip-compressed output
+            serializer: JSON serializer (default: the configured backend)
+        """
+        self.output_file = output_file
+        self.compress = compress
+        self.serializer = serializer or JsonSerializer()
+        self.record_count = 0
+        self._file = None
+        self._temp = None
+
+    def __enter__(self) -> 'NdjsonWriter':
+        self._temp = _TempOutput(self.output_file)
+        if self.compress:
+            # The gzip header names the output file, not the temporary file
+            raw = open(self._temp.path, 'wb')
+            gzip_file = _ClosingGzipFile(filename=str(self.output_file), mode='wb',
+                                         compresslevel=6, fileobj=raw)
+            self._file = io.BufferedWriter(gzip_file, buffer_size=WRITE_BUFFER_SIZE)
+        else:
+            self._file = open(self._temp.path, 'wb', buffering=WRITE_BUFFER_SIZE)
+        return self
+
+    def write_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append records, one line each
+
+        Args:
+            records: Records to write
+        """
+        if not records:
+            return
+
+        lines = [self.serializer.dumps(record) for record in records]
+        self._file.write(b'\n'.join(lines) + b'\n')
+        self.record_count += len(records)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._temp.close(self._file, exc_type is None)
+
+
+class _ClosingGzipFile(gzip.GzipFile):
+    """GzipFile that also closes the file object it writes to"""
+
+    def close(self) -> None:
+        fileobj = self.fileobj
+        try:
+            super().close()
+        finally:
+            if fileobj is not None:
+                fileobj.close()
+
+
+class ParquetWriter:
+    """
+    Writes records as Parquet row groups with typed columns (requires pyarrow)
+
+    The schema is taken from the first chunk. Empty strings are kept in string
+    columns, as in JSON and NDJSON output; in a column whose other values are numbers
+    or dates they are stored as null so the column keeps its type, and columns with
+    otherwise mixed value types are stored as strings. If a later chunk adds columns
+    or cannot be cast to the schema (e.g. another sheet with a different layout), the
+    writer rolls over to a new part file "<name>.<n>.parquet". The parts are published
+    together when the writer exits cleanly, and parts left by an earlier run that rolled
+    over more often are deleted.
+    """
+
+    def __init__(self, output_file: Path):
+        """
+        Initialize the writer
+
+        Args:
+            output_file: Path of the first Parquet file to create
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("The 'parquet' output format requires pyarrow (pip install pyarrow)")
+
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.output_file = output_file
+        self.output_files = []
+        self.record_count = 0
+        self._writer = None
+        self._schema = None
+        self._temps = []
+
+    def __enter__(self) -> 'ParquetWriter':
+        return self
+
+    def write_records(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Append records as a row group
+
+        Args:
+            records: Records to write
+        """
+        if not records:
+            return
+
+        table = self._to_table(records)
+
+        if self._writer is not None:
+            conformed = self._conform(table)
+            if conformed is None:
+                self._writer.close()
+                self._writer = None
+            else:
+                table = conformed
+
+        if self._writer is None:
+            self._open_part(table.schema)
+
+        self._writer.write_table(table)
+        self.record_count += len(records)
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        succeeded = exc_type is None
+        try:
+            if succeeded and not self._temps:
+                # No records: still create the file, so the run counts as saved
+                self._open_part(self._pa.schema([]))
+            if self._writer is not None:
+                self._writer.close()
+        except BaseException:
+            succeeded = False
+            raise
+        finally:
+            for temp in self._temps:
+                if succeeded:
+                    temp.publish()
+                else:
+                    temp.discard()
+            if succeeded:
+                self._remove_stale_parts()
+
+    def _remove_stale_parts(self) -> None:
+        """Delete part files beyond the ones just published, left by an earlier run"""
+        stem = self.output_file.name[:-len('.parquet')]
+        for path in self.output_file.parent.glob(f"{glob.escape(stem)}.*.parquet"):
+            part = path.name[len(stem) + 1:-len('.parquet')]
+            if part.isdigit() and int(part) >= len(self.output_files):
+                logger.info(f"Removing stale Parquet part {path.name}")
+                path.unlink()
+
+    def _open_part(self, schema) -> None:
+        """Start a new part file with the given schema"""
+        part = len(self.output_files)
+        if part == 0:
+            part_file = self.output_file
+        else:
+            stem = self.output_file.name[:-len('.parquet')]
+            part_file = self.output_file.with_name(f"{stem}.{part}.parquet")
+            logger.info(f"Schema changed, continuing Parquet output in {part_file.name}")
+
+        temp = _TempOutput(part_file)
+        self._temps.append(temp)
+        self._schema = schema
+        self._writer = self._pq.ParquetWriter(str(temp.path), schema, compression='snappy')
+        self.output_files.append(part_file)
+
+    def _to_table(self, records: List[Dict[str, Any]]):
+        """Build a typed Arrow table from records, one column at a time"""
+        pa = self._pa
+        names = list(dict.fromkeys(name for record in records for name in record))
+        arrays = []
+
+        for name in names:
+            values = [record.get(name) for record in records]
+            try:
+                array = pa.array(values, from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                # Blank cells of a typed column
+                typed = [None if isinstance(value, str) and value == '' else value
+                         for value in values]
+                try:
+                    array = pa.array(typed, from_pandas=True)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    array = pa.array([None if value is None else str(value) for value in values],
+                                     pa.string())
+            if pa.types.is_null(array.type):
+                array = array.cast(pa.string())
+            arrays.append(array)
+
+        return pa.Table.from_arrays(arrays, names=[str(name) for name in names])
+
+    def _conform(self, table):
+        """Cast a table to the current schema, or return None if it does not fit"""
+        pa = self._pa
+
+        if not set(table.column_names) <= set(self._schema.names):
+            return None
+
+        arrays = []
+        for field in self._schema:
+            if field.name not in table.column_names:
+                arrays.append(pa.nulls(len(table), field.type))
+                continue
+            try:
+                arrays.append(table.column(field.name).cast(field.type))
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                return None
+
+        return pa.Table.from_arrays(arrays, schema=self._schema)
+
+
+def create_writer(output_format: str, output_file: Path):
+    """
+    Create an incremental writer for an output format
+
+    Args:
+        output_format: One of OUTPUT_SUFFIXES
+        output_file: Path of the file to create
+
+    Returns:
+        Writer to use as a context manager
+    """
+    if output_format == 'json':
+        return JsonArrayWriter(output_file)
+    if output_format == 'ndjson':
+        return NdjsonWriter(output_file)
+    if output_format == 'ndjson.gz':
+        return NdjsonWriter(output_file, compress=True)
+    if output_format == 'parquet':
+        return ParquetWriter(output_file)
+    raise ValueError(f"Unsupported output format '{output_format}', "
+                     f"expected one of {list(OUTPUT_SUFFIXES)}")
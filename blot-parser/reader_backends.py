@@ -0,0 +1,162 @@
+"""
+Reader Backends - Excel reader engines behind one row-streaming interface
+
+    openpyxl   .xlsx/.xlsm, pure Python (always available)
+    calamine   .xlsx/.xlsm/.xls/.xlsb, Rust based, much faster (pip install python-calamine)
+    xlrd       legacy .xls
+
+Every backend yields each sheet as (sheet name, iterator of row value tuples) and is also
+the pandas.read_excel engine of the same name. With engine 'auto' (config.READER_ENGINE)
+calamine is used when installed, otherwise openpyxl for .xlsx and xlrd for .xls.
+"""
+
+import importlib.util
+from pathlib import Path
+from typing import Iterator, Tuple, Union, BinaryIO
+import logging
+
+from config import READER_ENGINE
+
+logger = logging.getLogger(__name__)
+
+Source = Union[Path, BinaryIO]
+
+
+class ReaderBackend:
+    """Base class: an Excel engine that streams sheets as rows of cell values"""
+
+    name = ''
+    module = ''
+    extensions = frozenset()
+
+    @classmethod
+    def available(cls) -> bool:
+        """Check whether the engine's package is installed, without importing it"""
+        return importlib.util.find_spec(cls.module) is not None
+
+    def iter_sheets(self, source: Source) -> Iterator[Tuple[str, Iterator[tuple]]]:
+        """
+        Stream the sheets of a workbook
+
+        Args:
+            source: Path or binary file-like object containing the workbook
+
+        Yields:
+            Tuples of (sheet name, iterator of row value tuples); each row iterator
+            must be consumed before advancing to the next sheet
+        """
+        raise NotImplementedError
+
+
+class OpenpyxlBackend(ReaderBackend):
+    """openpyxl in read-only mode"""
+
+    name = 'openpyxl'
+    module = 'openpyxl'
+    extensions = frozenset(['.xlsx', '.xlsm'])
+
+    def iter_sheets(self, source: Source) -> Iterator[Tuple[str, Iterator[tuple]]]:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            for worksheet in workbook.worksheets:
+                # Dimensions stored in the file are often stale; let the reader find the real extent
+                worksheet.reset_dimensions()
+                yield worksheet.title, worksheet.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+
+class CalamineBackend(ReaderBackend):
+    """python-calamine, a binding to the Rust calamine reader"""
+
+    name = 'calamine'
+    module = 'python_calamine'
+    extensions = frozenset(['.xlsx', '.xlsm', '.xls', '.xlsb'])
+
+    def iter_sheets(self, source: Source) -> Iterator[Tuple[str, Iterator[tuple]]]:
+        from python_calamine import load_workbook
+
+        workbook = load_workbook(str(source) if isinstance(source, Path) else source)
+        try:
+            for sheet_name in workbook.sheet_names:
+                yield sheet_name, workbook.get_sheet_by_name(sheet_name).iter_rows()
+        finally:
+            workbook.close()
+
+
+class XlrdBackend(ReaderBackend):
+    """xlrd for legacy .xls workbooks"""
+
+    name = 'xlrd'
+    module = 'xlrd'
+    extensions = frozenset(['.xls'])
+
+    def iter_sheets(self, source: Source) -> Iterator[Tuple[str, Iterator[tuple]]]:
+        import xlrd
+
+        if isinstance(source, Path):
+            workbook = xlrd.open_workbook(str(source), on_demand=True)
+        else:
+            workbook = xlrd.open_workbook(file_contents=source.read(), on_demand=True)
+        try:
+            for index, sheet_name in enumerate(workbook.sheet_names()):
+                sheet = workbook.sheet_by_index(index)
+                yield sheet_name, self._iter_rows(sheet, workbook.datemode)
+                workbook.unload_sheet(index)
+        finally:
+            workbook.release_resources()
+
+    @staticmethod
+    def _iter_rows(sheet, datemode: int) -> Iterator[tuple]:
+        """Convert xlrd cells: dates to datetime, booleans to bool, blanks and errors to None"""
+        import xlrd
+
+        for row_index in range(sheet.nrows):
+            values = []
+            for cell_type, value in zip(sheet.row_types(row_index), sheet.row_values(row_index)):
+                if cell_type == xlrd.XL_CELL_DATE:
+                    value = xlrd.xldate.xldate_as_datetime(value, datemode)
+                elif cell_type == xlrd.XL_CELL_BOOLEAN:
+                    value = bool(value)
+                elif cell_type in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                    value = None
+                values.append(value)
+            yield tuple(values)
+
+
+BACKENDS = {backend.name: backend for backend in (OpenpyxlBackend, CalamineBackend, XlrdBackend)}
+
+
+def select_backend(filename: str, engine: str = READER_ENGINE) -> ReaderBackend:
+    """
+    Choose the reader backend for a workbook
+
+    Args:
+        filename: Workbook file name; its extension decides which engines can read it
+        engine: 'auto', or an engine name from BACKENDS to force
+
+    Returns:
+        ReaderBackend instance
+    """
+    extension = Path(filename).suffix.lower()
+
+    if engine != 'auto':
+        if engine not in BACKENDS:
+            raise ValueError(f"Unsupported reader engine '{engine}', "
+                             f"expected 'auto' or one of {list(BACKENDS)}")
+        backend = BACKENDS[engine]
+        if extension not in backend.extensions:
+            raise ValueError(f"Reader engine '{engine}' cannot read '{extension}' files")
+        if not backend.available():
+            raise ImportError(f"Reader engine '{engine}' requires the '{backend.module}' package")
+        return backend()
+
+    preferred = [CalamineBackend, XlrdBackend if extension == '.xls' else OpenpyxlBackend]
+    for backend in preferred:
+        if extension in backend.extensions and backend.available():
+            return backend()
+
+    raise ValueError(f"No installed reader engine can read '{extension}' files "
+                     f"(install python-calamine{' or xlrd' if extension == '.xls' else ''})")
@@ -0,0 +1,204 @@
+"""
+Record Encoder - Converts mapped DataFrames into JSON-native records or DynamoDB items
+
+Values are converted once per column instead of once per value at dump time:
+datetimes are formatted with vectorized strftime, numeric columns are unboxed
+with tolist(), and NaN, NaT and NA become None. For DynamoDB, floats become
+Decimal, which boto3 requires. Only object columns holding mixed types fall back
+to per-value conversion.
+
+The JSON backend is orjson when installed (config.JSON_BACKEND = 'auto'), else
+the standard library json module.
+"""
+
+import json
+import math
+from decimal import Decimal
+from typing import Dict, Any, List
+import logging
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_bool_dtype, is_datetime64_any_dtype, \
+    is_float_dtype, is_integer_dtype, is_timedelta64_dtype
+
+from config import JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+ENCODER_TARGETS = ('json', 'dynamodb')
+
+# Object column kinds (pandas infer_dtype) whose values are already native
+_NATIVE_KINDS = frozenset(['string', 'integer', 'boolean', 'empty'])
+
+
+def _formats_like_json(record: Dict[str, Any]) -> bool:
+    """Whether orjson writes every float of a record the way json does"""
+    # json switches to exponent notation (1e-05, 1e+16) outside this range, orjson
+    # writes 0.00001 and 1e16; NaN and infinity are written as NaN/Infinity by json only
+    return all(1e-4 <= abs(value) < 1e16 for value in record.values()
+               if isinstance(value, float) and value)
+
+
+def json_default(value: Any) -> Any:
+    """
+    Fallback for values the JSON backend cannot serialize natively
+
+    Args:
+        value: Value to convert
+
+    Returns:
+        A JSON-serializable replacement
+    """
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class RecordEncoder:
+    """Column-wise conversion of DataFrames into records for one target ('json' or 'dynamodb')"""
+
+    def __init__(self, target: str = 'json'):
+        """
+        Initialize the encoder
+
+        Args:
+            target: 'json' for JSON-native values, 'dynamodb' for boto3-compatible items
+        """
+        if target not in ENCODER_TARGETS:
+            raise ValueError(f"Unsupported encoder target '{target}', "
+                             f"expected one of {ENCODER_TARGETS}")
+        self.target = target
+        self._float = self._to_decimal if target == 'dynamodb' else float
+
+    def encode(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Convert a DataFrame into records
+
+        Args:
+            df: DataFrame to convert
+
+        Returns:
+            List of records with native (or Decimal) values and None for missing values
+        """
+        columns = [self.encode_column(column) for _, column in df.items()]
+        names = list(df.columns)
+        return [dict(zip(names, row)) for row in zip(*columns)]
+
+    def encode_column(self, column: pd.Series) -> List[Any]:
+        """
+        Convert one column into a list of native values
+
+        Args:
+            column: Column to convert
+
+        Returns:
+            List of converted values
+        """
+        if is_bool_dtype(column) or is_integer_dtype(column):
+            return self._with_nulls(column)
+
+        if is_float_dtype(column):
+            values = column.astype('float64').to_numpy()
+            finite = np.isfinite(values)
+            if self.target == 'dynamodb':
+                # numpy's shortest round-trip repr, formatted in C for the whole column
+                text = np.where(finite, values, 0).astype(str)
+                return [Decimal(s) if ok else None for s, ok in zip(text.tolist(), finite.tolist())]
+            return [v if ok else None for v, ok in zip(values.tolist(), finite.tolist())]
+
+        if is_datetime64_any_dtype(column):
+            text = column.dt.strftime('%Y-%m-%d %H:%M:%S.%f').str.removesuffix('.000000')
+            return self._with_nulls(text)
+
+        if is_timedelta64_dtype(column):
+            return self._with_nulls(column.astype(str).where(column.notna(), None))
+
+        kind = infer_dtype(column, skipna=True)
+        if kind in _NATIVE_KINDS:
+            return self._with_nulls(column)
+        if kind == 'floating':
+            return self.encode_column(column.astype('float64'))
+
+        return [self._encode_value(value) for value in column.tolist()]
+
+    @staticmethod
+    def _with_nulls(column: pd.Series) -> List[Any]:
+        if column.hasnans:
+            column = column.astype(object).where(column.notna(), None)
+        return column.tolist()
+
+    def _encode_value(self, value: Any) -> Any:
+        """Convert one value from a mixed object column"""
+        if value is None or value is pd.NaT or value is pd.NA:
+            return None
+        if isinstance(value, (bool, int, str)):
+            return value
+        if isinstance(value, float):
+            return self._float(value) if math.isfinite(value) else None
+        if isinstance(value, np.generic):
+            return self._encode_value(value.item())
+        if isinstance(value, Decimal):
+            return value if self.target == 'dynamodb' else float(value)
+        # Timestamps, dates, times and anything else are written as text
+        return str(value)
+
+    @staticmethod
+    def _to_decimal(value: float) -> Decimal:
+        return Decimal(repr(value))
+
+
+class JsonSerializer:
+    """Serializes records to UTF-8 JSON bytes with orjson or the standard library"""
+
+    def __init__(self, backend: str = JSON_BACKEND):
+        """
+        Initialize the serializer
+
+        Args:
+            backend: 'orjson', 'stdlib', or 'auto' (orjson when installed)
+        """
+        if backend == 'auto':
+            backend = 'orjson' if orjson is not None else 'stdlib'
+        if backend == 'orjson' and orjson is None:
+            raise ImportError("The 'orjson' JSON backend requires orjson (pip install orjson)")
+        if backend not in ('orjson', 'stdlib'):
+            raise ValueError(f"Unsupported JSON backend '{backend}', "
+                             f"expected 'auto', 'orjson' or 'stdlib'")
+        self.backend = backend
+
+    def dumps(self, record: Dict[str, Any], indent: bool = False) -> bytes:
+        """
+        Serialize a record
+
+        Args:
+            record: Record to serialize
+            indent: Indent with two spaces like json.dumps(indent=2) instead of compact output
+
+        Returns:
+            UTF-8 encoded JSON; indented output escapes non-ASCII text as \\uXXXX like
+            json.dumps, compact output keeps it as UTF-8. Both backends give the same bytes.
+        """
+        if self.backend == 'orjson' and _formats_like_json(record):
+            try:
+                option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+                data = orjson.dumps(record, default=json_default, option=option)
+                # orjson cannot escape non-ASCII text; such records go through json
+                if not indent or data.isascii():
+                    return data
+            except TypeError:
+                # e.g. integers beyond 64 bits; the standard library handles them
+                pass
+        if indent:
+            return json.dumps(record, indent=2, default=json_default).encode('utf-8')
+        return json.dumps(record, separators=(',', ':'), ensure_ascii=False,
+                          default=json_default).encode('utf-8')
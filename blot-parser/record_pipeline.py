@@ -0,0 +1,345 @@
+"""
+Record Pipeline - Streams records from sheets through clean, map and sink stages in fixed-size
+chunks
+
+Only the encoding and writing of records is chunked. The reader still returns whole-sheet
+DataFrames, and cleaning, mapping and type coercion work on one whole sheet at a time, so
+peak memory grows with the largest sheet (plus the rest of the workbook not yet consumed);
+what stays bounded is the number of encoded records alive at once.
+
+With sheet_workers > 1 the sheets of one workbook are cleaned and mapped in parallel
+worker processes (or threads), at most sheet_workers sheets at a time, and their chunks
+are emitted in sheet order, so outputs and summaries match a sequential run. Process
+workers also encode, returning every record of their sheet; thread workers return the
+mapped sheet, which is encoded one chunk at a time as it is emitted.
+
+The worker pool is started by the first workbook that needs it and reused for every
+later one until close(), so the pipeline is sent to worker processes once per pool, not
+once per workbook. Column plans learned in a worker process stay in that worker's
+layout cache for later sheets it prepares; they are not sent back to this process.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Iterator, Callable, Optional
+import logging
+
+import pandas as pd
+
+from excel_processor import ExcelProcessor
+from field_mapper import FieldMapper
+from field_schema import FieldSchema
+from record_encoder import RecordEncoder
+from layout_cache import ColumnPlan, header_signature
+from instrumentation import Instrumentation, NullInstrumentation
+from config import PIPELINE_CHUNK_SIZE, SHEET_WORKERS, SHEET_EXECUTOR, SHEET_PARALLEL_MIN_ROWS
+
+logger = logging.getLogger(__name__)
+
+SHEET_EXECUTORS = {'process': ProcessPoolExecutor, 'thread': ThreadPoolExecutor}
+
+# Pipeline owned by each sheet worker process
+_worker_pipeline: Optional['RecordPipeline'] = None
+
+
+class RecordPipeline:
+    """Generator-based sheet -> clean -> map -> sink pipeline with bounded chunk size"""
+
+    def __init__(self, excel_processor: ExcelProcessor, field_mapper: FieldMapper,
+                 chunk_size: int = PIPELINE_CHUNK_SIZE, field_schema: Optional[FieldSchema] = None,
+                 encoder: Optional[RecordEncoder] = None, sheet_workers: int = SHEET_WORKERS,
+                 sheet_executor: str = SHEET_EXECUTOR,
+                 parallel_min_rows: int = SHEET_PARALLEL_MIN_ROWS):
+        """
+        Initialize the record pipeline
+
+        Args:
+            excel_processor: Processor used to clean each sheet
+            field_mapper: Mapper used to map each sheet to system fields
+            chunk_size: Maximum number of records held per chunk
+            field_schema: Types for the mapped system fields (default: loaded from
+                generic.csv in the field mapper's mappings directory)
+            encoder: Converts each chunk into records (default: JSON-native values)
+            sheet_workers: Sheets of one workbook prepared in parallel (1 = sequential)
+            sheet_executor: 'process' or 'thread' workers for sheet_workers > 1
+            parallel_min_rows: Workbooks with fewer rows in total are prepared sequentially
+        """
+        if sheet_executor not in SHEET_EXECUTORS:
+            raise ValueError(f"Unsupported sheet executor '{sheet_executor}', "
+                             f"expected one of {list(SHEET_EXECUTORS)}")
+        self.excel_processor = excel_processor
+        self.field_mapper = field_mapper
+        self.chunk_size = max(1, chunk_size)
+        self.field_schema = field_schema or FieldSchema.load(
+            field_mapper.mappings_dir / 'generic.csv')
+        self.encoder = encoder or RecordEncoder()
+        self.sheet_workers = max(1, sheet_workers)
+        self.sheet_executor = sheet_executor
+        self.parallel_min_rows = parallel_min_rows
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Sheet worker processes receive the pipeline without this process's pool and lock
+        state = self.__dict__.copy()
+        del state['_executor'], state['_executor_lock']
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Shut down the sheet worker pool, if one was started"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def iter_records(self, excel_data: Dict[str, pd.DataFrame], file_name: str, vendor: str,
+                     summary: Dict[str, Any], metrics: Optional[Instrumentation] = None
+                     ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Clean, map and type each sheet, then yield its rows as chunks of records
+
+        Columns are mapped and coerced to their schema types once per sheet;
+        records are only built per chunk, with missing values as None.
+        Sheets are removed from excel_data as they are consumed so each raw
+        DataFrame can be released once its records have been emitted. With
+        sheet_workers > 1 whole sheets are prepared in parallel and held until
+        every earlier sheet has been emitted (as records with process workers).
+
+        Args:
+            excel_data: Dictionary with sheet names as keys and DataFrames as values
+            file_name: Name of the source file
+            vendor: Vendor name (e.g., 'bloomberg')
+            summary: Dictionary receiving per-sheet row and column counts
+            metrics: Instrumentation receiving 'clean' and 'map' stage metrics
+
+        Yields:
+            Lists of at most chunk_size mapped records
+        """
+        metrics = metrics or NullInstrumentation()
+
+        if self.sheet_workers > 1 and len(excel_data) > 1 and \
+                sum(len(df) for df in excel_data.values()) >= self.parallel_min_rows:
+            yield from self._iter_records_parallel(excel_data, file_name, vendor, summary, metrics)
+            return
+
+        for sheet_name in list(excel_data):
+            with metrics.stage('clean') as stage:
+                cleaned_df = self.excel_processor.clean_dataframe(excel_data.pop(sheet_name))
+                stage.add(rows=len(cleaned_df))
+
+            self._add_sheet_summary(summary, sheet_name, len(cleaned_df), len(cleaned_df.columns))
+
+            with metrics.stage('map'):
+                mapped_df = self._map_sheet(cleaned_df, file_name, vendor)
+            del cleaned_df
+
+            yield from self._encode_chunks(mapped_df, metrics)
+
+    def prepare_sheet(self, df: pd.DataFrame, file_name: str, vendor: str,
+                      encode: bool = True) -> Dict[str, Any]:
+        """
+        Clean, map, type and encode one whole sheet (the unit of work of a sheet worker)
+
+        Args:
+            df: Raw sheet DataFrame
+            file_name: Name of the source file
+            vendor: Vendor name (e.g., 'bloomberg')
+            encode: Build the records here; otherwise the mapped DataFrame is returned
+                and encoded chunk by chunk as it is emitted
+
+        Returns:
+            Dictionary with row_count, column_count, chunks (lists of records) or frame
+            (the mapped DataFrame, when not encoding), and the clean_seconds and
+            map_seconds spent in the worker
+        """
+        start = time.perf_counter()
+        cleaned_df = self.excel_processor.clean_dataframe(df)
+        cleaned = time.perf_counter()
+
+        mapped_df = self._map_sheet(cleaned_df, file_name, vendor)
+        result = {
+            'row_count': len(cleaned_df),
+            'column_count': len(cleaned_df.columns),
+            'clean_seconds': cleaned - start,
+        }
+        if encode:
+            result['chunks'] = [self.encoder.encode(mapped_df.iloc[offset:offset + self.chunk_size])
+                                for offset in range(0, len(mapped_df), self.chunk_size)]
+        else:
+            result['frame'] = mapped_df
+        result['map_seconds'] = time.perf_counter() - cleaned
+        return result
+
+    def _encode_chunks(self, mapped_df: pd.DataFrame,
+                       metrics: Instrumentation) -> Iterator[List[Dict[str, Any]]]:
+        """Encode a mapped sheet one chunk at a time, so only one chunk of records is alive"""
+        for start in range(0, len(mapped_df), self.chunk_size):
+            # Building the output records is counted as part of mapping
+            with metrics.stage('map') as stage:
+                records = self.encoder.encode(mapped_df.iloc[start:start + self.chunk_size])
+                stage.add(rows=len(records))
+            yield records
+
+    def _map_sheet(self, cleaned_df: pd.DataFrame, file_name: str, vendor: str) -> pd.DataFrame:
+        """Map a cleaned sheet to system fields by position, coerce their types and add file_name"""
+        plan = self.column_plan(cleaned_df.columns, vendor)
+        mapped_df = cleaned_df.copy(deep=False)
+        mapped_df.columns = plan.columns
+        mapped_df = self.field_schema.coerce_dataframe(mapped_df, plan.typed_positions())
+        mapped_df['file_name'] = file_name
+        return mapped_df
+
+    def column_plan(self, columns: pd.Index, vendor: str) -> ColumnPlan:
+        """
+        Get the column plan of a sheet layout from the layout cache, compiling it on a miss
+
+        Plans are keyed by vendor, mapping and schema fingerprints and the header
+        signature, so an edited mapping CSV or generic.csv yields a new plan.
+
+        Args:
+            columns: Column names of the cleaned sheet
+            vendor: Vendor name (e.g., 'bloomberg')
+
+        Returns:
+            ColumnPlan with the system field and field type of each column position
+        """
+        key = (vendor, self.field_mapper.get_mapping_fingerprint(vendor),
+               self.field_schema.fingerprint, header_signature(columns))
+
+        def build() -> ColumnPlan:
+            mapped = self.field_mapper.map_columns(columns, vendor)
+            types = [None] * len(mapped)
+            for index, field_type in self.field_schema.typed_positions(mapped):
+                types[index] = field_type
+            return ColumnPlan(mapped, types)
+
+        return self.excel_processor.layout_cache.column_plan(key, build)
+
+    @staticmethod
+    def _add_sheet_summary(summary: Dict[str, Any], sheet_name: str, row_count: int,
+                           column_count: int) -> None:
+        summary['sheets'][sheet_name] = {
+            'sheet_name': sheet_name,
+            'row_count': row_count,
+            'column_count': column_count
+        }
+        summary['total_records'] += row_count
+
+    def _iter_records_parallel(self, excel_data: Dict[str, pd.DataFrame], file_name: str,
+                               vendor: str, summary: Dict[str, Any], metrics: Instrumentation
+                               ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Prepare sheets in the worker pool and yield their chunks in sheet order
+
+        At most sheet_workers sheets of this workbook are in flight, which bounds the
+        prepared records held while an earlier, slower sheet is still being worked on.
+        """
+        workers = min(self.sheet_workers, len(excel_data))
+        logger.info(f"Preparing {len(excel_data)} sheets of {file_name} with {workers} "
+                    f"{self.sheet_executor} workers")
+
+        executor = self._sheet_pool()
+        # Threads gain nothing from encoding in parallel (it holds the GIL), so their
+        # sheets are encoded lazily as they are emitted
+        prepare = partial(self.prepare_sheet, encode=False)
+        if self.sheet_executor == 'process':
+            prepare = _prepare_sheet_in_worker
+
+        pending = deque()
+        try:
+            for sheet_name in list(excel_data):
+                pending.append((sheet_name, executor.submit(
+                    prepare, excel_data.pop(sheet_name), file_name, vendor)))
+                if len(pending) >= workers:
+                    yield from self._emit_sheet(*pending.popleft(), summary, metrics)
+            while pending:
+                yield from self._emit_sheet(*pending.popleft(), summary, metrics)
+        finally:
+            # A failed or abandoned workbook must not leave its sheets queued in the shared pool
+            for _, future in pending:
+                future.cancel()
+
+    def _sheet_pool(self):
+        """Get the sheet worker pool, starting it on first use"""
+        with self._executor_lock:
+            if self._executor is None:
+                if self.sheet_executor == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=self.sheet_workers,
+                                                         initializer=_init_sheet_worker,
+                                                         initargs=(self,))
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.sheet_workers)
+            return self._executor
+
+    def _emit_sheet(self, sheet_name: str, future: Future, summary: Dict[str, Any],
+                    metrics: Instrumentation) -> Iterator[List[Dict[str, Any]]]:
+        """Wait for a prepared sheet, record its summary and metrics, and yield its chunks"""
+        result = future.result()
+        self._add_sheet_summary(summary, sheet_name, result['row_count'], result['column_count'])
+        # The work ran in the worker; its time is added to the (near-empty) stage calls here
+        with metrics.stage('clean') as stage:
+            stage.add(rows=result['row_count'], seconds=result['clean_seconds'])
+        if 'frame' in result:
+            # Rows are counted as the chunks are encoded
+            with metrics.stage('map') as stage:
+                stage.add(seconds=result['map_seconds'])
+            mapped_df = result.pop('frame')
+            del result
+            yield from self._encode_chunks(mapped_df, metrics)
+            return
+
+        with metrics.stage('map') as stage:
+            stage.add(rows=result['row_count'], seconds=result['map_seconds'])
+
+        # Pop from the end so each chunk is released once the consumer is done with it
+        chunks = result['chunks'][::-1]
+        del result
+        while chunks:
+            yield chunks.pop()
+
+    def run(self, excel_data: Dict[str, pd.DataFrame], file_name: str, vendor: str,
+            sink: Callable[[List[Dict[str, Any]]], None],
+            metrics: Optional[Instrumentation] = None) -> Dict[str, Any]:
+        """
+        Push every record of a workbook through the pipeline into a sink
+
+        Args:
+            excel_data: Dictionary with sheet names as keys and DataFrames as values
+            file_name: Name of the source file
+            vendor: Vendor name (e.g., 'bloomberg')
+            sink: Callable receiving each mapped chunk
+            metrics: Instrumentation receiving 'clean', 'map' and 'persist' stage metrics
+
+        Returns:
+            Summary with sheet_count, total_records and per-sheet counts
+        """
+        metrics = metrics or NullInstrumentation()
+        summary = {'sheet_count': len(excel_data), 'total_records': 0, 'sheets': {}}
+
+        logger.info(f"Streaming records from {vendor} file {file_name} "
+                    f"in chunks of {self.chunk_size}")
+        for mapped_records in self.iter_records(excel_data, file_name, vendor, summary, metrics):
+            with metrics.stage('persist') as stage:
+                sink(mapped_records)
+                stage.add(rows=len(mapped_records))
+
+        return summary
+
+
+def _init_sheet_worker(pipeline: RecordPipeline) -> None:
+    """Keep the pipeline sent to a sheet worker process for all of its sheets"""
+    global _worker_pipeline
+    _worker_pipeline = pipeline
+
+
+def _prepare_sheet_in_worker(df: pd.DataFrame, file_name: str, vendor: str) -> Dict[str, Any]:
+    """Prepare one sheet inside a sheet worker process"""
+    return _worker_pipeline.prepare_sheet(df, file_name, vendor)
@@ -13,6 +13,6 @@ cd "$(dirname "$0")"
 source venv/bin/activate
 
 # Run the parser
-python blot_parser.py
+python blot_parser.py "$@"
 
 echo "Parser execution completed."
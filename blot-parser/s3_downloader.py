@@ -0,0 +1,167 @@
+"""
+S3 Downloader - Fetches S3 objects into memory, or spools large ones to disk
+
+Objects up to the spool threshold are read with a single GET. Larger ones are written
+to a temporary file (/tmp on Lambda) with parallel ranged GETs, so a large blot never
+sits in memory as one bytes object and the download is not bound to one connection.
+Every request is pinned to the ETag seen by HEAD so an overwrite mid-download fails
+instead of producing a mixed file. When the S3 event names the object version, HEAD and
+every GET read that version, and the ETag from the event must match the one HEAD sees,
+so newer content uploaded under the same key is never processed as the older version.
+"""
+
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+import logging
+
+from config import S3_SPOOL_THRESHOLD, S3_PART_SIZE, S3_DOWNLOAD_WORKERS, S3_PART_RETRIES
+
+logger = logging.getLogger(__name__)
+
+_READ_BLOCK = 1024 * 1024
+
+
+class StaleObjectError(Exception):
+    """Raised when the object under a key is no longer the version an event refers to"""
+
+
+class DownloadedObject:
+    """An S3 object held either in memory (content) or in a spooled temporary file (path)"""
+
+    def __init__(self, key: str, size: int, etag: str, content: Optional[bytes] = None,
+                 path: Optional[Path] = None):
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self.content = content
+        self.path = path
+
+    @property
+    def filename(self) -> str:
+        return self.key.split('/')[-1]
+
+    def cleanup(self) -> None:
+        """Release the content and delete the spooled file, if any"""
+        self.content = None
+        if self.path is not None:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self) -> 'DownloadedObject':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.cleanup()
+
+
+class S3Downloader:
+    """Picks the download method by ContentLength: in memory when small, ranged GETs when large"""
+
+    def __init__(self, client, spool_threshold: int = S3_SPOOL_THRESHOLD,
+                 part_size: int = S3_PART_SIZE, max_workers: int = S3_DOWNLOAD_WORKERS,
+                 spool_dir: Optional[str] = None):
+        """
+        Initialize the downloader
+
+        Args:
+            client: boto3 S3 client (or a stand-in with head_object/get_object)
+            spool_threshold: Objects larger than this many bytes are spooled to disk
+            part_size: Bytes per ranged GET when spooling
+            max_workers: Concurrent ranged GETs
+            spool_dir: Directory for spooled files (default: the system temp dir, /tmp on Lambda)
+        """
+        self.client = client
+        self.spool_threshold = spool_threshold
+        self.part_size = max(1, part_size)
+        self.max_workers = max(1, max_workers)
+        self.spool_dir = spool_dir or tempfile.gettempdir()
+
+    def download(self, bucket: str, key: str, version_id: Optional[str] = None,
+                 expected_etag: Optional[str] = None) -> DownloadedObject:
+        """
+        Download an object
+
+        Args:
+            bucket: S3 bucket name
+            key: S3 object key
+            version_id: Version to read (from the S3 event); None reads the latest
+            expected_etag: ETag the event reported for the object, with or without quotes
+
+        Returns:
+            DownloadedObject; use it as a context manager so spooled files are removed
+
+        Raises:
+            StaleObjectError: If the object's ETag is not expected_etag, i.e. the key was
+                overwritten after the event was sent (unversioned buckets)
+        """
+        version = {'VersionId': version_id} if version_id else {}
+        head = self.client.head_object(Bucket=bucket, Key=key, **version)
+        size = head['ContentLength']
+        etag = head.get('ETag', '')
+
+        # Event notifications omit the quotes that HeadObject includes
+        current, expected = etag.strip('"'), (expected_etag or '').strip('"')
+        if expected and current != expected:
+            raise StaleObjectError(f"s3://{bucket}/{key} has ETag {current}, not {expected} "
+                                   f"from the event; it was overwritten since")
+
+        if size <= self.spool_threshold:
+            response = self.client.get_object(Bucket=bucket, Key=key, **version,
+                                              **self._if_match(etag))
+            return DownloadedObject(key, size, etag, content=response['Body'].read())
+
+        return DownloadedObject(key, size, etag, path=self._spool(bucket, key, size, etag, version))
+
+    def _spool(self, bucket: str, key: str, size: int, etag: str, version: dict) -> Path:
+        """Download an object to a temporary file with parallel ranged GETs"""
+        filename = key.split('/')[-1]
+        fd, temp_name = tempfile.mkstemp(prefix='blot-', suffix=f"-{filename}", dir=self.spool_dir)
+        path = Path(temp_name)
+
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.truncate(size)
+
+            ranges = [(start, min(start + self.part_size, size) - 1)
+                      for start in range(0, size, self.part_size)]
+            logger.info(f"Spooling s3://{bucket}/{key} ({size} bytes) to {path} "
+                        f"in {len(ranges)} parts")
+
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(ranges))) as executor:
+                list(executor.map(
+                    lambda r: self._download_part(bucket, key, etag, version, path, *r), ranges))
+        except Exception:
+            path.unlink()
+            raise
+
+        return path
+
+    def _download_part(self, bucket: str, key: str, etag: str, version: dict, path: Path,
+                       start: int, end: int) -> None:
+        """Fetch bytes start..end (inclusive) and write them at the same offset, with retries"""
+        for attempt in range(S3_PART_RETRIES + 1):
+            try:
+                response = self.client.get_object(Bucket=bucket, Key=key,
+                                                  Range=f"bytes={start}-{end}",
+                                                  **version, **self._if_match(etag))
+                body = response['Body']
+                with open(path, 'r+b') as f:
+                    f.seek(start)
+                    for block in iter(lambda: body.read(_READ_BLOCK), b''):
+                        f.write(block)
+                return
+            except Exception as e:
+                if attempt == S3_PART_RETRIES:
+                    raise
+                logger.warning(f"Retrying bytes {start}-{end} of s3://{bucket}/{key}: {str(e)}")
+
+    @staticmethod
+    def _if_match(etag: str) -> dict:
+        # Pin every request to the object version seen by head_object
+        return {'IfMatch': etag} if etag else {}
@@ -0,0 +1,237 @@
+"""
+Sharding - Deterministic split of input files across machines, and per-shard run summaries
+
+A backfill over one archive can run on several machines with no coordinator: each is
+started with --shard i/N (1 <= i <= N) and takes the files whose path hashes to shard i.
+The hash (BLAKE2b of the path relative to the input root) is the same on every machine,
+Python version and run, so for a given N each file belongs to exactly one shard.
+
+Each sharded run writes a summary - files, records, bytes, wall time and throughput - to
+its output directory as .shard-<i>-of-<N>.json. merge_summaries() combines the summaries
+of all shards into one report and lists shards whose summary is missing.
+"""
+
+import hashlib
+import json
+import socket
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+import logging
+
+logger = logging.getLogger(__name__)
+
+# (shard index, shard count), index 1-based
+Shard = Tuple[int, int]
+
+SUMMARY_PATTERN = '.shard-*-of-*.json'
+
+
+def parse_shard(value: str) -> Shard:
+    """
+    Parse a shard given as "i/N"
+
+    Args:
+        value: Shard index and count, e.g. "2/8"
+
+    Returns:
+        Tuple of (index, count)
+
+    Raises:
+        ValueError: If the value is not "i/N" with 1 <= i <= N
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected i/N such as 1/4") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{value}', expected 1 <= i <= N")
+    return index, count
+
+
+def shard_of(file_name: str, shard_count: int) -> int:
+    """
+    Get the shard a file belongs to
+
+    Args:
+        file_name: Input file path relative to its input root, with '/' separators (not
+            absolute, so shards agree across mount points)
+        shard_count: Number of shards
+
+    Returns:
+        1-based shard index
+    """
+    digest = hashlib.blake2b(file_name.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % shard_count + 1
+
+
+def summary_filename(shard: Shard) -> str:
+    """Name of a shard's summary file in its output directory"""
+    return f".shard-{shard[0]}-of-{shard[1]}.json"
+
+
+def summarize_run(results: List[Dict[str, Any]], started_at: datetime, seconds: float,
+                  shard: Optional[Shard] = None) -> Dict[str, Any]:
+    """
+    Summarize one run from its per-file results
+
+    Args:
+        results: File summaries returned by BlotParser.process_and_save_all_files
+        started_at: Time the run started (timezone-aware, so shards on different machines compare)
+        seconds: Wall time of the run
+        shard: Shard the run processed, or None for a whole-input run
+
+    Returns:
+        Dictionary with file counts, records, input bytes, timings and throughput
+    """
+    processed = [r for r in results if not r.get('skipped') and 'error' not in r]
+    failed = [r for r in results if 'error' in r]
+    records = sum(r.get('total_records', 0) for r in processed)
+    nbytes = 0
+    for result in processed:
+        try:
+            nbytes += Path(result['file_path']).stat().st_size
+        except (KeyError, OSError):
+            pass
+
+    seconds = max(seconds, 1e-9)
+    return {
+        'shard': f"{shard[0]}/{shard[1]}" if shard else None,
+        'shard_index': shard[0] if shard else 1,
+        'shard_count': shard[1] if shard else 1,
+        'host': socket.gethostname(),
+        'started_at': started_at.isoformat(),
+        'seconds': seconds,
+        'files': len(results),
+        'processed': len(processed),
+        'skipped': len(results) - len(processed) - len(failed),
+        'failed': len(failed),
+        'failed_files': [r.get('file_name', 'unknown') for r in failed],
+        'records': records,
+        'bytes': nbytes,
+        'files_per_second': len(processed) / seconds,
+        'records_per_second': records / seconds,
+        'mb_per_second': nbytes / seconds / 1e6,
+    }
+
+
+def write_summary(summary: Dict[str, Any], output_dir: Path) -> Path:
+    """
+    Write a shard's summary to its output directory
+
+    Args:
+        summary: Summary from summarize_run
+        output_dir: Output directory of the shard
+
+    Returns:
+        Path of the summary file
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / summary_filename((summary['shard_index'], summary['shard_count']))
+    path.write_text(json.dumps(summary, indent=2))
+    return path
+
+
+def load_summaries(paths: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Load shard summaries from files, or from every summary file in directories
+
+    Args:
+        paths: Summary files or output directories
+
+    Returns:
+        List of summaries
+    """
+    summaries = []
+    for path in map(Path, paths):
+        files = sorted(path.glob(SUMMARY_PATTERN)) if path.is_dir() else [path]
+        for file in files:
+            try:
+                summaries.append(json.loads(file.read_text()))
+            except (OSError, ValueError) as e:
+                logger.error(f"Ignoring unreadable shard summary {file}: {e}")
+    return summaries
+
+
+def merge_summaries(summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Combine the summaries of the shards of one backfill
+
+    Shards run in parallel, so the backfill's wall time is measured from the earliest
+    shard start to the latest shard end.
+
+    Args:
+        summaries: Shard summaries (all with the same shard count)
+
+    Returns:
+        Dictionary with the per-shard summaries, totals and missing shard indexes
+    """
+    counts = {summary['shard_count'] for summary in summaries}
+    if len(counts) > 1:
+        raise ValueError(f"Summaries come from different shard counts: {sorted(counts)}")
+
+    # Keep the latest summary of a shard that was run more than once
+    shards = {}
+    for summary in sorted(summaries, key=lambda s: s['started_at']):
+        shards[summary['shard_index']] = summary
+    shards = [shards[index] for index in sorted(shards)]
+
+    shard_count = counts.pop() if counts else 0
+    totals = {name: sum(s[name] for s in shards)
+              for name in ('files', 'processed', 'skipped', 'failed', 'records', 'bytes')}
+    seconds = 0.0
+    if shards:
+        starts = [datetime.fromisoformat(s['started_at']) for s in shards]
+        ends = [start.timestamp() + s['seconds'] for start, s in zip(starts, shards)]
+        seconds = max(max(ends) - min(start.timestamp() for start in starts), 1e-9)
+
+    return {
+        'shard_count': shard_count,
+        'shards': shards,
+        'missing': sorted(set(range(1, shard_count + 1)) - {s['shard_index'] for s in shards}),
+        'totals': {
+            **totals,
+            'seconds': seconds,
+            'files_per_second': totals['processed'] / seconds if shards else 0.0,
+            'records_per_second': totals['records'] / seconds if shards else 0.0,
+            'mb_per_second': totals['bytes'] / seconds / 1e6 if shards else 0.0,
+        },
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    Render a merged report as a table with one row per shard and a total row
+
+    Args:
+        report: Report from merge_summaries
+
+    Returns:
+        Report text
+    """
+    header = (f"{'shard':>7} {'host':<16} {'files':>7} {'skipped':>7} {'failed':>6} "
+              f"{'records':>11} {'seconds':>9} {'files/s':>8} {'records/s':>10} {'MB/s':>7}")
+    lines = [header, '-' * len(header)]
+
+    def row(label: str, host: str, values: Dict[str, Any]) -> str:
+        return (f"{label:>7} {host[:16]:<16} {values['processed']:>7} {values['skipped']:>7} "
+                f"{values['failed']:>6} {values['records']:>11} {values['seconds']:>9.1f} "
+                f"{values['files_per_second']:>8.2f} {values['records_per_second']:>10.0f} "
+                f"{values['mb_per_second']:>7.2f}")
+
+    if not report['shards']:
+        return 'No shard summaries found'
+
+    for summary in report['shards']:
+        lines.append(row(summary['shard'] or 'all', summary['host'], summary))
+    lines.append('-' * len(header))
+    lines.append(row('total', '', report['totals']))
+
+    for summary in report['shards']:
+        for file_name in summary['failed_files']:
+            lines.append(f"FAILED {summary['shard'] or 'all'}: {file_name}")
+    if report['missing']:
+        count = report['shard_count']
+        missing = ', '.join(f'{index}/{count}' for index in report['missing'])
+        lines.append(f"MISSING shards: {missing}")
+    return '\n'.join(lines)
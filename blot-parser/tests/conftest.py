@@ -0,0 +1,20 @@
+"""
+Shared fixtures - tests run against the in-memory AWS stand-ins in benchmarks/stubs.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PARSER_DIR))
+sys.path.insert(0, str(PARSER_DIR / 'benchmarks'))
+
+from stubs import StubDynamoDBTable  # noqa: E402
+
+
+@pytest.fixture
+def table():
+    """Empty in-memory data table"""
+    return StubDynamoDBTable()
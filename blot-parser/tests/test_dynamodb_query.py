@@ -0,0 +1,174 @@
+"""
+Tests for dynamodb_query - pagination, file lookups, segmented export and the result cache
+"""
+
+import pytest
+from boto3.dynamodb.conditions import Attr
+
+from dynamodb_query import DynamoDBQuery, QueryCache
+from dynamodb_writer import UnprocessedKeysError
+
+
+class Clock:
+    """Settable monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def add_records(table, vendor, filename, count, manifest=False):
+    """Store a file's rows as save_to_dynamodb does, with an upsert manifest if asked"""
+    file_id = f"{vendor}_{filename}"
+    for i in range(count):
+        table.put_item(Item={'id': f"{file_id}_{i}", 'vendor': vendor, 'source_file': filename,
+                             'processed_at': f"2025-10-{1 + i % 28:02d} 09:00:{i % 60:02d}",
+                             'row': i})
+    if manifest:
+        table.put_item(Item={'id': f"{file_id}#manifest", 'item_type': 'file_manifest',
+                             'row_count': count})
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def query(table, clock):
+    return DynamoDBQuery(table, page_size=10, scan_segments=4,
+                         cache=QueryCache(max_entries=8, ttl=60, max_items=100, clock=clock))
+
+
+def test_query_vendor_reads_every_page_in_order(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 25)
+    add_records(table, 'platform', 'b.xlsx', 5)
+
+    items = list(query.query_vendor('bloomberg'))
+
+    assert len(items) == 25
+    processed_at = [item['processed_at'] for item in items]
+    assert processed_at == sorted(processed_at)
+    assert table.calls['Query'] == 3
+
+
+def test_query_vendor_bounds_and_order(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 28)
+
+    items = list(query.query_vendor('bloomberg', '2025-10-10', '2025-10-19 23:59:59',
+                                    newest_first=True, use_cache=False))
+
+    assert [item['processed_at'][:10] for item in items] == \
+        [f"2025-10-{day:02d}" for day in range(19, 9, -1)]
+
+
+def test_repeated_query_is_served_from_the_cache(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 25)
+    first = list(query.query_vendor('bloomberg', attributes=['id', 'row']))
+    calls = table.calls['Query']
+
+    first[0]['row'] = 'changed'
+    second = list(query.query_vendor('bloomberg', attributes=['id', 'row']))
+
+    assert table.calls['Query'] == calls
+    assert second[0]['row'] != 'changed'
+    assert query.cache.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+
+def test_cached_query_expires_after_the_ttl(table, query, clock):
+    add_records(table, 'bloomberg', 'a.xlsx', 5)
+    list(query.query_vendor('bloomberg'))
+
+    clock.now += 61
+    list(query.query_vendor('bloomberg'))
+
+    assert table.calls['Query'] == 2
+
+
+def test_partly_read_or_large_results_are_not_cached(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 150)
+
+    next(query.query_vendor('bloomberg', end='2025-10-05'))
+    list(query.query_vendor('bloomberg'))
+
+    assert query.cache.stats()['entries'] == 0
+
+
+def test_filtered_queries_bypass_the_cache(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 5)
+
+    for _ in range(2):
+        items = list(query.query_vendor('bloomberg', filter_expression=Attr('row').lt(2)))
+
+    assert len(items) == 2
+    assert table.calls['Query'] == 2
+    assert query.cache.stats()['entries'] == 0
+
+
+def test_file_records_with_manifest_are_read_by_id_in_row_order(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 30, manifest=True)
+    add_records(table, 'bloomberg', 'b.xlsx', 10)
+
+    items = list(query.file_records('bloomberg', 'a.xlsx', attributes=['row']))
+
+    assert items == [{'row': i} for i in range(30)]
+    assert table.calls['Query'] == 0
+    assert table.calls['BatchGetItem'] == 1
+
+
+def test_file_records_without_manifest_are_read_by_id_until_a_short_round(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 250)
+    add_records(table, 'bloomberg', 'b.xlsx', 12)
+
+    items = list(query.file_records('bloomberg', 'a.xlsx', attributes=['row', 'source_file']))
+
+    assert [item['row'] for item in items] == list(range(250))
+    assert {item['source_file'] for item in items} == {'a.xlsx'}
+    # Rounds of 100 and 200 ids, the second one short; the vendor partition is never queried
+    assert table.calls['Query'] == 0
+    assert table.calls['BatchGetItem'] == 3
+
+
+def test_file_records_without_manifest_stop_after_an_empty_round(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 100)
+
+    assert len(list(query.file_records('bloomberg', 'a.xlsx'))) == 100
+    assert list(query.file_records('bloomberg', 'missing.xlsx')) == []
+
+
+def test_file_records_raise_on_unread_rows_and_are_not_cached(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 30, manifest=True)
+    table.unprocessed_rate = 1.0
+    query.reader.base_delay = 0
+
+    with pytest.raises(UnprocessedKeysError):
+        list(query.file_records('bloomberg', 'a.xlsx'))
+
+    assert query.cache.stats()['entries'] == 0
+    table.unprocessed_rate = 0.0
+    assert len(list(query.file_records('bloomberg', 'a.xlsx'))) == 30
+
+
+def test_export_streams_every_record_from_all_segments(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 40, manifest=True)
+    add_records(table, 'platform', 'b.xlsx', 20)
+    table.put_item(Item={'id': 'event#s3://bucket/a.xlsx#abc#null', 'status': 'done'})
+
+    items = list(query.export())
+
+    assert len(items) == 60
+    assert all('vendor' in item for item in items)
+    assert table.calls['Scan'] >= 4
+
+
+def test_closing_an_export_early_stops_the_scan(table, query):
+    add_records(table, 'bloomberg', 'a.xlsx', 200)
+
+    export = query.export(segments=2)
+    first = [next(export) for _ in range(5)]
+    export.close()
+
+    assert len(first) == 5
+    assert table.calls['Scan'] < 20
@@ -0,0 +1,133 @@
+"""
+Tests for dynamodb_upsert - content-hash diffing, stale row deletes and the file manifest
+"""
+
+import pytest
+from botocore.exceptions import ClientError
+
+from dynamodb_upsert import DynamoDBUpserter, content_hash
+from dynamodb_writer import DynamoDBBatchWriter, UnprocessedKeysError
+
+FILE_ID = 'bloomberg_trades.xlsx'
+
+
+def make_rows(upserter, prices, processed_at='2025-10-01 09:00:00'):
+    return [{'id': upserter.item_id(i), 'vendor': 'bloomberg', 'source_file': 'trades.xlsx',
+             'price': price, 'processed_at': processed_at}
+            for i, price in enumerate(prices)]
+
+
+def upsert(table, prices, processed_at='2025-10-01 09:00:00', chunk_size=None):
+    """Upsert one upload of a file the way the Lambda does, chunk by chunk"""
+    upserter = DynamoDBUpserter(DynamoDBBatchWriter(table, max_workers=1, base_delay=0), FILE_ID)
+    upserter.begin()
+    rows = make_rows(upserter, prices, processed_at)
+    chunk_size = chunk_size or len(rows) or 1
+
+    totals = {'saved': 0, 'failed': 0, 'unchanged': 0}
+    for start in range(0, len(rows), chunk_size):
+        result = upserter.write_items(rows[start:start + chunk_size], start)
+        for name in totals:
+            totals[name] += result[name]
+    totals.update(upserter.finish(len(rows), 'trades.xlsx'))
+    return totals
+
+
+def test_content_hash_ignores_processing_time_and_attribute_order():
+    first = {'id': 'a', 'price': 1, 'processed_at': '2025-10-01'}
+    second = {'processed_at': '2025-10-02', 'price': 1, 'id': 'a'}
+
+    assert content_hash(first) == content_hash(second)
+    assert content_hash(first) != content_hash({**first, 'price': 2})
+
+
+def test_first_upload_writes_every_row_and_the_manifest(table):
+    result = upsert(table, [10, 20, 30])
+
+    assert result == {'saved': 3, 'failed': 0, 'unchanged': 0, 'deleted': 0}
+    manifest = table.items[f"{FILE_ID}#manifest"]
+    assert manifest['row_count'] == 3
+    assert 'vendor' not in manifest
+
+
+def test_reupload_skips_unchanged_rows(table):
+    upsert(table, [10, 20, 30])
+    writes = table.calls['BatchWriteItem']
+
+    result = upsert(table, [10, 20, 30], processed_at='2025-10-02 09:00:00')
+
+    assert result == {'saved': 0, 'failed': 0, 'unchanged': 3, 'deleted': 0}
+    # Only the manifest is written again; rows keep their original processed_at
+    assert table.calls['BatchWriteItem'] == writes + 1
+    assert table.items[f"{FILE_ID}_0"]['processed_at'] == '2025-10-01 09:00:00'
+
+
+def test_reupload_writes_only_changed_and_new_rows(table):
+    upsert(table, [10, 20, 30])
+
+    result = upsert(table, [10, 25, 30, 40], processed_at='2025-10-02 09:00:00', chunk_size=2)
+
+    assert result == {'saved': 2, 'failed': 0, 'unchanged': 2, 'deleted': 0}
+    assert table.items[f"{FILE_ID}_1"]['price'] == 25
+    assert table.items[f"{FILE_ID}_3"]['price'] == 40
+    assert table.items[f"{FILE_ID}#manifest"]['row_count'] == 4
+
+
+def test_shorter_reupload_deletes_rows_that_disappeared(table):
+    upsert(table, [10, 20, 30, 40])
+
+    result = upsert(table, [10, 20])
+
+    assert result['deleted'] == 2
+    assert f"{FILE_ID}_2" not in table.items
+    assert f"{FILE_ID}_3" not in table.items
+    assert table.items[f"{FILE_ID}#manifest"]['row_count'] == 2
+
+
+def test_failed_deletes_keep_the_old_row_count(table, monkeypatch):
+    upsert(table, [10, 20, 30, 40])
+    monkeypatch.setattr(DynamoDBBatchWriter, 'delete_keys',
+                        lambda self, keys: {'deleted': 0, 'failed': len(keys)})
+
+    result = upsert(table, [10, 20])
+
+    assert result['failed'] == 2
+    # The next upload sees the old count and retries the deletes
+    assert table.items[f"{FILE_ID}#manifest"]['row_count'] == 4
+    monkeypatch.undo()
+    assert upsert(table, [10, 20])['deleted'] == 2
+    assert table.items[f"{FILE_ID}#manifest"]['row_count'] == 2
+
+
+def test_failed_manifest_read_aborts_the_upsert(table, monkeypatch):
+    upsert(table, [10, 20, 30, 40])
+
+    def batch_get_item(RequestItems):
+        raise ClientError({'Error': {'Code': 'InternalServerError', 'Message': 'Failure'}},
+                          'BatchGetItem')
+
+    monkeypatch.setattr(table.meta.client, 'batch_get_item', batch_get_item)
+    with pytest.raises(ClientError):
+        upsert(table, [10, 20])
+
+    # Nothing was written, so the stale rows are still covered by the manifest
+    assert f"{FILE_ID}_3" in table.items
+    assert table.items[f"{FILE_ID}#manifest"]['row_count'] == 4
+    monkeypatch.undo()
+    assert upsert(table, [10, 20])['deleted'] == 2
+    assert f"{FILE_ID}_3" not in table.items
+
+
+def test_failed_hash_read_rewrites_the_chunk(table, monkeypatch):
+    upsert(table, [10, 20, 30])
+    upserter = DynamoDBUpserter(DynamoDBBatchWriter(table, max_workers=1, base_delay=0), FILE_ID)
+    upserter.begin()
+
+    def get_items(keys, attributes=None):
+        raise UnprocessedKeysError(keys)
+
+    monkeypatch.setattr(upserter.reader, 'get_items', get_items)
+
+    result = upserter.write_items(make_rows(upserter, [10, 20, 30]), 0)
+
+    assert result == {'saved': 3, 'failed': 0, 'unchanged': 0}
@@ -0,0 +1,124 @@
+"""
+Tests for dynamodb_writer - batched writes and deletes with retries and failure counts, and
+reads that raise instead of returning partial results
+"""
+
+import random
+
+import pytest
+from botocore.exceptions import ClientError
+
+from dynamodb_writer import DynamoDBBatchWriter, DynamoDBBatchReader, UnprocessedKeysError
+
+
+def make_items(count, prefix='row'):
+    return [{'id': f"{prefix}_{i}", 'value': i} for i in range(count)]
+
+
+def client_error(operation):
+    return ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException',
+                                  'Message': 'Rate exceeded'}}, operation)
+
+
+def test_write_items_uses_batches_of_25(table):
+    writer = DynamoDBBatchWriter(table, max_workers=1)
+
+    result = writer.write_items(make_items(60))
+
+    assert result == {'saved': 60, 'failed': 0}
+    assert len(table.items) == 60
+    assert table.calls['BatchWriteItem'] == 3
+
+
+def test_write_items_retries_unprocessed_items(table):
+    random.seed(7)
+    table.unprocessed_rate = 0.5
+    writer = DynamoDBBatchWriter(table, max_workers=1, max_retries=20, base_delay=0)
+
+    result = writer.write_items(make_items(60))
+
+    assert result == {'saved': 60, 'failed': 0}
+    assert len(table.items) == 60
+    assert table.calls['BatchWriteItem'] > 3
+
+
+def test_write_items_counts_items_still_unprocessed_after_retries(table):
+    table.unprocessed_rate = 1.0
+    writer = DynamoDBBatchWriter(table, max_workers=1, max_retries=2, base_delay=0)
+
+    result = writer.write_items(make_items(30))
+
+    assert result == {'saved': 0, 'failed': 30}
+    # Two batches, each tried once and retried twice
+    assert table.calls['BatchWriteItem'] == 6
+
+
+def test_write_items_counts_a_failed_call_as_failed_batch(table, monkeypatch):
+    calls = []
+
+    def batch_write_item(RequestItems):
+        calls.append(RequestItems)
+        if len(calls) == 1:
+            raise client_error('BatchWriteItem')
+        return {'UnprocessedItems': {}}
+
+    monkeypatch.setattr(table.meta.client, 'batch_write_item', batch_write_item)
+    writer = DynamoDBBatchWriter(table, max_workers=1, base_delay=0)
+
+    assert writer.write_items(make_items(30)) == {'saved': 5, 'failed': 25}
+
+
+def test_delete_keys(table):
+    writer = DynamoDBBatchWriter(table, max_workers=4)
+    writer.write_items(make_items(40))
+
+    result = writer.delete_keys([{'id': f"row_{i}"} for i in range(10, 40)])
+
+    assert result == {'deleted': 30, 'failed': 0}
+    assert sorted(table.items) == sorted(f"row_{i}" for i in range(10))
+
+
+def test_reader_returns_found_items_with_projection(table):
+    DynamoDBBatchWriter(table).write_items(make_items(150))
+    reader = DynamoDBBatchReader(table, max_workers=2)
+
+    keys = [{'id': f"row_{i}"} for i in range(140, 160)]
+    items = reader.get_items(keys, ['id'])
+
+    assert sorted(item['id'] for item in items) == sorted(f"row_{i}" for i in range(140, 150))
+    assert all(set(item) == {'id'} for item in items)
+
+
+def test_reader_retries_unprocessed_keys(table):
+    DynamoDBBatchWriter(table).write_items(make_items(250))
+    random.seed(3)
+    table.unprocessed_rate = 0.5
+    reader = DynamoDBBatchReader(table, max_workers=1, max_retries=20, base_delay=0)
+
+    items = reader.get_items([{'id': f"row_{i}"} for i in range(250)])
+
+    assert len(items) == 250
+    assert table.calls['BatchGetItem'] > 3
+
+
+def test_reader_raises_when_keys_stay_unprocessed(table):
+    DynamoDBBatchWriter(table).write_items(make_items(10))
+    table.unprocessed_rate = 1.0
+    reader = DynamoDBBatchReader(table, max_workers=1, max_retries=2, base_delay=0)
+
+    with pytest.raises(UnprocessedKeysError) as error:
+        reader.get_items([{'id': f"row_{i}"} for i in range(10)])
+
+    assert len(error.value.keys) == 10
+    assert table.calls['BatchGetItem'] == 3
+
+
+def test_reader_raises_client_errors(table, monkeypatch):
+    def batch_get_item(RequestItems):
+        raise client_error('BatchGetItem')
+
+    monkeypatch.setattr(table.meta.client, 'batch_get_item', batch_get_item)
+    reader = DynamoDBBatchReader(table, max_workers=1)
+
+    with pytest.raises(ClientError):
+        reader.get_items([{'id': 'row_0'}])
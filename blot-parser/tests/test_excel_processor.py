@@ -0,0 +1,62 @@
+"""
+Tests for excel_processor - the streaming reader yields the same records as the pandas reader
+"""
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+from excel_processor import ExcelProcessor
+from field_mapper import FieldMapper
+from generate_blots import generate_blot
+from record_pipeline import RecordPipeline
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+INPUT_FILES = sorted((PARSER_DIR.parent / 'Input-files').glob('*.xls*'))
+
+
+def read_records(path, reader_mode, vendor='bloomberg'):
+    """Read a workbook and map it to records the way BlotParser does"""
+    processor = ExcelProcessor(reader_mode=reader_mode)
+    pipeline = RecordPipeline(processor, FieldMapper(str(PARSER_DIR / 'mappings')))
+    records = []
+    summary = pipeline.run(processor.read_excel_file(path, vendor), path.name, vendor,
+                           records.extend)
+    return records, summary
+
+
+@pytest.mark.parametrize('path', INPUT_FILES, ids=lambda path: path.name)
+def test_sample_blots_read_the_same_in_both_modes(path):
+    vendor = path.name.split('-')[0]
+
+    assert read_records(path, 'streaming', vendor) == read_records(path, 'pandas', vendor)
+
+
+def test_synthetic_blot_reads_the_same_in_both_modes(tmp_path):
+    path = generate_blot(tmp_path / 'bloomberg-synthetic.xlsx', 'bloomberg', rows=200, sheets=2,
+                         extra_columns=3)
+
+    records, summary = read_records(path, 'streaming')
+
+    assert (records, summary) == read_records(path, 'pandas')
+    assert summary['total_records'] == 400
+
+
+def test_blanks_and_missing_markers_read_the_same_in_both_modes(tmp_path):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['BLOT Download For User 12345678'])
+    sheet.append([])
+    sheet.append(['Status', 'Security', 'Qty (M)', 'Price', 'Trade Dt', None, 'Notes'])
+    sheet.append(['Accepted', 'PEMEX 6 03/01/31', 1000.0, 99.5, datetime(2025, 3, 4), None, 'NA'])
+    sheet.append([None, None, None, None, None, None, None])
+    sheet.append(['Rejected', '', 250, 'N/A', datetime(2025, 3, 5), 'x', 7])
+    path = tmp_path / 'bloomberg-edge.xlsx'
+    workbook.save(path)
+
+    records, summary = read_records(path, 'streaming')
+
+    assert (records, summary) == read_records(path, 'pandas')
+    assert summary['total_records'] == 2
@@ -0,0 +1,48 @@
+"""
+Tests for field_mapper - columnar mapping matches the per-record mapping
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from field_mapper import FieldMapper
+
+MAPPINGS_DIR = Path(__file__).resolve().parent.parent / 'mappings'
+
+
+@pytest.fixture
+def mapper():
+    return FieldMapper(str(MAPPINGS_DIR))
+
+
+@pytest.fixture
+def sheet():
+    return pd.DataFrame({
+        'Status': ['Accepted', 'Rejected'],
+        'Qty (M)': [1000.0, 250.0],
+        'price ': [99.5, 101.25],
+        'Custom Field': ['a', 'b'],
+    })
+
+
+def test_map_dataframe_matches_map_records(mapper, sheet):
+    mapped = mapper.map_dataframe(sheet, 'bloomberg')
+
+    assert mapped.to_dict('records') == \
+        mapper.map_records(sheet.to_dict('records'), 'bloomberg')
+    assert list(mapped.columns) == ['trade_status', 'quantity', 'price', 'Custom Field']
+
+
+def test_map_dataframe_renames_without_touching_the_source(mapper, sheet):
+    mapped = mapper.map_dataframe(sheet, 'bloomberg')
+
+    assert list(sheet.columns) == ['Status', 'Qty (M)', 'price ', 'Custom Field']
+    assert mapped['quantity'].tolist() == sheet['Qty (M)'].tolist()
+    assert mapper.map_columns(list(sheet.columns), 'bloomberg') == list(mapped.columns)
+
+
+def test_unknown_vendor_is_returned_unmapped(mapper, sheet):
+    assert mapper.map_dataframe(sheet, 'no-such-vendor') is sheet
+    assert mapper.map_columns(['Status'], 'no-such-vendor') == ['Status']
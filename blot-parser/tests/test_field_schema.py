@@ -0,0 +1,81 @@
+"""
+Tests for field_schema - vectorized coercion of mapped system fields
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from field_schema import FieldSchema
+
+
+@pytest.fixture
+def schema():
+    return FieldSchema({'price': 'decimal', 'quantity': 'quantity', 'trade_id': 'identifier',
+                        'trade_date': 'date', 'sent_time': 'datetime', 'side': 'string'})
+
+
+def test_typed_columns_are_coerced(schema):
+    df = pd.DataFrame({
+        'price': ['99.5', 101, '--'],
+        'quantity': [1000.0, 250.0, None],
+        'trade_id': [146654552.0, 'T-17', 12.5],
+        'trade_date': [datetime(2025, 1, 30), '2025-02-03', None],
+        'sent_time': [datetime(2025, 1, 30, 13, 3, 30), datetime(2025, 1, 30, 9, 0, 0, 250000),
+                      None],
+        'side': ['[B]', '[S]', '--'],
+    })
+
+    coerced = schema.coerce_dataframe(df)
+
+    assert coerced['price'].tolist()[:2] == [99.5, 101.0]
+    assert pd.isna(coerced['price'][2])
+    assert coerced['quantity'].dtype == 'Int64'
+    assert coerced['quantity'].tolist()[:2] == [1000, 250]
+    assert coerced['trade_id'].tolist() == ['146654552', 'T-17', '12.5']
+    assert coerced['trade_date'].tolist()[:2] == ['2025-01-30', '2025-02-03']
+    assert coerced['sent_time'].tolist()[:2] == ['2025-01-30 13:03:30',
+                                                 '2025-01-30 09:00:00.250000']
+    # Placeholders only count as missing in typed columns
+    assert coerced['side'].tolist() == ['[B]', '[S]', '--']
+
+
+def test_partially_parseable_column_is_left_unchanged(schema):
+    df = pd.DataFrame({'price': ['99.5', 'see notes', '101'],
+                       'trade_date': ['2025-01-30', 'T+2', None],
+                       'quantity': [1000, 250, 500]})
+
+    coerced = schema.coerce_dataframe(df)
+
+    assert coerced['price'].tolist() == ['99.5', 'see notes', '101']
+    assert coerced['trade_date'].equals(df['trade_date'])
+    # Other typed columns of the same sheet are still coerced
+    assert coerced['quantity'].dtype == 'Int64'
+    assert df['price'].tolist() == ['99.5', 'see notes', '101']
+
+
+def test_fractional_quantities_stay_decimal(schema):
+    coerced = schema.coerce_dataframe(pd.DataFrame({'quantity': [1000.0, 2.5]}))
+
+    assert coerced['quantity'].dtype == 'float64'
+    assert coerced['quantity'].tolist() == [1000.0, 2.5]
+
+
+def test_untyped_sheet_is_returned_as_is(schema):
+    df = pd.DataFrame({'Custom Field': ['a'], 'side': ['[B]']})
+
+    assert schema.coerce_dataframe(df) is df
+
+
+def test_load_reads_generic_csv_and_rejects_unknown_types(tmp_path):
+    csv_file = tmp_path / 'generic.csv'
+    csv_file.write_text('system_field,description,type\nprice,Price,decimal\nnotes,Notes,\n')
+
+    schema = FieldSchema.load(csv_file)
+
+    assert schema.types == {'price': 'decimal', 'notes': 'string'}
+    assert schema.fingerprint
+    assert FieldSchema.load(tmp_path / 'missing.csv').types == {}
+    with pytest.raises(ValueError):
+        FieldSchema({'price': 'money'})
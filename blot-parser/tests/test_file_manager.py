@@ -0,0 +1,137 @@
+"""
+Tests for file_manager - input keys relative to the input root, sharding and the manifest
+"""
+
+import os
+
+import pytest
+
+from file_manager import FileManager
+from sharding import shard_of
+
+
+def touch(path, content=b'blot'):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_same_named_files_in_subdirectories_are_all_kept(tmp_path):
+    first = touch(tmp_path / 'in' / '2024' / 'bloomberg.xlsx')
+    second = touch(tmp_path / 'in' / '2025' / 'bloomberg.xlsx')
+    manager = FileManager(output_dir=str(tmp_path / 'out'),
+                          input_patterns=[str(tmp_path / 'in' / '20*' / '*.xlsx')])
+
+    assert manager.get_excel_files() == [first, second]
+    assert [manager.relative_name(path) for path in (first, second)] == [
+        '2024/bloomberg.xlsx', '2025/bloomberg.xlsx']
+    assert manager.output_path('2024/bloomberg.xlsx') == \
+        tmp_path / 'out' / '2024' / 'bloomberg.xlsx_data.json'
+
+
+def test_directory_input_and_input_dir_keys(tmp_path):
+    nested = touch(tmp_path / 'in' / 'q1' / 'a.xlsx')
+    flat = touch(tmp_path / 'in' / 'b.xlsx')
+
+    by_directory = FileManager(input_patterns=[str(tmp_path / 'in')])
+    by_input_dir = FileManager(input_dir=str(tmp_path / 'in'))
+
+    assert by_directory.get_excel_files() == [flat]
+    assert by_directory.relative_name(nested) == 'q1/a.xlsx'
+    assert by_input_dir.relative_name(flat) == 'b.xlsx'
+
+
+def test_same_relative_path_from_two_inputs_is_skipped(tmp_path):
+    first = touch(tmp_path / 'a' / 'x.xlsx')
+    touch(tmp_path / 'b' / 'x.xlsx')
+    manager = FileManager(input_patterns=[str(tmp_path / 'a'), str(tmp_path / 'b')])
+
+    assert manager.get_excel_files() == [first]
+
+
+def test_shard_assignment_is_stable_and_covers_every_file(tmp_path):
+    names = [f"20{year}/q{quarter}/bloomberg.xlsx" for year in range(10, 30) for quarter in (1, 4)]
+    for name in names:
+        touch(tmp_path / 'in' / name)
+    pattern = str(tmp_path / 'in' / '**' / '*.xlsx')
+
+    shards = [FileManager(input_patterns=[pattern], shard=(index, 4)).get_excel_files()
+              for index in (1, 2, 3, 4)]
+
+    assert sorted(path for files in shards for path in files) == \
+        sorted(tmp_path / 'in' / name for name in names)
+    # Fixed values: the hash must not change between machines or Python versions
+    assert [shard_of(name, 4) for name in names[:4]] == [2, 1, 1, 4]
+
+
+def test_manifest_keys_by_relative_path(tmp_path):
+    source = touch(tmp_path / 'in' / 'q1' / 'a.xlsx')
+    touch(tmp_path / 'in' / 'q2' / 'a.xlsx')
+    manager = FileManager(output_dir=str(tmp_path / 'out'),
+                          input_patterns=[str(tmp_path / 'in' / '*' / '*.xlsx')])
+    touch(manager.output_path('q1/a.xlsx'), b'[]')
+
+    manager.record_processed(source, 'mapping-v1', manager.snapshot(source))
+
+    assert manager.is_up_to_date(source, 'mapping-v1')
+    assert not manager.is_up_to_date(tmp_path / 'in' / 'q2' / 'a.xlsx', 'mapping-v1')
+    assert manager.load_manifest()['q1/a.xlsx']['output_file'] == 'q1/a.xlsx_data.json'
+
+
+def processed(tmp_path, content=b'blot'):
+    """A manager whose manifest records one processed input file"""
+    source = touch(tmp_path / 'in' / 'a.xlsx', content)
+    manager = FileManager(input_dir=str(tmp_path / 'in'), output_dir=str(tmp_path / 'out'))
+    touch(manager.output_path('a.xlsx'), b'[]')
+    manager.record_processed(source, 'mapping-v1', manager.snapshot(source))
+    manager.save_manifest()
+    return manager, source
+
+
+def reloaded(manager):
+    return FileManager(input_dir=str(manager.input_dir), output_dir=str(manager.output_dir))
+
+
+def test_unchanged_file_is_up_to_date_after_a_restart(tmp_path):
+    manager, source = processed(tmp_path)
+
+    assert reloaded(manager).is_up_to_date(source, 'mapping-v1')
+
+
+def test_touched_file_with_the_same_content_is_up_to_date(tmp_path, monkeypatch):
+    manager, source = processed(tmp_path)
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    manager = reloaded(manager)
+
+    assert manager.is_up_to_date(source, 'mapping-v1')
+    # The new mtime is remembered, so the next check does not hash the file again
+    monkeypatch.setattr(FileManager, 'hash_file', staticmethod(lambda path: pytest.fail()))
+    assert manager.is_up_to_date(source, 'mapping-v1')
+
+
+def test_changed_content_mapping_or_missing_output_is_not_up_to_date(tmp_path):
+    manager, source = processed(tmp_path)
+
+    assert not manager.is_up_to_date(source, 'mapping-v2')
+
+    manager.output_path('a.xlsx').unlink()
+    assert not manager.is_up_to_date(source, 'mapping-v1')
+
+    manager, source = processed(tmp_path / 'rewritten')
+    stat = source.stat()
+    source.write_bytes(b'BLOT')
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert not manager.is_up_to_date(source, 'mapping-v1')
+
+
+def test_write_during_processing_is_picked_up_by_the_next_run(tmp_path):
+    source = touch(tmp_path / 'in' / 'a.xlsx')
+    manager = FileManager(input_dir=str(tmp_path / 'in'), output_dir=str(tmp_path / 'out'))
+    snapshot = manager.snapshot(source)
+    # The file is replaced after it was fingerprinted but before it is recorded
+    source.write_bytes(b'newer blot')
+    touch(manager.output_path('a.xlsx'), b'[]')
+    manager.record_processed(source, 'mapping-v1', snapshot)
+
+    assert not manager.is_up_to_date(source, 'mapping-v1')
@@ -0,0 +1,107 @@
+"""
+Tests for idempotency - claiming, completing and releasing per-object-version markers
+"""
+
+from idempotency import IdempotencyGuard, IN_PROGRESS, DONE
+
+
+class Clock:
+    """Settable epoch clock"""
+
+    def __init__(self, now=1_700_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_guard(table, clock=None):
+    return IdempotencyGuard(table, in_progress_ttl=300, done_ttl=3600, claim_margin=30,
+                            clock=clock or Clock())
+
+
+def test_marker_id_ignores_etag_quotes():
+    with_quotes = IdempotencyGuard.marker_id('bucket', 'uploads/a.xlsx', '"abc"', 'v1')
+
+    assert with_quotes == IdempotencyGuard.marker_id('bucket', 'uploads/a.xlsx', 'abc', 'v1')
+    assert IdempotencyGuard.marker_id('bucket', 'uploads/a.xlsx', 'abc').endswith('#abc#null')
+
+
+def test_second_claim_sees_the_marker_in_progress(table):
+    guard = make_guard(table)
+    marker_id = guard.marker_id('bucket', 'a.xlsx', 'abc')
+
+    first = guard.claim(marker_id, 'a.xlsx')
+    second = guard.claim(marker_id, 'a.xlsx')
+
+    assert first['claimed']
+    assert second == {'claimed': False, 'status': IN_PROGRESS, 'result': None}
+    assert 'vendor' not in table.items[marker_id]
+
+
+def test_completed_marker_returns_the_earlier_result(table):
+    guard = make_guard(table)
+    marker_id = guard.marker_id('bucket', 'a.xlsx', 'abc')
+    claim = guard.claim(marker_id, 'a.xlsx')
+    result = {'status': 'success', 'file': 'a.xlsx', 'records_processed': 3}
+
+    assert guard.complete(marker_id, claim['token'], result)
+
+    assert guard.claim(marker_id, 'a.xlsx') == {'claimed': False, 'status': DONE, 'result': result}
+
+
+def test_released_marker_can_be_claimed_again(table):
+    guard = make_guard(table)
+    marker_id = guard.marker_id('bucket', 'a.xlsx', 'abc')
+    claim = guard.claim(marker_id, 'a.xlsx')
+
+    assert guard.release(marker_id, claim['token'])
+
+    assert marker_id not in table.items
+    assert guard.claim(marker_id, 'a.xlsx')['claimed']
+
+
+def test_expired_marker_is_reclaimed_and_the_old_owner_loses_it(table):
+    clock = Clock()
+    guard = make_guard(table, clock)
+    marker_id = guard.marker_id('bucket', 'a.xlsx', 'abc')
+    stale = guard.claim(marker_id, 'a.xlsx')
+
+    clock.now += 301
+    fresh = guard.claim(marker_id, 'a.xlsx')
+
+    assert fresh['claimed']
+    assert not guard.complete(marker_id, stale['token'], {'status': 'success', 'file': 'a.xlsx'})
+    assert not guard.release(marker_id, stale['token'])
+    assert table.items[marker_id]['owner'] == fresh['token']
+    assert guard.complete(marker_id, fresh['token'], {'status': 'success', 'file': 'a.xlsx'})
+
+
+def test_done_marker_expires_after_its_ttl(table):
+    clock = Clock()
+    guard = make_guard(table, clock)
+    marker_id = guard.marker_id('bucket', 'a.xlsx', 'abc')
+    guard.complete(marker_id, guard.claim(marker_id, 'a.xlsx')['token'], {'file': 'a.xlsx'})
+
+    clock.now += 3601
+
+    assert guard.claim(marker_id, 'a.xlsx')['claimed']
+
+
+def test_claim_of_a_timed_out_owner_is_reclaimed_after_the_margin(table):
+    clock = Clock()
+    guard = make_guard(table, clock)
+    marker_id = guard.marker_id('bucket', 'a.xlsx', 'abc')
+    # The owner's invocation times out 60 s after its claim
+    stale = guard.claim(marker_id, 'a.xlsx', deadline=clock.now + 60)
+
+    assert table.items[marker_id]['expires_at'] == clock.now + 90
+    clock.now += 89
+    assert guard.claim(marker_id, 'a.xlsx')['status'] == IN_PROGRESS
+
+    clock.now += 2
+    fresh = guard.claim(marker_id, 'a.xlsx', deadline=clock.now + 60)
+
+    assert fresh['claimed']
+    assert not guard.complete(marker_id, stale['token'], {'status': 'success', 'file': 'a.xlsx'})
+    assert table.items[marker_id]['owner'] == fresh['token']
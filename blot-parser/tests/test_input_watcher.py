@@ -0,0 +1,125 @@
+"""
+Tests for input_watcher and watch mode - files are processed once they have settled
+"""
+
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import input_watcher
+from blot_parser import BlotParser
+from file_manager import FileManager
+from input_watcher import InputWatcher
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+SAMPLE_BLOT = PARSER_DIR.parent / 'Input-files' / 'bloomberg-vcon2211-fixed-income.xlsx'
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(input_watcher.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def watcher(tmp_path, clock):
+    return InputWatcher(FileManager(input_dir=str(tmp_path)), settle_seconds=2)
+
+
+def copy_blot(path):
+    shutil.copyfile(SAMPLE_BLOT, path)
+    return path
+
+
+def test_new_file_is_reported_once_after_it_settles(tmp_path, watcher, clock):
+    blot = copy_blot(tmp_path / 'bloomberg-a.xlsx')
+
+    assert watcher.poll() == []
+    clock.now += 1
+    assert watcher.poll() == []
+    clock.now += 1
+    assert watcher.poll() == [blot]
+    clock.now += 10
+    assert watcher.poll() == []
+
+
+def test_changed_or_restored_file_is_reported_again(tmp_path, watcher, clock):
+    blot = copy_blot(tmp_path / 'bloomberg-a.xlsx')
+    watcher.poll()
+    clock.now += 2
+    assert watcher.poll() == [blot]
+
+    with open(blot, 'ab') as f:
+        f.write(b'\0')
+    assert watcher.poll() == []
+    clock.now += 2
+    assert watcher.poll() == [blot]
+
+    blot.unlink()
+    assert watcher.poll() == []
+    copy_blot(blot)
+    watcher.poll()
+    clock.now += 2
+    assert watcher.poll() == [blot]
+
+
+def test_lock_files_hidden_files_and_other_formats_are_ignored(tmp_path, watcher, clock):
+    for name in ('~$bloomberg-a.xlsx', '.bloomberg-a.xlsx.part', 'notes.txt'):
+        (tmp_path / name).write_bytes(b'x')
+    watcher.poll()
+    clock.now += 100
+
+    assert watcher.poll() == []
+
+
+def test_incomplete_workbook_waits_before_it_is_reported(tmp_path, watcher, clock):
+    truncated = tmp_path / 'bloomberg-a.xlsx'
+    truncated.write_bytes(SAMPLE_BLOT.read_bytes()[:1000])
+    watcher.poll()
+
+    clock.now += 2
+    assert watcher.poll() == []
+    # A stable but truncated upload is handed to the parser eventually, to fail there
+    clock.now += 18
+    assert watcher.poll() == [truncated]
+
+
+def test_watch_processes_arrivals_and_records_them(tmp_path, monkeypatch):
+    monkeypatch.chdir(PARSER_DIR)
+    input_dir, output_dir = tmp_path / 'in', tmp_path / 'out'
+    input_dir.mkdir()
+    parser = BlotParser(str(input_dir), str(output_dir), workers=1)
+    stop_event = threading.Event()
+    thread = threading.Thread(target=parser.watch, daemon=True,
+                              kwargs={'poll_interval': 0.05, 'settle_seconds': 0.1,
+                                      'stop_event': stop_event})
+    thread.start()
+    try:
+        blot = copy_blot(input_dir / SAMPLE_BLOT.name)
+        output = output_dir / f"{SAMPLE_BLOT.name}_data.json"
+        deadline = time.monotonic() + 30
+        while not parser.file_manager.load_manifest() and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop_event.set()
+        thread.join(timeout=30)
+
+    assert not thread.is_alive()
+    assert output.exists()
+    assert list(parser.file_manager.load_manifest()) == [blot.name]
+    assert FileManager(str(input_dir), str(output_dir)).is_up_to_date(
+        blot, parser._output_fingerprint('bloomberg'))
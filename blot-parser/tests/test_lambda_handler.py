@@ -0,0 +1,72 @@
+"""
+Tests for lambda_handler - idempotent handling of S3 event deliveries
+"""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from idempotency import DuplicateInProgressError
+from stubs import StubS3Client, StubDynamoDBResource
+
+BUCKET = 'blot-parser-input'
+KEY = 'uploads/bloomberg-trades.xlsx'
+PARSER_DIR = Path(__file__).resolve().parent.parent
+
+
+class Context:
+    """Lambda context stand-in with a fixed remaining time"""
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    """lambda_handler module wired to in-memory S3 and DynamoDB"""
+    monkeypatch.chdir(PARSER_DIR)
+    import lambda_handler
+    monkeypatch.setattr(lambda_handler, '_s3_client', StubS3Client())
+    monkeypatch.setattr(lambda_handler, '_dynamodb', StubDynamoDBResource())
+    monkeypatch.setattr(lambda_handler, '_parser', None)
+    return lambda_handler
+
+
+def upload_event(handler):
+    etag = handler.get_s3_client().put_object(Bucket=BUCKET, Key=KEY, Body=b'blot')['ETag']
+    record = {'s3': {'bucket': {'name': BUCKET}, 'object': {'key': KEY, 'eTag': etag.strip('"')}}}
+    return {'Records': [record]}, etag
+
+
+def test_claim_expires_shortly_after_the_invocation_deadline(handler, monkeypatch):
+    parser = handler.get_parser()
+    event, etag = upload_event(handler)
+    marker_id = parser.idempotency_guard.marker_id(BUCKET, KEY, etag)
+    expiries = []
+
+    def process(bucket, key, etag=None, version_id=None):
+        expiries.append(parser.dynamodb_table.items[marker_id]['expires_at'])
+        return {'status': 'success', 'file': 'bloomberg-trades.xlsx'}
+
+    monkeypatch.setattr(parser, '_process_s3_file', process)
+    now = time.time()
+    response = handler.lambda_handler(event, Context(remaining_ms=60_000))
+
+    assert response['statusCode'] == 200
+    assert now + 60 + handler.CLAIM_MARGIN <= expiries[0] <= time.time() + 61 + handler.CLAIM_MARGIN
+
+
+def test_delivery_claimed_by_a_running_attempt_is_retried(handler):
+    parser = handler.get_parser()
+    event, etag = upload_event(handler)
+    marker_id = parser.idempotency_guard.marker_id(BUCKET, KEY, etag)
+    parser.idempotency_guard.claim(marker_id, 'bloomberg-trades.xlsx', time.time() + 300)
+
+    with pytest.raises(DuplicateInProgressError) as error:
+        handler.lambda_handler(event, Context(remaining_ms=60_000))
+
+    assert error.value.marker_ids == [marker_id]
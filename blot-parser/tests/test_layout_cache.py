@@ -0,0 +1,90 @@
+"""
+Tests for layout_cache - bounded LRU entries and header/plan hits and misses while reading
+"""
+
+import pickle
+from pathlib import Path
+
+import pytest
+
+from excel_processor import ExcelProcessor
+from field_mapper import FieldMapper
+from generate_blots import generate_blot
+from layout_cache import ColumnPlan, HeaderLayout, LayoutCache, header_signature
+from record_pipeline import RecordPipeline
+
+MAPPINGS_DIR = Path(__file__).resolve().parent.parent / 'mappings'
+
+
+def test_header_layouts_keep_the_most_recent_per_key():
+    cache = LayoutCache(max_entries=2)
+    for row, header in enumerate((['a'], ['b'], ['c'])):
+        cache.put_header('bloomberg:pandas', HeaderLayout(row, header_signature(header)))
+
+    assert cache.get_header('bloomberg:pandas').header_row == 2
+    assert cache.known_signatures('bloomberg:pandas') == {
+        header_signature(['b']), header_signature(['c'])}
+    assert cache.get_header('platform:pandas') is None
+
+
+def test_least_recently_used_layout_key_is_evicted():
+    cache = LayoutCache(max_entries=2)
+    for vendor in ('a', 'b'):
+        cache.put_header(vendor, HeaderLayout(0, vendor))
+    cache.get_header('a')
+    cache.put_header('c', HeaderLayout(0, 'c'))
+
+    assert [cache.get_header(key) is not None for key in 'abc'] == [True, False, True]
+
+
+def test_column_plan_is_built_once_per_key():
+    cache = LayoutCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return ColumnPlan(['price', 'Notes'], ['decimal', None])
+
+    plans = [cache.column_plan(('bloomberg', 'fp', 'sig'), build) for _ in range(3)]
+
+    assert len(builds) == 1 and plans[0] is plans[2]
+    assert plans[0].typed_positions() == [(0, 'decimal')]
+    assert cache.stats() == {'header_hits': 0, 'header_misses': 0, 'plan_hits': 2,
+                             'plan_misses': 1}
+    assert pickle.loads(pickle.dumps(cache)).stats() == cache.stats()
+
+
+@pytest.fixture(scope='module')
+def blots(tmp_path_factory):
+    """Two files of the same layout and one with an extra blank row above the header"""
+    work_dir = tmp_path_factory.mktemp('blots')
+    return [generate_blot(work_dir / name, 'bloomberg', rows=30, sheets=2, blank_rows=blank_rows,
+                          seed=seed)
+            for name, blank_rows, seed in (('bloomberg-1.xlsx', 1, 1), ('bloomberg-2.xlsx', 1, 2),
+                                           ('bloomberg-3.xlsx', 2, 3))]
+
+
+def read_records(processor, path):
+    records = []
+    RecordPipeline(processor, FieldMapper(str(MAPPINGS_DIR))).run(
+        processor.read_excel_file(path, 'bloomberg'), path.name, 'bloomberg', records.extend)
+    return records
+
+
+@pytest.mark.parametrize('reader_mode', ['pandas', 'streaming'])
+def test_repeat_layouts_hit_and_give_the_uncached_records(blots, reader_mode):
+    processor = ExcelProcessor(reader_mode=reader_mode)
+
+    for path in blots:
+        assert read_records(processor, path) == \
+            read_records(ExcelProcessor(reader_mode=reader_mode), path)
+
+    stats = processor.layout_cache.stats()
+    # Every sheet has the same header, so all six sheets share one column plan
+    assert (stats['plan_hits'], stats['plan_misses']) == (5, 1)
+    if reader_mode == 'pandas':
+        # Per workbook: file 2 is read at the cached row, file 3's header row has moved
+        assert (stats['header_hits'], stats['header_misses']) == (1, 2)
+    else:
+        # Per sheet, and blank rows are skipped, so only the very first sheet is scanned
+        assert (stats['header_hits'], stats['header_misses']) == (5, 1)
@@ -0,0 +1,45 @@
+"""
+Tests for mapping_registry - normalized header lookups and the bounded lookup memo
+"""
+
+import pickle
+
+from mapping_registry import CompiledMapping
+
+
+def make_mapping(max_lookups=1024):
+    return CompiledMapping('bloomberg', {'Qty_M': 'quantity', 'Px': 'price'}, 'fp',
+                           max_lookups=max_lookups)
+
+
+def test_lookup_matches_exact_then_normalized_headers():
+    mapping = make_mapping()
+
+    assert mapping.lookup('Qty_M') == 'quantity'
+    assert mapping.lookup('qty (m) ') == 'quantity'
+    assert mapping.lookup('Unmapped') is None
+    assert mapping.lookup(['unhashable']) is None
+
+
+def test_lookup_memo_keeps_only_the_most_recent_headers():
+    mapping = make_mapping(max_lookups=3)
+
+    for header in ('Px', 'Qty_M', 'a', 'b'):
+        mapping.lookup(header)
+    mapping.lookup('Qty_M')
+    mapping.lookup('c')
+
+    assert list(mapping._lookups) == ['b', 'Qty_M', 'c']
+    # Evicted headers still resolve, they are just recomputed
+    assert mapping.lookup('Px') == 'price'
+    assert len(mapping._lookups) == 3
+
+
+def test_mapping_pickles_for_sheet_worker_processes():
+    mapping = make_mapping()
+    mapping.lookup('Px')
+
+    copy = pickle.loads(pickle.dumps(mapping))
+
+    assert copy.lookup('px') == 'price'
+    assert copy._lookups['Px'] == 'price'
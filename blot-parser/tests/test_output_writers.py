@@ -0,0 +1,67 @@
+"""
+Tests for output_writers - Parquet part roll-over and value parity with JSON output
+"""
+
+import json
+
+import pytest
+
+from output_writers import ParquetWriter, create_writer
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+
+def write_parquet(output_file, chunks):
+    with ParquetWriter(output_file) as writer:
+        for chunk in chunks:
+            writer.write_records(chunk)
+    return writer
+
+
+def test_changed_layout_rolls_over_to_a_new_part(tmp_path):
+    output_file = tmp_path / 'a_data.parquet'
+
+    writer = write_parquet(output_file, [[{'price': 1.5}], [{'trader': 'x'}], [{'qty': 3}]])
+
+    assert [path.name for path in writer.output_files] == [
+        'a_data.parquet', 'a_data.1.parquet', 'a_data.2.parquet']
+    assert pq.read_table(tmp_path / 'a_data.2.parquet').to_pylist() == [{'qty': 3}]
+
+
+def test_rerun_with_fewer_parts_removes_the_stale_ones(tmp_path):
+    output_file = tmp_path / 'a_data.parquet'
+    other = tmp_path / 'b_data.1.parquet'
+    other.write_bytes(b'another output')
+    write_parquet(output_file, [[{'price': 1.5}], [{'trader': 'x'}], [{'qty': 3}]])
+
+    write_parquet(output_file, [[{'price': 2.5}], [{'trader': 'y'}]])
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'a_data.1.parquet', 'a_data.parquet', 'b_data.1.parquet']
+    assert pq.read_table(tmp_path / 'a_data.1.parquet').to_pylist() == [{'trader': 'y'}]
+
+
+def test_failed_rerun_keeps_the_previous_parts(tmp_path):
+    output_file = tmp_path / 'a_data.parquet'
+    write_parquet(output_file, [[{'price': 1.5}], [{'trader': 'x'}]])
+
+    with pytest.raises(RuntimeError):
+        with ParquetWriter(output_file) as writer:
+            writer.write_records([{'price': 2.5}])
+            raise RuntimeError('read failed')
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        'a_data.1.parquet', 'a_data.parquet']
+    assert pq.read_table(output_file).to_pylist() == [{'price': 1.5}]
+
+
+def test_empty_strings_match_json_output_in_string_columns(tmp_path):
+    records = [{'trader': '', 'price': 1.5}, {'trader': 'x', 'price': ''}]
+    with create_writer('json', tmp_path / 'a_data.json') as writer:
+        writer.write_records([dict(record) for record in records])
+    write_parquet(tmp_path / 'a_data.parquet', [records])
+
+    assert json.loads((tmp_path / 'a_data.json').read_text()) == records
+    # The blank price becomes null so the column stays numeric
+    assert pq.read_table(tmp_path / 'a_data.parquet').to_pylist() == [
+        {'trader': '', 'price': 1.5}, {'trader': 'x', 'price': None}]
@@ -0,0 +1,91 @@
+"""
+Tests for projection pushdown - reading only mapped columns gives the projected full records
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+from blot_parser import BlotParser
+from excel_processor import ExcelProcessor, NoProjectedColumnsError
+from field_mapper import FieldMapper
+from generate_blots import generate_blot
+from record_pipeline import RecordPipeline
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+MODES = ['pandas', 'streaming']
+
+
+@pytest.fixture
+def mapper():
+    return FieldMapper(str(PARSER_DIR / 'mappings'))
+
+
+@pytest.fixture(scope='module')
+def blot(tmp_path_factory):
+    return generate_blot(tmp_path_factory.mktemp('blots') / 'bloomberg-synthetic.xlsx',
+                         'bloomberg', rows=40, sheets=2, extra_columns=4)
+
+
+def unmapped_workbook(path, sheets):
+    """A workbook whose named sheets have only unmapped columns"""
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for name, header in sheets.items():
+        sheet = workbook.create_sheet(name)
+        sheet.append(header)
+        sheet.append([f"{column} value" for column in header])
+    workbook.save(path)
+    return path
+
+
+def read_records(mapper, path, reader_mode, column_filter=None):
+    processor = ExcelProcessor(reader_mode=reader_mode)
+    records = []
+    RecordPipeline(processor, mapper).run(
+        processor.read_excel_file(path, 'bloomberg', column_filter), path.name, 'bloomberg',
+        records.extend)
+    return records
+
+
+@pytest.mark.parametrize('reader_mode', MODES)
+@pytest.mark.parametrize('fields', [None, ['isin', 'price', 'trade_date']])
+def test_projected_read_equals_projecting_the_full_records(mapper, blot, reader_mode, fields):
+    full = read_records(mapper, blot, reader_mode)
+    kept = set(fields) if fields else set(mapper.get_vendor_mapping('bloomberg').values())
+
+    projected = read_records(mapper, blot, reader_mode, mapper.column_filter('bloomberg', fields))
+
+    assert projected == [{key: value for key, value in record.items()
+                          if key in kept or key == 'file_name'} for record in full]
+    assert 'Custom Field 0' in full[0] and 'Custom Field 0' not in projected[0]
+
+
+@pytest.mark.parametrize('reader_mode', MODES)
+def test_sheets_without_mapped_columns_are_skipped(mapper, tmp_path, reader_mode):
+    path = unmapped_workbook(tmp_path / 'bloomberg-mixed.xlsx',
+                             {'Notes': ['Comment'], 'Trades': ['Status', 'Comment']})
+    processor = ExcelProcessor(reader_mode=reader_mode)
+
+    excel_data = processor.read_excel_file(path, 'bloomberg', mapper.column_filter('bloomberg'))
+
+    assert list(excel_data) == ['Trades']
+    assert list(excel_data['Trades'].columns) == ['Status']
+
+    path = unmapped_workbook(tmp_path / 'bloomberg-notes.xlsx', {'Notes': ['Comment']})
+    with pytest.raises(NoProjectedColumnsError):
+        processor.read_excel_file(path, 'bloomberg', mapper.column_filter('bloomberg'))
+
+
+def test_workbook_without_mapped_columns_is_saved_empty(tmp_path, monkeypatch):
+    monkeypatch.chdir(PARSER_DIR)
+    path = unmapped_workbook(tmp_path / 'bloomberg-notes.xlsx', {'Notes': ['Comment']})
+    parser = BlotParser(str(tmp_path), str(tmp_path / 'out'), projection_mode='mapped')
+
+    file_data = parser.process_and_save_file(path)
+
+    assert file_data['status'] == 'no_mapped_columns'
+    assert 'error' not in file_data
+    assert json.loads((tmp_path / 'out' / 'bloomberg-notes.xlsx_data.json').read_text()) == []
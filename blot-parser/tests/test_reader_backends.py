@@ -0,0 +1,71 @@
+"""
+Tests for reader_backends - engine selection and identical records from every engine
+"""
+
+from pathlib import Path
+
+import pytest
+
+from excel_processor import ExcelProcessor
+from field_mapper import FieldMapper
+from generate_blots import generate_blot
+from reader_backends import BACKENDS, CalamineBackend, OpenpyxlBackend, XlrdBackend, \
+    select_backend
+from record_pipeline import RecordPipeline
+
+MAPPINGS_DIR = Path(__file__).resolve().parent.parent / 'mappings'
+
+
+def installed(*names):
+    return [name if BACKENDS[name].available() else
+            pytest.param(name, marks=pytest.mark.skip(reason=f"{name} not installed"))
+            for name in names]
+
+
+def read_records(path, reader_mode, reader_engine):
+    processor = ExcelProcessor(reader_mode=reader_mode, reader_engine=reader_engine)
+    records = []
+    RecordPipeline(processor, FieldMapper(str(MAPPINGS_DIR))).run(
+        processor.read_excel_file(path, 'bloomberg'), path.name, 'bloomberg', records.extend)
+    return records
+
+
+@pytest.fixture(scope='module')
+def blot(tmp_path_factory):
+    return generate_blot(tmp_path_factory.mktemp('blots') / 'bloomberg-synthetic.xlsx',
+                         'bloomberg', rows=100, sheets=2, extra_columns=2)
+
+
+@pytest.mark.parametrize('reader_mode', ['pandas', 'streaming'])
+@pytest.mark.parametrize('reader_engine', installed('calamine'))
+def test_engines_give_the_same_records_as_openpyxl(blot, reader_mode, reader_engine):
+    expected = read_records(blot, 'pandas', 'openpyxl')
+
+    assert len(expected) == 200
+    assert read_records(blot, reader_mode, reader_engine) == expected
+
+
+def test_auto_prefers_calamine_then_the_extension_default(monkeypatch):
+    monkeypatch.setattr(CalamineBackend, 'available', classmethod(lambda cls: True))
+    assert isinstance(select_backend('a.xlsx'), CalamineBackend)
+    assert isinstance(select_backend('a.xls'), CalamineBackend)
+
+    monkeypatch.setattr(CalamineBackend, 'available', classmethod(lambda cls: False))
+    monkeypatch.setattr(XlrdBackend, 'available', classmethod(lambda cls: True))
+    assert isinstance(select_backend('a.xlsx'), OpenpyxlBackend)
+    assert isinstance(select_backend('a.XLS'), XlrdBackend)
+
+
+def test_forced_engine_must_exist_read_the_extension_and_be_installed(monkeypatch):
+    assert isinstance(select_backend('a.xlsx', 'openpyxl'), OpenpyxlBackend)
+    with pytest.raises(ValueError, match='Unsupported reader engine'):
+        select_backend('a.xlsx', 'pyexcel')
+    with pytest.raises(ValueError, match="cannot read '.xls' files"):
+        select_backend('a.xls', 'openpyxl')
+
+    monkeypatch.setattr(CalamineBackend, 'available', classmethod(lambda cls: False))
+    with pytest.raises(ImportError):
+        select_backend('a.xlsx', 'calamine')
+    monkeypatch.setattr(XlrdBackend, 'available', classmethod(lambda cls: False))
+    with pytest.raises(ValueError, match='No installed reader engine'):
+        select_backend('a.xls')
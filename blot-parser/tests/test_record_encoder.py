@@ -0,0 +1,77 @@
+"""
+Tests for record_encoder - column-wise encoding and byte-identical JSON backends
+"""
+
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+
+from output_writers import JsonArrayWriter, NdjsonWriter
+from record_encoder import JsonSerializer, RecordEncoder, json_default, orjson
+
+BACKENDS = ['stdlib', pytest.param('orjson', marks=pytest.mark.skipif(
+    orjson is None, reason='orjson not installed'))]
+
+RECORDS = [
+    {'security_name': 'ROMANI 4 04/05/31 REGS', 'quantity': 1000, 'price': 99.5,
+     'yield': 1e-07, 'settlement_amount': 1.0e16, 'trade_side': '[B]', 'accepted': True,
+     'account': None},
+    {'security_name': 'TÜRKİYE 5 ⅞ 2030', 'quantity': 2 ** 70, 'price': 0.1,
+     'yield': -0.0, 'settlement_amount': Decimal('12.50'), 'trade_side': '"quoted" \\ \t',
+     'accepted': False, 'account': pd.Timestamp('2025-01-30 13:03:30')},
+    {'security_name': None, 'quantity': 0, 'price': 0.00012, 'yield': 1e-05,
+     'settlement_amount': 9999999999999998.0, 'trade_side': '1e5', 'accepted': None,
+     'account': float('nan')},
+]
+
+
+def write(writer_class, output_file, backend):
+    with writer_class(output_file, serializer=JsonSerializer(backend)) as writer:
+        writer.write_records(RECORDS[:1])
+        writer.write_records(RECORDS[1:])
+    return output_file.read_bytes()
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_json_output_equals_json_dump(tmp_path, backend):
+    expected = json.dumps(RECORDS, indent=2, default=json_default).encode('utf-8')
+
+    assert write(JsonArrayWriter, tmp_path / 'a_data.json', backend) == expected
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_ndjson_output_equals_compact_json_dumps(tmp_path, backend):
+    expected = b''.join(json.dumps(record, separators=(',', ':'), ensure_ascii=False,
+                                   default=json_default).encode('utf-8') + b'\n'
+                        for record in RECORDS)
+
+    assert write(NdjsonWriter, tmp_path / 'a_data.ndjson', backend) == expected
+
+
+def test_empty_json_output_is_an_empty_array(tmp_path):
+    with JsonArrayWriter(tmp_path / 'a_data.json'):
+        pass
+
+    assert json.loads((tmp_path / 'a_data.json').read_bytes()) == []
+
+
+def test_encoder_converts_columns_to_native_values():
+    df = pd.DataFrame({
+        'quantity': pd.array([1000, None], dtype='Int64'),
+        'price': [99.5, float('nan')],
+        'sent_time': [pd.Timestamp('2025-01-30 13:03:30'),
+                      pd.Timestamp('2025-01-30 09:00:00.25')],
+        'mixed': [datetime(2025, 1, 30), 7.0],
+    })
+
+    assert RecordEncoder('json').encode(df) == [
+        {'quantity': 1000, 'price': 99.5, 'sent_time': '2025-01-30 13:03:30',
+         'mixed': '2025-01-30 00:00:00'},
+        {'quantity': None, 'price': None, 'sent_time': '2025-01-30 09:00:00.250000',
+         'mixed': 7.0},
+    ]
+    items = RecordEncoder('dynamodb').encode(df)
+    assert items[0]['price'] == Decimal('99.5') and items[1]['mixed'] == Decimal('7.0')
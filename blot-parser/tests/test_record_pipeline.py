@@ -0,0 +1,87 @@
+"""
+Tests for record_pipeline - parallel sheet preparation matches the sequential pipeline
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from excel_processor import ExcelProcessor
+from field_mapper import FieldMapper
+from generate_blots import generate_blot
+from record_pipeline import RecordPipeline
+
+MAPPINGS_DIR = Path(__file__).resolve().parent.parent / 'mappings'
+
+
+@pytest.fixture(scope='module')
+def blot(tmp_path_factory):
+    return generate_blot(tmp_path_factory.mktemp('blots') / 'bloomberg-synthetic.xlsx',
+                         'bloomberg', rows=120, sheets=4, extra_columns=2)
+
+
+def make_pipeline(**options):
+    processor = ExcelProcessor()
+    return RecordPipeline(processor, FieldMapper(str(MAPPINGS_DIR)), chunk_size=50, **options)
+
+
+def run(pipeline, path):
+    """Run one workbook, returning its chunks and summary"""
+    chunks = []
+    summary = pipeline.run(pipeline.excel_processor.read_excel_file(path, 'bloomberg'),
+                           path.name, 'bloomberg', chunks.append)
+    return chunks, summary
+
+
+@pytest.mark.parametrize('sheet_executor', ['thread', 'process'])
+def test_parallel_sheets_give_the_sequential_chunks_in_order(blot, sheet_executor):
+    expected = run(make_pipeline(), blot)
+    pipeline = make_pipeline(sheet_workers=2, sheet_executor=sheet_executor,
+                             parallel_min_rows=0)
+
+    try:
+        assert run(pipeline, blot) == expected
+        # The pool started for the first workbook is reused by the next one
+        executor = pipeline._executor
+        assert executor is not None
+        assert run(pipeline, blot) == expected
+        assert pipeline._executor is executor
+    finally:
+        pipeline.close()
+
+    assert pipeline._executor is None
+    assert [len(chunk) for chunk in expected[0]] == [50, 50, 20] * 4
+    assert list(expected[1]['sheets']) == ['Download Results', 'Allocations 1',
+                                           'Allocations 2', 'Allocations 3']
+
+
+def test_small_workbooks_are_prepared_sequentially(blot):
+    pipeline = make_pipeline(sheet_workers=2, sheet_executor='thread', parallel_min_rows=10 ** 6)
+
+    run(pipeline, blot)
+
+    assert pipeline._executor is None
+
+
+def test_failed_sheet_fails_the_workbook(blot, monkeypatch):
+    pipeline = make_pipeline(sheet_workers=2, sheet_executor='thread', parallel_min_rows=0)
+    excel_data = {name: pd.DataFrame({'Status': ['Accepted']}) for name in 'abc'}
+    bad_sheet = excel_data['b']
+    original = RecordPipeline.prepare_sheet
+
+    def prepare_sheet(self, df, file_name, vendor, encode=True):
+        if df is bad_sheet:
+            raise RuntimeError('corrupt sheet')
+        return original(self, df, file_name, vendor, encode=encode)
+
+    monkeypatch.setattr(RecordPipeline, 'prepare_sheet', prepare_sheet)
+    chunks = []
+
+    try:
+        with pytest.raises(RuntimeError, match='corrupt sheet'):
+            pipeline.run(excel_data, 'bloomberg-bad.xlsx', 'bloomberg', chunks.append)
+    finally:
+        pipeline.close()
+
+    assert len(chunks) == 1
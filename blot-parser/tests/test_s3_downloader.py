@@ -0,0 +1,123 @@
+"""
+Tests for s3_downloader - in-memory and spooled downloads, version pinning and retries
+"""
+
+import os
+
+import pytest
+from botocore.exceptions import ClientError
+
+from s3_downloader import S3Downloader, StaleObjectError
+from stubs import StubS3Client
+
+BUCKET = 'blot-parser-input'
+KEY = 'uploads/bloomberg-trades.xlsx'
+BODY = bytes(range(256)) * 40
+
+
+class RecordingS3Client(StubS3Client):
+    """Stub client keeping the arguments of every GetObject call"""
+
+    def __init__(self):
+        super().__init__()
+        self.gets = []
+
+    def get_object(self, **kwargs):
+        self.gets.append(kwargs)
+        return super().get_object(**kwargs)
+
+
+@pytest.fixture
+def client():
+    return RecordingS3Client()
+
+
+def make_downloader(client, tmp_path, threshold=len(BODY) - 1):
+    return S3Downloader(client, spool_threshold=threshold, part_size=1000, max_workers=1,
+                        spool_dir=str(tmp_path))
+
+
+def test_object_up_to_the_threshold_is_read_in_memory(client, tmp_path):
+    etag = client.put_object(Bucket=BUCKET, Key=KEY, Body=BODY)['ETag']
+
+    with make_downloader(client, tmp_path, threshold=len(BODY)).download(BUCKET, KEY) as obj:
+        assert obj.content == BODY
+        assert obj.path is None
+        assert obj.filename == 'bloomberg-trades.xlsx'
+
+    assert client.gets == [{'Bucket': BUCKET, 'Key': KEY, 'IfMatch': etag}]
+
+
+def test_larger_object_is_spooled_with_pinned_ranged_gets(client, tmp_path):
+    etag = client.put_object(Bucket=BUCKET, Key=KEY, Body=BODY)['ETag']
+
+    with make_downloader(client, tmp_path).download(BUCKET, KEY) as obj:
+        assert obj.content is None
+        assert obj.path.read_bytes() == BODY
+        path = obj.path
+
+    assert not path.exists()
+    ranges = [get['Range'] for get in client.gets]
+    assert ranges == [f"bytes={start}-{start + 999}" for start in range(0, 10000, 1000)] + \
+        ['bytes=10000-10239']
+    assert {get['IfMatch'] for get in client.gets} == {etag}
+
+
+@pytest.mark.parametrize('threshold', [len(BODY) * 2, 0])
+def test_event_version_is_read_after_the_key_was_overwritten(client, tmp_path, threshold):
+    first = client.put_object(Bucket=BUCKET, Key=KEY, Body=BODY)
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=b'newer upload')
+
+    downloader = make_downloader(client, tmp_path, threshold)
+    with downloader.download(BUCKET, KEY, first['VersionId'], first['ETag'].strip('"')) as obj:
+        content = obj.content if obj.path is None else obj.path.read_bytes()
+
+    assert content == BODY
+    assert {get['VersionId'] for get in client.gets} == {first['VersionId']}
+
+
+def test_overwritten_key_without_version_is_stale(client, tmp_path):
+    etag = client.put_object(Bucket=BUCKET, Key=KEY, Body=BODY)['ETag']
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=b'newer upload')
+
+    with pytest.raises(StaleObjectError):
+        make_downloader(client, tmp_path).download(BUCKET, KEY, expected_etag=etag.strip('"'))
+
+    assert client.gets == []
+
+
+def test_failed_part_is_retried(client, tmp_path):
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=BODY)
+    get_object = client.get_object
+    failures = []
+
+    def flaky_get_object(**kwargs):
+        if kwargs['Range'] == 'bytes=2000-2999' and not failures:
+            failures.append(kwargs)
+            raise ClientError({'Error': {'Code': 'SlowDown', 'Message': 'Slow down'}},
+                              'GetObject')
+        return get_object(**kwargs)
+
+    client.get_object = flaky_get_object
+    with make_downloader(client, tmp_path).download(BUCKET, KEY) as obj:
+        assert obj.path.read_bytes() == BODY
+
+    assert len(failures) == 1
+    assert len(client.gets) == 11
+
+
+def test_overwrite_during_spooling_fails_and_removes_the_file(client, tmp_path):
+    client.put_object(Bucket=BUCKET, Key=KEY, Body=BODY)
+    get_object = client.get_object
+
+    def overwriting_get_object(**kwargs):
+        response = get_object(**kwargs)
+        client.objects[(BUCKET, KEY)] = b'overwritten mid-download'
+        return response
+
+    client.get_object = overwriting_get_object
+    with pytest.raises(ClientError) as error:
+        make_downloader(client, tmp_path).download(BUCKET, KEY)
+
+    assert error.value.response['Error']['Code'] == 'PreconditionFailed'
+    assert os.listdir(tmp_path) == []
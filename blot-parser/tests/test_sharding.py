@@ -0,0 +1,67 @@
+"""
+Tests for sharding - shard parsing, sharded runs and merged shard summaries
+"""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+from blot_parser import BlotParser
+from sharding import load_summaries, merge_summaries, parse_shard
+
+PARSER_DIR = Path(__file__).resolve().parent.parent
+INPUT_FILES = sorted((PARSER_DIR.parent / 'Input-files').glob('*.xls*'))
+
+
+def test_parse_shard_accepts_only_i_of_n():
+    assert parse_shard('2/8') == (2, 8)
+    for value in ('0/4', '5/4', '1', 'a/b', '1/2/3'):
+        with pytest.raises(ValueError):
+            parse_shard(value)
+
+
+def test_shards_together_write_every_output_and_merge_without_gaps(tmp_path, monkeypatch):
+    monkeypatch.chdir(PARSER_DIR)
+    for year in ('2023', '2024', '2025'):
+        for source in INPUT_FILES:
+            (tmp_path / 'in' / year).mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(source, tmp_path / 'in' / year / source.name)
+    pattern = str(tmp_path / 'in' / '*' / '*.xlsx')
+
+    for index in (1, 2, 3):
+        BlotParser(output_dir=str(tmp_path / f"out-{index}"), input_patterns=[pattern],
+                   shard=(index, 3)).run()
+
+    outputs = sorted(path.relative_to(path.parents[1]).as_posix()
+                     for path in tmp_path.glob('out-*/*/*_data.json'))
+    assert outputs == sorted(f"{year}/{source.name}_data.json"
+                             for year in ('2023', '2024', '2025') for source in INPUT_FILES)
+
+    report = merge_summaries(load_summaries(str(tmp_path / f"out-{index}") for index in (1, 2, 3)))
+    assert report['missing'] == []
+    assert report['totals']['processed'] == 3 * len(INPUT_FILES)
+    assert report['totals']['failed'] == 0
+
+
+def summary(index, count, started_at='2026-01-05T09:00:00+00:00', seconds=10.0, processed=2):
+    return {'shard_index': index, 'shard_count': count, 'started_at': started_at,
+            'seconds': seconds, 'files': processed, 'processed': processed, 'skipped': 0,
+            'failed': 0, 'records': 100 * processed, 'bytes': 1000 * processed}
+
+
+def test_merge_reports_missing_shards_and_spans_the_wall_time():
+    report = merge_summaries([
+        summary(1, 3),
+        summary(3, 3, started_at='2026-01-05T09:00:05+00:00'),
+        # A rerun of shard 1 replaces its earlier summary
+        summary(1, 3, started_at='2026-01-05T09:00:02+00:00', processed=4),
+    ])
+
+    assert report['missing'] == [2]
+    assert [s['processed'] for s in report['shards']] == [4, 2]
+    assert report['totals']['seconds'] == 13.0
+    assert report['totals']['records'] == 600
+
+    with pytest.raises(ValueError):
+        merge_summaries([summary(1, 2), summary(1, 3)])